@@ -0,0 +1,123 @@
+"""
+comprobación previa de formatos basados en zip (docx, xlsx, pptx, epub)
+
+solo se lee el directorio central del zip para sumar los tamaños declarados
+y los ratios de compresión, sin descomprimir nada. zipfile nunca entrega más
+bytes que el tamaño declarado de cada entrada, así que estos límites acotan
+también lo que los conversores pueden llegar a expandir
+"""
+import mmap
+import zipfile
+from typing import Any, Dict, List, Tuple, Union
+from src.core.exceptions import ArchiveLimitExceeded, ConversionError
+from src.core.inputs import open_binary
+
+ZIP_FORMATS = ('docx', 'xlsx', 'pptx', 'epub', 'zip')
+ZIP_MAGIC = b'PK\x03\x04'
+
+DEFAULT_MAX_UNCOMPRESSED_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_RATIO = 200
+DEFAULT_MAX_ENTRIES = 10000
+
+ARCHIVE_ACTION_REJECT = 'reject'
+ARCHIVE_ACTION_DOWNGRADE = 'downgrade'
+
+
+def is_zip_container(content: Union[bytes, mmap.mmap], extension: str) -> bool:
+    """verifica si el contenido es un contenedor zip de un formato soportado"""
+    return extension in ZIP_FORMATS and content[:4] == ZIP_MAGIC
+
+
+def inspect_zip(content: Union[bytes, mmap.mmap]) -> Tuple[Dict[str, Any], List[zipfile.ZipInfo]]:
+    """
+    lee el directorio central del zip
+
+    Args:
+        content: bytes o mmap del archivo
+
+    Returns:
+        tupla (estadísticas, entradas del directorio central)
+
+    Raises:
+        ConversionError: si el directorio central no se puede leer
+    """
+    try:
+        with zipfile.ZipFile(open_binary(content)) as archive:
+            entries = archive.infolist()
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, ValueError, EOFError) as e:
+        raise ConversionError(f"Corrupt archive: {str(e)}", error_type='archive_corrupt')
+
+    compressed = sum(info.compress_size for info in entries)
+    uncompressed = sum(info.file_size for info in entries)
+    max_entry_ratio = max(
+        (info.file_size / info.compress_size for info in entries if info.compress_size),
+        default=0.0
+    )
+
+    stats = {
+        'entries': len(entries),
+        'compressed_bytes': compressed,
+        'uncompressed_bytes': uncompressed,
+        'ratio': round(uncompressed / compressed, 2) if compressed else 0.0,
+        'max_entry_ratio': round(max_entry_ratio, 2)
+    }
+    return stats, entries
+
+
+def enforce_archive_limits(
+    stats: Dict[str, Any],
+    max_uncompressed_bytes: int = DEFAULT_MAX_UNCOMPRESSED_BYTES,
+    max_ratio: float = DEFAULT_MAX_RATIO,
+    max_entries: int = DEFAULT_MAX_ENTRIES
+) -> None:
+    """
+    valida las estadísticas del zip contra los límites
+
+    Raises:
+        ArchiveLimitExceeded: 413 si el tamaño descomprimido supera el límite,
+            422 si el ratio o el número de entradas son sospechosos
+    """
+    if stats['uncompressed_bytes'] > max_uncompressed_bytes:
+        raise ArchiveLimitExceeded(
+            f"Archive expands to {stats['uncompressed_bytes']} bytes (limit {max_uncompressed_bytes})",
+            details=dict(stats, limit=max_uncompressed_bytes)
+        )
+
+    if stats['ratio'] > max_ratio:
+        raise ArchiveLimitExceeded(
+            f"Archive compression ratio {stats['ratio']} exceeds {max_ratio}",
+            error_type='archive_ratio_exceeded',
+            status_code=422,
+            details=dict(stats, limit=max_ratio)
+        )
+
+    if stats['entries'] > max_entries:
+        raise ArchiveLimitExceeded(
+            f"Archive has {stats['entries']} entries (limit {max_entries})",
+            error_type='archive_too_many_entries',
+            status_code=422,
+            details=dict(stats, limit=max_entries)
+        )
+
+
+def describe_archive(entries: List[zipfile.ZipInfo], reason: str) -> str:
+    """
+    genera un markdown con el listado de entradas, sin extraerlas
+
+    Args:
+        entries: entradas del directorio central
+        reason: motivo por el que no se convirtió el contenido
+
+    Returns:
+        markdown con la tabla de entradas
+    """
+    lines = [
+        f"> Content not converted: {reason}",
+        '',
+        '| Entry | Compressed | Uncompressed |',
+        '| --- | --- | --- |'
+    ]
+    for info in entries:
+        name = info.filename.replace('|', '\\|')
+        lines.append(f"| {name} | {info.compress_size} | {info.file_size} |")
+    return '\n'.join(lines)
@@ -0,0 +1,185 @@
+"""
+troceado del markdown para pipelines de recuperación
+
+divide la salida en fragmentos que respetan los encabezados y no superan un
+tamaño objetivo en tokens aproximados, con su rango [start, end) en bytes
+utf-8 y la ruta de encabezados de la sección, para que los consumidores no
+tengan que descargar y volver a tokenizar el markdown. los fragmentos no
+repiten el texto: se lee del markdown por su rango. los encabezados salen
+del índice de secciones y los bloques se empaquetan a medida que se leen,
+en un solo recorrido por líneas
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from src.core.section_index import build_section_index
+
+DEFAULT_TARGET_TOKENS = 512
+
+CHUNKS_SUFFIX = '.chunks.jsonl'
+
+# aproximación habitual para texto en alfabeto latino
+CHARS_PER_TOKEN = 4
+
+
+def chunks_key(output_key: str) -> str:
+    """key del jsonl de fragmentos junto a la salida"""
+    return output_key + CHUNKS_SUFFIX
+
+
+def approx_tokens(text: str) -> int:
+    """estima los tokens de un texto sin tokenizador"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def resolve_chunk_target(option: Union[bool, int, None], default: int = DEFAULT_TARGET_TOKENS) -> Optional[int]:
+    """
+    interpreta la opción de troceado
+
+    Args:
+        option: True para el tamaño por defecto, un entero con el tamaño
+            objetivo en tokens, o False/None para no trocear
+        default: tamaño objetivo cuando option es True
+
+    Returns:
+        tamaño objetivo en tokens o None
+
+    Raises:
+        ValueError: si la opción no es un booleano ni un entero positivo
+    """
+    if option is None or option is False:
+        return None
+    if option is True:
+        return default
+    if not isinstance(option, int) or option <= 0:
+        raise ValueError("Invalid chunking, expected a boolean or a positive token count")
+    return option
+
+
+def _blocks(
+    markdown: str,
+    headings: Dict[int, Tuple[int, str]]
+) -> Iterator[Tuple[int, List[Tuple[int, str]], Optional[Tuple[int, str]]]]:
+    """
+    agrupa las líneas en bloques (párrafos, tablas, bloques de código, encabezados)
+
+    Args:
+        markdown: texto convertido
+        headings: (nivel, título) de cada encabezado del índice por su offset
+
+    Yields:
+        tupla (offset de inicio, líneas con su offset, (nivel, título) si es un encabezado)
+    """
+    lines: List[Tuple[int, str]] = []
+    in_fence: Optional[str] = None
+    offset = 0
+
+    for line in markdown.split('\n'):
+        start = offset
+        offset += len(line.encode('utf-8')) + 1
+        stripped = line.strip()
+
+        fence = stripped[:3] if stripped[:3] in ('```', '~~~') else None
+        if in_fence is not None:
+            lines.append((start, line))
+            if fence == in_fence:
+                in_fence = None
+            continue
+
+        heading = headings.get(start)
+        if heading or not stripped:
+            if lines:
+                yield lines[0][0], lines, None
+                lines = []
+            if heading:
+                yield start, [(start, line)], heading
+            continue
+
+        if fence is not None:
+            in_fence = fence
+        lines.append((start, line))
+
+    if lines:
+        yield lines[0][0], lines, None
+
+
+def _split_line(start: int, line: str, max_chars: int) -> Iterator[Tuple[int, str]]:
+    """parte una línea demasiado larga en trozos de como mucho max_chars caracteres"""
+    # offset acumulado: codificar el prefijo en cada trozo sería cuadrático
+    offset = start
+    for position in range(0, len(line), max_chars):
+        piece = line[position:position + max_chars]
+        yield offset, piece
+        offset += len(piece.encode('utf-8'))
+
+
+def chunk_markdown(
+    markdown: str,
+    target_tokens: int = DEFAULT_TARGET_TOKENS,
+    index: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    trocea el markdown respetando los encabezados
+
+    cada encabezado abre un fragmento nuevo; dentro de una sección los
+    bloques se agrupan hasta el tamaño objetivo y los bloques más grandes se
+    parten por líneas (y las líneas más largas, por caracteres)
+
+    Args:
+        markdown: texto convertido
+        target_tokens: tamaño máximo aproximado de cada fragmento
+        index: índice de secciones del markdown, si ya se construyó
+
+    Returns:
+        lista de fragmentos con chunk, start, end (bytes), tokens y headings;
+        el texto de cada uno es markdown.encode('utf-8')[start:end]
+    """
+    if index is None:
+        index = build_section_index(markdown)
+    headings = {entry['start']: (entry['level'], entry['title']) for entry in index['headings']}
+    encoded = markdown.encode('utf-8')
+    max_chars = target_tokens * CHARS_PER_TOKEN
+    chunks: List[Dict[str, Any]] = []
+    path: List[Tuple[int, str]] = []
+    current: Optional[Dict[str, Any]] = None
+
+    def flush() -> None:
+        nonlocal current
+        if current is not None:
+            chunks.append({
+                'chunk': len(chunks),
+                'start': current['start'],
+                'end': current['end'],
+                'tokens': approx_tokens(encoded[current['start']:current['end']].decode('utf-8')),
+                'headings': current['headings']
+            })
+        current = None
+
+    def add(start: int, end: int) -> None:
+        nonlocal current
+        # medir con los separadores entre bloques incluidos
+        if current is not None and approx_tokens(encoded[current['start']:end].decode('utf-8')) > target_tokens:
+            flush()
+        if current is None:
+            current = {'start': start, 'headings': [title for _, title in path]}
+        current['end'] = end
+
+    for start, lines, heading in _blocks(markdown, headings):
+        if heading is not None:
+            flush()
+            level, title = heading
+            while path and path[-1][0] >= level:
+                path.pop()
+            path.append((level, title))
+
+        last_start, last_line = lines[-1]
+        end = last_start + len(last_line.encode('utf-8'))
+        if approx_tokens(encoded[start:end].decode('utf-8')) <= target_tokens:
+            add(start, end)
+            continue
+
+        # bloque más grande que el objetivo: por líneas y, si no basta, por caracteres
+        for line_start, line in lines:
+            for piece_start, piece in _split_line(line_start, line, max_chars) if line else [(line_start, line)]:
+                add(piece_start, piece_start + len(piece.encode('utf-8')))
+
+    flush()
+    return chunks
@@ -0,0 +1,98 @@
+"""
+compresión de las salidas guardadas en s3
+
+el markdown se comprime entre 4 y 8 veces: guardarlo con Content-Encoding
+reduce el tiempo de subida, el almacenamiento y la salida de datos hacia los
+lectores de output/. gzip usa zlib de la librería estándar; zstd necesita el
+paquete opcional zstandard, que se importa solo si se pide
+"""
+import importlib
+import time
+import zlib
+from typing import Any, Dict, Iterable, Optional
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+DEFAULT_LEVELS = {GZIP: 6, ZSTD: 3}
+# por debajo de este tamaño la cabecera y la petición pesan más que el ahorro
+DEFAULT_MIN_SIZE = 4096
+
+
+class Compressor:
+    """
+    compresor incremental que anota bytes de entrada, de salida y tiempo
+    """
+
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        """
+        inicializa el compresor
+
+        Args:
+            encoding: gzip o zstd (el valor de Content-Encoding)
+            level: nivel de compresión (default: DEFAULT_LEVELS)
+
+        Raises:
+            ValueError: si la codificación no se soporta o falta zstandard
+        """
+        if level is None:
+            level = DEFAULT_LEVELS.get(encoding, 0)
+        if encoding == GZIP:
+            # wbits 31: formato gzip con cabecera, el que espera Content-Encoding: gzip
+            self._compressor: Any = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif encoding == ZSTD:
+            try:
+                zstandard = importlib.import_module('zstandard')
+            except ImportError:
+                raise ValueError("zstd output compression requires the zstandard package")
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            raise ValueError(f"Unsupported output compression: {encoding}")
+        self.encoding = encoding
+        self.level = level
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+
+    def compress(self, data: bytes) -> bytes:
+        """comprime un bloque; puede devolver vacío hasta que haya salida"""
+        started = time.monotonic()
+        out = self._compressor.compress(data)
+        self.seconds += time.monotonic() - started
+        self.bytes_in += len(data)
+        self.bytes_out += len(out)
+        return out
+
+    def flush(self) -> bytes:
+        """cierra el flujo y devuelve los últimos bytes"""
+        started = time.monotonic()
+        out = self._compressor.flush()
+        self.seconds += time.monotonic() - started
+        self.bytes_out += len(out)
+        return out
+
+
+def compress(data: bytes, compressor: Compressor) -> bytes:
+    """comprime un cuerpo completo"""
+    return compressor.compress(data) + compressor.flush()
+
+
+def summarize_compression(compressors: Iterable[Compressor]) -> Optional[Dict[str, Any]]:
+    """
+    resume la compresión de las salidas de un registro
+
+    Returns:
+        diccionario con encoding, bytes sin comprimir y comprimidos, ratio
+        (sin comprimir entre comprimido) y segundos, o None si no se comprimió nada
+    """
+    compressors = list(compressors)
+    if not compressors:
+        return None
+    bytes_in = sum(c.bytes_in for c in compressors)
+    bytes_out = sum(c.bytes_out for c in compressors)
+    return {
+        'encoding': compressors[0].encoding,
+        'bytes_in': bytes_in,
+        'bytes_out': bytes_out,
+        'ratio': round(bytes_in / bytes_out, 2) if bytes_out else 1.0,
+        'seconds': round(sum(c.seconds for c in compressors), 4)
+    }
@@ -3,11 +3,16 @@ servicio de configuración que maneja variables de entorno y aws secrets manager
 """
 import os
 import json
+import time
 import boto3
 from typing import Dict, Any, Optional
 from functools import lru_cache
 from botocore.exceptions import ClientError
 
+# segundos sin reintentar la carga del secreto tras un error; cada intento
+# fallido cuesta una llamada de red por cada lectura de configuración
+SECRET_RETRY_SECONDS = 300
+
 
 class ConfigService:
     """
@@ -24,6 +29,10 @@ class ConfigService:
         self._secrets_client = secrets_client
         self._cache: Dict[str, Any] = {}
         self._secrets_cache: Dict[str, Any] = {}  # cache para el secreto completo
+        # el secreto no existe (o no es json): no se vuelve a pedir hasta clear_cache
+        self._secrets_missing = False
+        # momento del último error al cargarlo, para no reintentar en cada lectura
+        self._secrets_failed_at: Optional[float] = None
         self._secrets_prefix = os.environ.get('SECRETS_PREFIX', 'markdown-converter')
         self._use_secrets_manager = os.environ.get('USE_SECRETS_MANAGER', 'true').lower() == 'true'
         self._stage = os.environ.get('STAGE', 'prod')
@@ -51,6 +60,12 @@ class ConfigService:
         if self._secrets_cache:
             return self._secrets_cache
 
+        # las claves ausentes no deben repetir la llamada a secrets manager
+        if self._secrets_missing:
+            return {}
+        if self._secrets_failed_at is not None and time.monotonic() - self._secrets_failed_at < SECRET_RETRY_SECONDS:
+            return {}
+
         # construir el nombre del secreto
         secret_name = f"{self._secrets_prefix}/{self._stage}/config"
 
@@ -63,11 +78,14 @@ class ConfigService:
                 # parsear como json
                 try:
                     self._secrets_cache = json.loads(secret_value)
+                    self._secrets_missing = not self._secrets_cache
                     return self._secrets_cache
                 except json.JSONDecodeError:
                     print(f"Error parsing secret {secret_name} as JSON")
+                    self._secrets_missing = True
                     return {}
 
+            self._secrets_missing = True
             return {}
 
         except ClientError as e:
@@ -75,13 +93,16 @@ class ConfigService:
 
             # si el secreto no existe, es normal
             if error_code == 'ResourceNotFoundException':
+                self._secrets_missing = True
                 return {}
 
             # para otros errores, loggear pero no fallar
             print(f"Error getting secret {secret_name}: {error_code}")
+            self._secrets_failed_at = time.monotonic()
             return {}
         except Exception as e:
             print(f"Unexpected error getting secret {secret_name}: {str(e)}")
+            self._secrets_failed_at = time.monotonic()
             return {}
 
     def _get_from_secrets_manager(self, key: str) -> Optional[str]:
@@ -212,6 +233,8 @@ class ConfigService:
         """limpia la cache de configuración"""
         self._cache.clear()
         self._secrets_cache.clear()
+        self._secrets_missing = False
+        self._secrets_failed_at = None
 
     def refresh(self, key: str) -> Optional[str]:
         """
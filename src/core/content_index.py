@@ -0,0 +1,90 @@
+"""
+índice de contenido convertido para deduplicar entre keys distintas
+
+asocia el hash del contenido de entrada (junto con la extensión, las
+opciones de conversión y la versión de markitdown, que también determinan
+la salida) con la key de salida que ya se generó a partir de él. cuando los
+mismos bytes llegan bajo otra key, la salida se produce con una copia en el
+servidor en lugar de convertir de nuevo. el índice por defecto vive en el
+propio bucket bajo un prefijo reservado; cualquier objeto con get() y put()
+sirve como almacén alternativo
+"""
+import json
+from typing import Any, Dict, Optional
+from botocore.exceptions import ClientError
+from markitdown import __version__ as markitdown_version
+from src.utils.utils import get_content_hash
+
+DEFAULT_INDEX_PREFIX = 'dedup/'
+
+
+def content_key(digest: str, extension: Optional[str], options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    identificador de una conversión: mismo contenido, formato, opciones y versión de markitdown
+
+    Args:
+        digest: hash sha256 del contenido de entrada
+        extension: extensión del archivo
+        options: opciones de conversión del registro
+
+    Returns:
+        hash sha256 que identifica la salida esperada
+    """
+    options_json = json.dumps(options or {}, sort_keys=True, separators=(',', ':'))
+    return get_content_hash(f"{digest}:{extension or ''}:{options_json}:{markitdown_version}")
+
+
+class S3ContentIndex:
+    """
+    guarda cada entrada del índice como un objeto json bajo un prefijo reservado del bucket
+    """
+
+    def __init__(self, s3_client: Any, prefix: str = DEFAULT_INDEX_PREFIX):
+        """
+        inicializa el índice
+
+        Args:
+            s3_client: cliente s3 de boto3
+            prefix: prefijo reservado de las entradas (fuera de input/ para no disparar eventos)
+        """
+        self.s3_client = s3_client
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        """key del objeto de una entrada"""
+        return f"{self.prefix}{key}.json"
+
+    def get(self, bucket: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        lee la entrada de un contenido
+
+        Args:
+            bucket: bucket de las salidas
+            key: identificador de content_key()
+
+        Returns:
+            entrada con la key de salida, o None si el contenido no se ha convertido
+        """
+        try:
+            response = self.s3_client.get_object(Bucket=bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+        return json.loads(response['Body'].read())
+
+    def put(self, bucket: str, key: str, entry: Dict[str, Any]) -> None:
+        """
+        guarda la entrada de un contenido; la última conversión gana
+
+        Args:
+            bucket: bucket de las salidas
+            key: identificador de content_key()
+            entry: diccionario con output y las salidas hermanas
+        """
+        self.s3_client.put_object(
+            Bucket=bucket,
+            Key=self._key(key),
+            Body=json.dumps(entry).encode('utf-8'),
+            ContentType='application/json'
+        )
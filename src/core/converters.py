@@ -1,71 +1,511 @@
 import os
+import mmap
 import tempfile
+import time
 import io
-from markitdown import MarkItDown
-from src.utils.utils import get_file_extension, get_current_timestamp
+from typing import Any, Dict, Optional
+from markitdown import DocumentConverterResult, MarkItDown
+from src.core.archive_guard import (
+    ARCHIVE_ACTION_DOWNGRADE,
+    DEFAULT_MAX_ENTRIES,
+    DEFAULT_MAX_RATIO,
+    DEFAULT_MAX_UNCOMPRESSED_BYTES,
+    describe_archive,
+    enforce_archive_limits,
+    inspect_zip,
+    is_zip_container
+)
+from src.core.chunking import DEFAULT_TARGET_TOKENS, chunk_markdown, resolve_chunk_target
+from src.core.config import get_config, get_config_bool, get_config_int
+from src.core.cost_model import conversion_features, get_cost_model, peak_memory_mb
+from src.core.dependencies import get_dependency
+from src.core.exceptions import ArchiveLimitExceeded, ConversionError
+from src.core.failure_cache import GENERIC_FAILURE_MESSAGE, get_negative_cache
+from src.core.formats import FORMAT_OUTLINE_JSON, render_formats, resolve_formats
+from src.core.html_stream import convert_html_streaming
+from src.core.inputs import ConversionInput, open_binary
+from src.core.images import IMAGE_POLICY_EXTERNAL, IMAGE_POLICY_INLINE, apply_image_policy
+from src.core.pdf_pages import PAGE_CHECKPOINTS_AVAILABLE, convert_pdf_pages
+from src.core.pipeline import Pipeline, PipelineItem, Stage
+from src.core.pdf_triage import DEFAULT_SAMPLE_PAGES, PDF_IMAGE_ONLY, PDF_OK, triage_pdf
+from src.core.pool import ConverterPool, default_pool_size
+from src.core.postprocess import postprocess_markdown, resolve_steps
+from src.core.section_index import build_section_index
+from src.core.singleflight import get_singleflight
+from src.utils.utils import get_content_hash, get_file_extension, get_current_timestamp
 
-# inicializar markitdown globalmente
-markitdown = MarkItDown()
+# pool global de instancias de markitdown (una por conversión concurrente)
+_converter_pool: Optional[ConverterPool] = None
 
 
-def convert_to_markdown(content, filename=None):
-    """convierte contenido a markdown usando markitdown"""
+def get_converter_pool() -> ConverterPool:
+    """
+    obtiene el pool global de conversores, creándolo la primera vez
+
+    Returns:
+        ConverterPool: pool de instancias de markitdown
+    """
+    global _converter_pool
+    if _converter_pool is None:
+        _converter_pool = ConverterPool(
+            MarkItDown,
+            max_size=get_config_int('CONVERTER_POOL_SIZE', default_pool_size())
+        )
+    return _converter_pool
+
+
+# a partir de este tamaño el html se convierte en streaming sin construir el dom
+DEFAULT_HTML_STREAMING_THRESHOLD = 5 * 1024 * 1024
+HTML_EXTENSIONS = ('html', 'htm')
+
+
+def _should_stream_html(content, filename):
+    """determina si el html es lo bastante grande para convertirlo en streaming"""
+    if not filename or get_file_extension(filename) not in HTML_EXTENSIONS:
+        return False
+    threshold = get_config_int('HTML_STREAMING_THRESHOLD', DEFAULT_HTML_STREAMING_THRESHOLD)
+    return len(content) > threshold
+
+
+def _guard_archive(content, filename):
+    """
+    valida los límites de descompresión de los formatos zip leyendo solo el directorio central
+
+    Returns:
+        tupla (estadísticas del zip o None, markdown degradado o None)
+
+    Raises:
+        ArchiveLimitExceeded: si supera los límites y la acción configurada es rechazar
+    """
+    if not filename or isinstance(content, str):
+        return None, None
+    if not is_zip_container(content, get_file_extension(filename) or ''):
+        return None, None
+
+    stats, entries = inspect_zip(content)
     try:
-        # inicializar variables para evitar "unbound" errors
-        text_content = None
-        binary_content = None
-        is_text = False
-        
-        # mantener el contenido original en bytes y detectar si es texto
-        if isinstance(content, bytes):
-            try:
-                text_content = content.decode('utf-8')
-                is_text = True
-            except UnicodeDecodeError:
-                # si no se puede decodificar, es binario
-                is_text = False
-                binary_content = content
-        else:
-            # si ya es string, es texto
+        enforce_archive_limits(
+            stats,
+            max_uncompressed_bytes=get_config_int('ARCHIVE_MAX_UNCOMPRESSED_BYTES', DEFAULT_MAX_UNCOMPRESSED_BYTES),
+            max_ratio=get_config_int('ARCHIVE_MAX_RATIO', DEFAULT_MAX_RATIO),
+            max_entries=get_config_int('ARCHIVE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        )
+    except ArchiveLimitExceeded as e:
+        if get_config('ARCHIVE_LIMIT_ACTION') != ARCHIVE_ACTION_DOWNGRADE:
+            raise
+        # degradar: listar las entradas sin extraer nada
+        stats['downgraded'] = True
+        stats['reason'] = e.error_type
+        return stats, describe_archive(entries, str(e))
+
+    return stats, None
+
+
+def _triage_pdf(content, filename):
+    """
+    clasifica los pdfs antes de la conversión completa
+
+    Returns:
+        resultado del triage o None si no aplica
+
+    Raises:
+        ConversionError: si el pdf está corrupto, truncado o cifrado
+    """
+    if not filename or isinstance(content, str) or get_file_extension(filename) != 'pdf':
+        return None
+    if not get_config_bool('PDF_TRIAGE', True):
+        return None
+    return triage_pdf(content, sample_pages=get_config_int('PDF_TRIAGE_SAMPLE_PAGES', DEFAULT_SAMPLE_PAGES))
+
+
+def conversion_key(digest, filename=None, image_policy=None, postprocess=None):
+    """genera la key que identifica una conversión: hash del contenido, formato y opciones"""
+    return ':'.join([
+        digest,
+        get_file_extension(filename) or '',
+        image_policy or '',
+        repr(postprocess)
+    ])
+
+
+def convert_to_markdown(content, filename=None, image_policy=None, image_store=None, postprocess=None,
+                        deadline=None, index=None, chunking=None, formats=None, features=None):
+    """
+    convierte contenido a markdown, coalesciendo conversiones idénticas concurrentes
+
+    la primera llamada con un contenido convierte y las que llegan mientras
+    tanto comparten su resultado; los contenidos que ya fallaron de forma
+    determinista devuelven el error cacheado sin volver a convertir
+    (ver _convert_to_markdown para los argumentos; index añade el índice de
+    secciones con offsets en bytes, por defecto SECTION_INDEX; chunking los
+    fragmentos para recuperación: True o un tamaño en tokens, por defecto
+    CHUNKING; y formats los formatos adicionales, por defecto OUTPUT_FORMATS).
+    con COST_MODEL, las conversiones propias alimentan el modelo de coste
+    con las características del documento (features, si el llamante ya las
+    calculó con conversion_features; si no, se calculan al detectarlo).
+    content puede ser texto, bytes, un mmap, una ruta (os.PathLike), que se
+    mapea en memoria de solo lectura, o un ConversionInput.
+    la conversión recorre las etapas de get_conversion_pipeline() y los
+    segundos de cada una quedan en metadata['timings']
+    """
+    item = PipelineItem(
+        content=content,
+        filename=filename,
+        image_policy=image_policy,
+        image_store=image_store,
+        postprocess=postprocess,
+        deadline=deadline,
+        index=index,
+        chunking=chunking,
+        formats=formats,
+        features=features
+    )
+    try:
+        get_conversion_pipeline().run(item)
+    finally:
+        # solo se cierra lo que se abrió aquí
+        if isinstance(content, os.PathLike) and 'source' in item:
+            item['source'].close()
+
+    result = item['result']
+    result['metadata']['timings'] = {name: round(seconds, 4) for name, seconds in item.timings.items()}
+    return result
+
+
+class IngestStage(Stage):
+    """envuelve el contenido recibido (texto, bytes, mmap o ruta) en un ConversionInput"""
+
+    name = 'ingest'
+
+    def process(self, item):
+        item['source'] = ConversionInput.of(item['content'])
+
+
+class DetectStage(Stage):
+    """
+    identifica el documento por el hash de su contenido y su extensión y
+    corta de inmediato los que ya fallaron de forma determinista con las
+    mismas opciones (un fallo de una política de imágenes no afecta a otras)
+    """
+
+    name = 'detect'
+
+    def process(self, item):
+        item['digest'] = get_content_hash(item['source'].data)
+        item['failure_key'] = conversion_key(item['digest'], item['filename'], item['image_policy'],
+                                             item['postprocess'])
+        get_negative_cache().raise_if_cached(item['failure_key'])
+        if item.get('features') is None and get_config_bool('COST_MODEL', False):
+            # una sola inspección por documento, la misma que usa el modelo al medir el coste
+            item['features'] = conversion_features(item['source'].data, item['filename'], item['image_policy'])
+
+
+class ConvertStage(Stage):
+    """
+    convierte con markitdown, coalesciendo conversiones idénticas
+
+    la política de imágenes y el post-procesado del markdown se aplican
+    dentro de la conversión coalescida: quienes la comparten reciben el
+    mismo resultado y no deben repetirlos
+    """
+
+    name = 'convert'
+
+    def process(self, item):
+        content = item['source'].data
+        filename = item['filename']
+        args = (content, filename, item['image_policy'], item['image_store'], item['postprocess'], item['deadline'])
+        try:
+            shared = False
+            if not get_config_bool('COALESCE_CONVERSIONS', True):
+                result = _convert_to_markdown(*args)
+            else:
+                key = conversion_key(item['digest'], filename, item['image_policy'], item['postprocess'])
+                result, shared = get_singleflight().do(key, _convert_to_markdown, *args)
+                if shared and result.get('partial'):
+                    # el resultado se cortó con el plazo de otra invocación: este puede tener más tiempo
+                    result, shared = _convert_to_markdown(*args), False
+
+        except ConversionError as e:
+            # errores con tipo y código propios se propagan sin envolver
+            get_negative_cache().record(item['failure_key'], e)
+            raise
+        except Exception as e:
+            get_negative_cache().record(item['failure_key'], e)
+            raise Exception(GENERIC_FAILURE_MESSAGE.format(str(e)))
+
+        if shared:
+            result['metadata']['coalesced'] = True
+        item['result'] = result
+        item['shared'] = shared
+
+
+class PostprocessStage(Stage):
+    """añade las salidas derivadas (índice, fragmentos, formatos) y mide el coste"""
+
+    name = 'postprocess'
+
+    def process(self, item):
+        started = time.monotonic()
+        result = attach_outputs(item['result'], item['index'], item['chunking'], item['formats'])
+
+        # las compartidas y las parciales no miden el coste real de la conversión
+        if not item['shared'] and not result.get('partial') and get_config_bool('COST_MODEL', False):
+            seconds = sum(item.timings.values()) + time.monotonic() - started
+            _observe_cost(item.get('features'), item['filename'], seconds)
+
+
+# pipeline global de conversión
+_conversion_pipeline: Optional[Pipeline] = None
+
+
+def get_conversion_pipeline() -> Pipeline:
+    """
+    obtiene el pipeline de conversión, creándolo la primera vez
+
+    Returns:
+        Pipeline: ingest, detect, convert y postprocess
+    """
+    global _conversion_pipeline
+    if _conversion_pipeline is None:
+        _conversion_pipeline = Pipeline([IngestStage(), DetectStage(), ConvertStage(), PostprocessStage()])
+    return _conversion_pipeline
+
+
+def set_conversion_pipeline(pipeline: Optional[Pipeline]) -> None:
+    """
+    sustituye el pipeline de conversión, p.ej. con otro detector:
+    set_conversion_pipeline(get_conversion_pipeline().replace(MiDetector()));
+    None restaura el de por defecto
+    """
+    global _conversion_pipeline
+    _conversion_pipeline = pipeline
+
+
+def _observe_cost(features, filename, seconds):
+    """registra el coste medido de una conversión sin que un fallo afecte al resultado"""
+    if features is None:
+        # un pipeline sin la etapa de detección no calcula las características
+        return
+    try:
+        get_cost_model().observe(features, seconds, peak_memory_mb())
+    except Exception as e:
+        print(f"Error recording conversion cost for {filename or features['format']}: {str(e)}")
+
+
+def resolve_options(image_policy=None, postprocess=None, index=None, chunking=None, formats=None):
+    """
+    opciones efectivas de una conversión: las del request o, si faltan, las de la configuración
+
+    dos conversiones del mismo contenido con las mismas opciones efectivas
+    producen la misma salida, aunque una las pidiera y otra las heredara
+
+    Returns:
+        diccionario con image_policy, postprocess (pasos), index (bool),
+        chunking (tokens objetivo o None) y formats (en orden canónico)
+
+    Raises:
+        ValueError: si alguna opción no es válida
+    """
+    if index is None:
+        index = get_config_bool('SECTION_INDEX', False)
+    if chunking is None:
+        chunking = get_config_bool('CHUNKING', False)
+    if formats is None:
+        formats = get_config('OUTPUT_FORMATS')
+    if postprocess is None:
+        postprocess = get_config('MARKDOWN_POSTPROCESS')
+    target_tokens = get_config_int('CHUNK_TARGET_TOKENS', DEFAULT_TARGET_TOKENS)
+    return {
+        'image_policy': image_policy or get_config('IMAGE_POLICY'),
+        'postprocess': list(resolve_steps(postprocess)),
+        'index': bool(index),
+        'chunking': resolve_chunk_target(chunking, target_tokens or DEFAULT_TARGET_TOKENS),
+        'formats': list(resolve_formats(formats))
+    }
+
+
+def attach_outputs(result, index=None, chunking=None, formats=None):
+    """
+    añade al resultado las salidas derivadas del markdown final
+
+    Args:
+        result: resultado de la conversión
+        index: añadir el índice de secciones (por defecto SECTION_INDEX)
+        chunking: añadir fragmentos, True o tamaño en tokens (por defecto CHUNKING)
+        formats: formatos de salida, p.ej. ['markdown', 'text'] (por defecto OUTPUT_FORMATS)
+
+    Returns:
+        el mismo resultado con index, chunks y outputs si se pidieron
+    """
+    options = resolve_options(index=index, chunking=chunking, formats=formats)
+    index, target_tokens, formats = options['index'], options['chunking'], options['formats']
+
+    # un solo recorrido del markdown para el índice, los fragmentos y el esquema
+    section_index = None
+    if index or target_tokens or FORMAT_OUTLINE_JSON in formats:
+        section_index = build_section_index(result['markdown'])
+    if index:
+        result['index'] = section_index
+
+    if target_tokens:
+        result['chunks'] = chunk_markdown(result['markdown'], target_tokens, section_index)
+
+    outputs = render_formats(result['markdown'], formats, result['metadata'].get('title'), section_index)
+    if outputs:
+        result['outputs'] = outputs
+
+    return result
+
+
+def _convert_to_markdown(content, filename=None, image_policy=None, image_store=None, postprocess=None,
+                         deadline=None):
+    """
+    convierte contenido a markdown usando markitdown
+
+    Args:
+        content: contenido como texto, bytes o mmap
+        filename: nombre del archivo (determina el formato)
+        image_policy: inline, drop o external (por defecto IMAGE_POLICY)
+        image_store: almacén para la política external (por defecto el del contenedor)
+        postprocess: pasos de post-procesado (por defecto MARKDOWN_POSTPROCESS)
+        deadline: plazo de la invocación; los pdfs se convierten página a página
+            y, si se agota, se devuelve lo convertido con partial y resume
+    """
+    # inicializar variables para evitar "unbound" errors
+    text_content = None
+    binary_content = None
+    is_text = False
+
+    image_policy = image_policy or get_config('IMAGE_POLICY')
+    # para inline y external hace falta que markitdown conserve los data uri completos
+    keep_data_uris = image_policy in (IMAGE_POLICY_INLINE, IMAGE_POLICY_EXTERNAL)
+    convert_kwargs: Dict[str, Any] = {'keep_data_uris': True} if keep_data_uris else {}
+
+    if postprocess is None:
+        postprocess = get_config('MARKDOWN_POSTPROCESS')
+    postprocess_steps = resolve_steps(postprocess)
+
+    # html grande: convertir en streaming antes de decodificar una copia completa
+    if _should_stream_html(content, filename):
+        result = convert_html_streaming(content, keep_data_uris=keep_data_uris)
+        return _build_result(result, filename, image_policy, image_store, postprocess_steps)
+
+    # formatos zip: rechazar bombas de descompresión antes de convertir
+    archive_stats, downgraded = _guard_archive(content, filename)
+    extra_metadata: Optional[Dict[str, Any]] = {'archive': archive_stats} if archive_stats else None
+    if downgraded is not None:
+        return _build_result(DocumentConverterResult(downgraded), filename, extra_metadata=extra_metadata)
+
+    # pdfs: fallar rápido si no tienen remedio y no convertir los escaneados
+    pdf_triage = _triage_pdf(content, filename)
+    if pdf_triage is not None:
+        extra_metadata = {'pdf': pdf_triage}
+        if pdf_triage['classification'] == PDF_IMAGE_ONLY:
+            extra_metadata['image_only'] = True
+            return _build_result(DocumentConverterResult(''), filename, extra_metadata=extra_metadata)
+
+        # con plazo: la misma extracción que markitdown, parando entre páginas
+        # y entregando lo convertido si se agota
+        if deadline is not None and pdf_triage['classification'] == PDF_OK and PAGE_CHECKPOINTS_AVAILABLE:
+            result, progress = convert_pdf_pages(content, deadline)
+            markdown_result = _build_result(
+                result, filename, image_policy, image_store, postprocess_steps, extra_metadata
+            )
+            if progress['partial']:
+                markdown_result['partial'] = True
+                markdown_result['resume'] = {
+                    'page': progress['resume_page'],
+                    'pages_converted': progress['pages_converted'],
+                    'total_pages': pdf_triage['pages']
+                }
+            return markdown_result
+
+    # entradas mapeadas: markitdown lee del mmap a través de un stream, sin copia en bytes
+    if isinstance(content, mmap.mmap):
+        with get_converter_pool().acquire() as markitdown:
+            result = markitdown.convert_stream(
+                open_binary(content),
+                file_extension=os.path.splitext(filename or '')[1] or None,
+                **convert_kwargs
+            )
+        return _build_result(result, filename, image_policy, image_store, postprocess_steps, extra_metadata)
+
+    # mantener el contenido original en bytes y detectar si es texto
+    if isinstance(content, bytes):
+        try:
+            text_content = content.decode('utf-8')
             is_text = True
-            text_content = content
+        except UnicodeDecodeError:
+            # si no se puede decodificar, es binario
+            is_text = False
+            binary_content = content
+    else:
+        # si ya es string, es texto
+        is_text = True
+        text_content = content
 
-        # si tenemos un nombre de archivo y es binario, guardarlo temporalmente
-        if filename and not is_text and binary_content is not None:
-            _, ext = os.path.splitext(filename)
+    # si tenemos un nombre de archivo y es binario, guardarlo temporalmente
+    if filename and not is_text and binary_content is not None:
+        _, ext = os.path.splitext(filename)
 
-            with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
-                tmp.write(binary_content)
-                tmp_path = tmp.name
+        with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as tmp:
+            tmp.write(binary_content)
+            tmp_path = tmp.name
 
-            try:
-                result = markitdown.convert(tmp_path)
-            finally:
-                os.unlink(tmp_path)
+        try:
+            with get_converter_pool().acquire() as markitdown:
+                result = markitdown.convert(tmp_path, **convert_kwargs)
+        finally:
+            os.unlink(tmp_path)
+    else:
+        # convertir texto directamente usando stream
+        # crear stream desde el contenido
+        if is_text and text_content is not None:
+            content_stream = io.BytesIO(text_content.encode('utf-8'))
         else:
-            # convertir texto directamente usando stream
-            # crear stream desde el contenido
-            if is_text and text_content is not None:
-                content_stream = io.BytesIO(text_content.encode('utf-8'))
-            else:
-                # este caso no debería ocurrir, pero por seguridad
-                content_stream = io.BytesIO(content if isinstance(content, bytes) else str(content).encode('utf-8'))
+            # este caso no debería ocurrir, pero por seguridad
+            content_stream = io.BytesIO(content if isinstance(content, bytes) else str(content).encode('utf-8'))
 
-            # usar convert_stream
+        # usar convert_stream
+        with get_converter_pool().acquire() as markitdown:
             result = markitdown.convert_stream(
-                content_stream, 
-                file_extension=get_file_extension(filename) if filename else '.txt'
+                content_stream,
+                file_extension=get_file_extension(filename) if filename else '.txt',
+                **convert_kwargs
             )
 
-        return {
-            'markdown': result.text_content,
-            'metadata': {
-                'original_format': get_file_extension(filename) if filename else 'text',
-                'converted_at': get_current_timestamp(),
-                'size': len(result.text_content),
-                'title': getattr(result, 'title', None)
-            }
-        }
+    return _build_result(result, filename, image_policy, image_store, postprocess_steps, extra_metadata)
 
-    except Exception as e:
-        raise Exception(f"Error converting to markdown: {str(e)}")
+
+def _build_result(result, filename, image_policy=None, image_store=None, postprocess_steps=(), extra_metadata=None):
+    """construye el diccionario de respuesta a partir del resultado de markitdown"""
+    markdown = result.text_content
+    image_stats = None
+    postprocess_stats = None
+
+    if image_policy:
+        if image_policy == IMAGE_POLICY_EXTERNAL and image_store is None:
+            image_store = get_dependency('image_store')
+        markdown, image_stats = apply_image_policy(markdown, image_policy, image_store)
+
+    if postprocess_steps:
+        markdown, postprocess_stats = postprocess_markdown(markdown, postprocess_steps)
+
+    metadata = {
+        'original_format': get_file_extension(filename) if filename else 'text',
+        'converted_at': get_current_timestamp(),
+        'size': len(markdown),
+        'title': getattr(result, 'title', None)
+    }
+    if image_stats is not None:
+        metadata['images'] = image_stats
+    if postprocess_stats is not None:
+        metadata['postprocess'] = postprocess_stats
+    if extra_metadata:
+        metadata.update(extra_metadata)
+
+    return {
+        'markdown': markdown,
+        'metadata': metadata
+    }
@@ -0,0 +1,432 @@
+"""
+modelo de coste de conversión aprendido de las conversiones reales
+
+cada conversión registra sus características (formato, tamaño, páginas y
+perfil de opciones) junto al tiempo de reloj medido y el pico de memoria.
+por formato se ajusta una regresión lineal segundos ~ 1 + mb + páginas a
+partir de estadísticos suficientes (xᵀx, xᵀy, yᵀy), que se suman sin
+guardar las observaciones, se persisten en s3 y se refrescan cada cierto
+tiempo mezclando lo aprendido por cada instancia. el refresco corre en un
+hilo aparte: observar y predecir nunca esperan a s3
+"""
+import json
+import resource
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from botocore.exceptions import ClientError
+from src.core.config import get_config, get_config_int
+from src.core.dependencies import get_dependency
+from src.core.inspection import inspect_document
+from src.utils.utils import get_current_timestamp, get_file_extension
+
+MODEL_VERSION = 1
+DEFAULT_MODEL_KEY = 'models/cost-model.json'
+DEFAULT_REFRESH_SECONDS = 300
+DEFAULT_MIN_SAMPLES = 20
+
+DEFAULT_PROFILE = 'default'
+
+# regularización de los coeficientes (no del término independiente) para
+# que un formato sin páginas o con tamaños iguales no deje el sistema singular
+RIDGE = 1e-6
+
+# desviaciones típicas del residuo que se restan a la predicción para
+# considerar que una conversión excede el plazo con claridad
+CONFIDENCE_SIGMAS = 2.0
+
+FEATURES = 3
+
+
+def conversion_features(
+    content: Any,
+    filename: Optional[str] = None,
+    image_policy: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    extrae las características de coste de un documento sin convertirlo
+
+    Args:
+        content: contenido (bytes o texto)
+        filename: nombre del archivo
+        image_policy: política de imágenes, que define el perfil
+
+    Returns:
+        diccionario con format, size_mb, pages y profile
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    try:
+        info = inspect_document(content, filename)
+    except Exception:
+        # un contenedor corrupto fallará en la conversión; aquí basta la extensión
+        info = {'format': get_file_extension(filename) or 'binary', 'size': len(content)}
+    return features_from_inspection(info, image_policy)
+
+
+def features_from_inspection(info: Dict[str, Any], image_policy: Optional[str] = None) -> Dict[str, Any]:
+    """
+    características de coste a partir del resultado de inspect_document
+
+    Args:
+        info: resultado de la inspección
+        image_policy: política de imágenes, que define el perfil
+
+    Returns:
+        diccionario con format, size_mb, pages y profile
+    """
+    return {
+        'format': info['format'],
+        'size_mb': info['size'] / (1024 * 1024),
+        'pages': info.get('pages') or info.get('sheets') or info.get('slides') or 0,
+        'profile': image_policy or DEFAULT_PROFILE
+    }
+
+
+def peak_memory_mb() -> float:
+    """pico de memoria residente del proceso en mb (linux informa en kb)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _empty_stats() -> Dict[str, Any]:
+    """estadísticos suficientes vacíos"""
+    return {
+        'n': 0,
+        'xtx': [[0.0] * FEATURES for _ in range(FEATURES)],
+        'xty': [0.0] * FEATURES,
+        'yy': 0.0,
+        'peak_memory_mb': 0.0
+    }
+
+
+def _merge_stats(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """suma dos conjuntos de estadísticos suficientes"""
+    return {
+        'n': base['n'] + delta['n'],
+        'xtx': [[a + b for a, b in zip(row_a, row_b)] for row_a, row_b in zip(base['xtx'], delta['xtx'])],
+        'xty': [a + b for a, b in zip(base['xty'], delta['xty'])],
+        'yy': base['yy'] + delta['yy'],
+        'peak_memory_mb': max(base['peak_memory_mb'], delta['peak_memory_mb'])
+    }
+
+
+def merge_models(base: Dict[str, Dict[str, Any]], delta: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    mezcla los estadísticos de dos modelos
+
+    Args:
+        base: estadísticos por key de modelo
+        delta: estadísticos a sumar
+
+    Returns:
+        nuevo diccionario con la suma por key
+    """
+    merged = dict(base)
+    for key, stats in delta.items():
+        merged[key] = _merge_stats(merged.get(key, _empty_stats()), stats)
+    return merged
+
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> Optional[List[float]]:
+    """resuelve un sistema lineal pequeño por eliminación gaussiana con pivoteo parcial"""
+    size = len(vector)
+    rows = [list(row) + [value] for row, value in zip(matrix, vector)]
+
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(rows[r][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(col + 1, size):
+            factor = rows[r][col] / rows[col][col]
+            for c in range(col, size + 1):
+                rows[r][c] -= factor * rows[col][c]
+
+    solution = [0.0] * size
+    for r in range(size - 1, -1, -1):
+        solution[r] = (rows[r][size] - sum(rows[r][c] * solution[c] for c in range(r + 1, size))) / rows[r][r]
+    return solution
+
+
+def fit(stats: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    ajusta la regresión lineal de un formato
+
+    Args:
+        stats: estadísticos suficientes
+
+    Returns:
+        diccionario con coefficients y residual_std, o None si no hay datos suficientes
+    """
+    n = stats['n']
+    if n < 2:
+        return None
+
+    xtx = [list(row) for row in stats['xtx']]
+    for i in range(1, FEATURES):
+        xtx[i][i] += RIDGE * n
+    beta = _solve(xtx, stats['xty'])
+    if beta is None:
+        return None
+
+    # rss = yᵀy - 2βᵀxᵀy + βᵀxᵀxβ, sin necesidad de las observaciones
+    fitted = sum(b * sum(stats['xtx'][i][j] * beta[j] for j in range(FEATURES)) for i, b in enumerate(beta))
+    rss = stats['yy'] - 2 * sum(b * v for b, v in zip(beta, stats['xty'])) + fitted
+    residual_std = (max(rss, 0.0) / max(n - FEATURES, 1)) ** 0.5
+    return {'coefficients': beta, 'residual_std': residual_std}
+
+
+class S3ModelStore:
+    """
+    persiste los estadísticos del modelo como un objeto json en s3
+    """
+
+    def __init__(self, s3_client: Any, bucket: str, key: str = DEFAULT_MODEL_KEY):
+        """
+        inicializa el almacén
+
+        Args:
+            s3_client: cliente s3 de boto3
+            bucket: bucket del modelo
+            key: key del objeto json
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """lee los estadísticos guardados (vacío si aún no existen)"""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self.key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return {}
+            raise
+        document = json.loads(response['Body'].read())
+        if document.get('version') != MODEL_VERSION:
+            return {}
+        return document.get('models', {})
+
+    def save(self, models: Dict[str, Dict[str, Any]]) -> None:
+        """guarda los estadísticos mezclados"""
+        self.s3_client.put_object(
+            Bucket=self.bucket,
+            Key=self.key,
+            Body=json.dumps({
+                'version': MODEL_VERSION,
+                'updated_at': get_current_timestamp(),
+                'models': models
+            }).encode('utf-8'),
+            ContentType='application/json'
+        )
+
+
+class CostModel:
+    """
+    modelo de coste por formato con refresco periódico desde un almacén compartido
+
+    las observaciones nuevas se acumulan en local y en cada refresco, en
+    segundo plano, se suman a lo guardado; hasta la primera carga solo se
+    predice con lo observado en local. si dos instancias refrescan a la vez la última
+    escritura gana y se pierden algunas observaciones, lo que no afecta a
+    un modelo estadístico
+    """
+
+    def __init__(
+        self,
+        store: Optional[Any] = None,
+        refresh_seconds: int = DEFAULT_REFRESH_SECONDS,
+        min_samples: int = DEFAULT_MIN_SAMPLES
+    ):
+        """
+        inicializa el modelo
+
+        Args:
+            store: almacén con load() y save() (None para un modelo solo local)
+            refresh_seconds: segundos entre refrescos con el almacén
+            min_samples: observaciones mínimas para predecir un formato
+        """
+        self.store = store
+        self.refresh_seconds = refresh_seconds
+        self.min_samples = min_samples
+        self._shared: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+        self._refreshed_at: Optional[float] = None
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    @staticmethod
+    def _keys(features: Dict[str, Any]) -> List[str]:
+        """keys de modelo, de la más específica (formato y perfil) a la más general"""
+        return [f"{features['format']}:{features['profile']}", features['format']]
+
+    def observe(self, features: Dict[str, Any], seconds: float, memory_mb: float = 0.0) -> None:
+        """
+        registra una conversión medida
+
+        Args:
+            features: características de conversion_features
+            seconds: tiempo de reloj de la conversión
+            memory_mb: pico de memoria observado
+        """
+        x = [1.0, float(features['size_mb']), float(features['pages'] or 0)]
+        delta = {
+            'n': 1,
+            'xtx': [[a * b for b in x] for a in x],
+            'xty': [a * seconds for a in x],
+            'yy': seconds * seconds,
+            'peak_memory_mb': memory_mb
+        }
+        with self._lock:
+            self._pending = merge_models(self._pending, {key: delta for key in self._keys(features)})
+        self.maybe_refresh()
+
+    def predict(self, features: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        predice el coste de una conversión
+
+        Args:
+            features: características de conversion_features
+
+        Returns:
+            diccionario con seconds, lower_bound (seconds menos CONFIDENCE_SIGMAS
+            desviaciones del residuo), peak_memory_mb, samples y model, o None
+            si ningún modelo del formato tiene observaciones suficientes
+        """
+        self.maybe_refresh()
+        with self._lock:
+            models = self._models()
+
+        for key in self._keys(features):
+            stats = models.get(key)
+            if stats is None or stats['n'] < self.min_samples:
+                continue
+            fitted = fit(stats)
+            if fitted is None:
+                continue
+            x = [1.0, float(features['size_mb']), float(features['pages'] or 0)]
+            seconds = max(0.0, sum(b * v for b, v in zip(fitted['coefficients'], x)))
+            return {
+                'seconds': round(seconds, 2),
+                'lower_bound': round(max(0.0, seconds - CONFIDENCE_SIGMAS * fitted['residual_std']), 2),
+                'peak_memory_mb': round(stats['peak_memory_mb'], 1),
+                'samples': stats['n'],
+                'model': key
+            }
+        return None
+
+    def maybe_refresh(self) -> None:
+        """
+        refresca con el almacén en segundo plano si nunca se cargó o venció el intervalo
+
+        la petición que lo dispara no espera a s3; en lambda el hilo se
+        congela con la invocación y continúa en la siguiente
+        """
+        if self.store is None:
+            return
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            # marcar antes de arrancar para que las peticiones concurrentes no lancen otro
+            self._refreshed_at = time.monotonic()
+            self._refresh_thread = threading.Thread(target=self.refresh, daemon=True)
+            self._refresh_thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        espera a que termine el refresco en segundo plano, si hay uno
+
+        Args:
+            timeout: segundos máximos de espera (None: sin límite)
+        """
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def refresh(self) -> None:
+        """
+        suma las observaciones locales a las guardadas y persiste el resultado
+
+        los errores del almacén se registran y las observaciones se conservan
+        para el siguiente intento
+        """
+        if self.store is None:
+            return
+
+        # un refresco cada vez: dos a la vez podrían sobrescribir lo que guardó el otro
+        with self._refresh_lock:
+            with self._lock:
+                self._refreshed_at = time.monotonic()
+                self._inflight, self._pending = self._pending, {}
+                pending = self._inflight
+
+            try:
+                shared = self.store.load()
+                if pending:
+                    shared = merge_models(shared, pending)
+                    self.store.save(shared)
+            except Exception as e:
+                # en segundo plano nadie más vería el error: se registra y se reintenta en el siguiente refresco
+                print(f"Error refreshing cost model from {self._store_name()}: {str(e)}")
+                shared = None
+
+            with self._lock:
+                if shared is None:
+                    # conservar lo no persistido para el siguiente intento
+                    self._pending = merge_models(pending, self._pending)
+                else:
+                    self._shared = shared
+                self._inflight = {}
+
+    def _store_name(self) -> str:
+        """nombre del almacén para los mensajes de error"""
+        bucket, key = getattr(self.store, 'bucket', None), getattr(self.store, 'key', None)
+        return f"s3://{bucket}/{key}" if bucket and key else type(self.store).__name__
+
+    def _models(self) -> Dict[str, Dict[str, Any]]:
+        """estadísticos guardados más los locales aún no persistidos (con el lock tomado)"""
+        return merge_models(merge_models(self._shared, self._inflight), self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        obtiene las métricas del modelo
+
+        Returns:
+            diccionario con observaciones por key de modelo
+        """
+        with self._lock:
+            models = self._models()
+        return {key: stats['n'] for key, stats in models.items()}
+
+
+# instancia global
+_cost_model: Optional[CostModel] = None
+
+
+def get_cost_model() -> CostModel:
+    """
+    obtiene el modelo de coste global, creándolo la primera vez
+
+    Returns:
+        CostModel: modelo compartido por el proceso, persistido en el bucket si hay uno configurado
+    """
+    global _cost_model
+    if _cost_model is None:
+        bucket = get_dependency('bucket_name')
+        store = None
+        if bucket:
+            store = S3ModelStore(
+                get_dependency('s3_client'),
+                bucket,
+                get_config('COST_MODEL_KEY', DEFAULT_MODEL_KEY) or DEFAULT_MODEL_KEY
+            )
+        _cost_model = CostModel(
+            store=store,
+            refresh_seconds=get_config_int('COST_MODEL_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS),
+            min_samples=get_config_int('COST_MODEL_MIN_SAMPLES', DEFAULT_MIN_SAMPLES)
+        )
+    return _cost_model
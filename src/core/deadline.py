@@ -0,0 +1,51 @@
+"""
+plazo de ejecución de la invocación para conversiones cooperativas
+
+las conversiones largas consultan el plazo en puntos de control (p.ej. al
+terminar cada página) y se detienen a tiempo de devolver lo convertido
+hasta entonces en lugar de que la lambda las corte y se pierda todo
+"""
+from typing import Any, Callable, Optional
+from src.core.config import get_config_int
+
+
+class Deadline:
+    """
+    plazo restante de la invocación con un margen de seguridad
+    """
+
+    def __init__(self, remaining_ms: Callable[[], int], margin_ms: int):
+        """
+        inicializa el plazo
+
+        Args:
+            remaining_ms: función que devuelve los milisegundos restantes
+            margin_ms: milisegundos que se reservan para guardar o responder
+        """
+        self._remaining_ms = remaining_ms
+        self.margin_ms = margin_ms
+
+    def remaining_ms(self) -> int:
+        """milisegundos restantes de la invocación"""
+        return self._remaining_ms()
+
+    def expired(self) -> bool:
+        """verifica si queda menos tiempo que el margen"""
+        return self.remaining_ms() <= self.margin_ms
+
+
+def deadline_from_context(context: Optional[Any]) -> Optional[Deadline]:
+    """
+    crea el plazo a partir del contexto de lambda
+
+    Args:
+        context: contexto de la invocación
+
+    Returns:
+        Deadline o None si el contexto no informa del tiempo restante o
+        PARTIAL_FLUSH_MARGIN_MS está desactivado
+    """
+    margin_ms = get_config_int('PARTIAL_FLUSH_MARGIN_MS', 0)
+    if margin_ms <= 0 or context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return None
+    return Deadline(context.get_remaining_time_in_millis, margin_ms)
@@ -1,7 +1,8 @@
 from typing import Dict, Any
 import boto3
 from functools import lru_cache
-from src.core.config import get_config
+from src.core.config import get_config, get_config_int
+from src.core.images import DEFAULT_IMAGE_PREFIX, DEFAULT_UPLOAD_WORKERS, ImageStore
 
 
 class DependencyContainer:
@@ -103,6 +104,19 @@ def create_bucket_name():
     return get_config('S3_BUCKET_NAME', get_config('INPUT_BUCKET'))
 
 
+def create_image_store():
+    """
+    crea el almacén de imágenes direccionado por contenido
+    """
+    return ImageStore(
+        s3_client=get_dependency('s3_client'),
+        bucket=get_dependency('bucket_name'),
+        prefix=get_config('IMAGE_PREFIX', DEFAULT_IMAGE_PREFIX) or DEFAULT_IMAGE_PREFIX,
+        base_url=get_config('IMAGE_BASE_URL'),
+        max_workers=get_config_int('IMAGE_UPLOAD_WORKERS', DEFAULT_UPLOAD_WORKERS)
+    )
+
+
 # registrar dependencias comunes
 def register_default_dependencies():
     """
@@ -111,6 +125,7 @@ def register_default_dependencies():
     register_dependency('s3_client', create_s3_client, singleton=True)
     register_dependency('api_key', create_api_key, singleton=True)
     register_dependency('bucket_name', create_bucket_name, singleton=True)
+    register_dependency('image_store', create_image_store, singleton=True)
 
 
 # auto-registrar al importar el módulo
@@ -0,0 +1,45 @@
+"""
+excepciones de conversión con código http y tipo de error específicos
+"""
+from typing import Any, Dict, Optional
+
+
+class ConversionError(Exception):
+    """
+    error de conversión que se debe reportar al cliente tal cual
+    """
+
+    status_code = 422
+    error_type = 'conversion_error'
+
+    def __init__(
+        self,
+        message: str,
+        error_type: Optional[str] = None,
+        status_code: Optional[int] = None,
+        details: Optional[Dict[str, Any]] = None
+    ):
+        """
+        inicializa el error
+
+        Args:
+            message: mensaje legible del error
+            error_type: tipo de error específico (por defecto el de la clase)
+            status_code: código http (por defecto el de la clase)
+            details: información adicional del error
+        """
+        super().__init__(message)
+        if error_type is not None:
+            self.error_type = error_type
+        if status_code is not None:
+            self.status_code = status_code
+        self.details: Dict[str, Any] = details or {}
+
+
+class ArchiveLimitExceeded(ConversionError):
+    """
+    el contenedor zip declara un tamaño o ratio de descompresión excesivo
+    """
+
+    status_code = 413
+    error_type = 'archive_too_large'
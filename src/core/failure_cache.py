@@ -0,0 +1,177 @@
+"""
+caché negativa de entradas que fallan de forma determinista
+
+guarda el hash del contenido que no se pudo convertir junto con el tipo de
+error y la versión de markitdown, con un ttl, para que los reenvíos del
+mismo archivo roto fallen al momento sin volver a parsearlo
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from botocore.exceptions import BotoCoreError, ClientError
+from markitdown import __version__ as markitdown_version
+from src.core.config import get_config_int
+from src.core.exceptions import ConversionError
+
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 1024
+
+# mensaje con el que se propagan los errores genéricos de conversión (un 500 en el api)
+GENERIC_FAILURE_MESSAGE = "Error converting to markdown: {}"
+
+# errores que dependen del entorno y no del contenido: no se cachean
+TRANSIENT_ERRORS = (TimeoutError, MemoryError, OSError, BotoCoreError, ClientError)
+
+
+def is_deterministic_failure(error: BaseException) -> bool:
+    """verifica si el error depende solo del contenido de entrada"""
+    return isinstance(error, Exception) and not isinstance(error, TRANSIENT_ERRORS)
+
+
+class NegativeCache:
+    """
+    caché lru con ttl de conversiones fallidas
+    """
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        inicializa la caché
+
+        Args:
+            ttl_seconds: segundos que se recuerda cada fallo (0 desactiva la caché)
+            max_entries: número máximo de fallos recordados
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._hits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """la caché está activa si el ttl es positivo"""
+        return self.ttl_seconds > 0
+
+    def _key(self, key: str) -> str:
+        """incluye la versión de markitdown: una actualización invalida los fallos"""
+        return f"{key}:{markitdown_version}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        busca un fallo vigente para la key
+
+        Args:
+            key: identificador del contenido
+
+        Returns:
+            entrada del fallo o None
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(self._key(key))
+            if entry is None:
+                return None
+            if entry['expires_at'] <= time.monotonic():
+                del self._entries[self._key(key)]
+                return None
+
+            self._entries.move_to_end(self._key(key))
+            self._hits[entry['error_type']] = self._hits.get(entry['error_type'], 0) + 1
+            return dict(entry)
+
+    def record(self, key: str, error: Exception) -> None:
+        """
+        recuerda el fallo de conversión de una key
+
+        Args:
+            key: identificador del contenido
+            error: excepción lanzada por la conversión
+        """
+        if not self.enabled or not is_deterministic_failure(error):
+            return
+
+        typed = isinstance(error, ConversionError)
+        if isinstance(error, ConversionError):
+            error_type = error.error_type
+            status_code = error.status_code
+            details = dict(error.details)
+        else:
+            error_type = type(error).__name__
+            status_code = None
+            details = {}
+
+        entry = {
+            'error': str(error),
+            'typed': typed,
+            'error_type': error_type,
+            'status_code': status_code,
+            'details': details,
+            'markitdown_version': markitdown_version,
+            'expires_at': time.monotonic() + self.ttl_seconds
+        }
+
+        with self._lock:
+            self._entries[self._key(key)] = entry
+            self._entries.move_to_end(self._key(key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def raise_if_cached(self, key: str) -> None:
+        """
+        relanza el error guardado si la key falló antes, con la misma forma
+        que la primera vez para que el cliente reciba el mismo código
+
+        Raises:
+            ConversionError: con el tipo de error original y details.cached
+            Exception: los errores genéricos, con el mensaje de la primera vez
+        """
+        entry = self.get(key)
+        if entry is None:
+            return
+        if not entry['typed']:
+            raise Exception(GENERIC_FAILURE_MESSAGE.format(entry['error']))
+
+        details = dict(entry['details'], cached=True, markitdown_version=entry['markitdown_version'])
+        raise ConversionError(
+            entry['error'],
+            error_type=entry['error_type'],
+            status_code=entry['status_code'],
+            details=details
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        obtiene las métricas de la caché
+
+        Returns:
+            diccionario con entradas y aciertos por tipo de error
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'ttl_seconds': self.ttl_seconds,
+                'hits': dict(self._hits)
+            }
+
+
+# instancia global
+_negative_cache: Optional[NegativeCache] = None
+
+
+def get_negative_cache() -> NegativeCache:
+    """
+    obtiene la caché negativa global, creándola la primera vez
+
+    Returns:
+        NegativeCache: caché compartida por el proceso
+    """
+    global _negative_cache
+    if _negative_cache is None:
+        _negative_cache = NegativeCache(
+            ttl_seconds=get_config_int('NEGATIVE_CACHE_TTL', DEFAULT_TTL_SECONDS),
+            max_entries=get_config_int('NEGATIVE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        )
+    return _negative_cache
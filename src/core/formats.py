@@ -0,0 +1,177 @@
+"""
+formatos de salida adicionales derivados del markdown de una sola conversión
+
+el markdown es siempre la salida principal; a partir de él se generan, sin
+volver a convertir el original, el texto plano y un esquema json con la
+jerarquía de encabezados
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from src.core.section_index import build_section_index
+
+FORMAT_MARKDOWN = 'markdown'
+FORMAT_TEXT = 'text'
+FORMAT_OUTLINE_JSON = 'outline_json'
+
+OUTPUT_FORMATS = (FORMAT_MARKDOWN, FORMAT_TEXT, FORMAT_OUTLINE_JSON)
+
+# sufijo de los objetos hermanos de la salida en s3
+FORMAT_SUFFIXES = {
+    FORMAT_TEXT: '.txt',
+    FORMAT_OUTLINE_JSON: '.outline.json'
+}
+
+_HEADING_RE = re.compile(r'^#{1,6}\s+(.*?)\s*#*\s*$')
+_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+_LINK_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+_EMPHASIS_RE = re.compile(r'(\*\*|\*|~~)(?=\S)(.+?)(?<=\S)\1')
+# con guiones bajos solo fuera de palabras, para no romper identificadores
+_UNDERSCORE_EMPHASIS_RE = re.compile(r'(?<!\w)(__|_)(?=\S)(.+?)(?<=\S)\1(?!\w)')
+_CODE_SPAN_RE = re.compile(r'`([^`]*)`')
+_QUOTE_RE = re.compile(r'^(\s*>\s?)+')
+_SEPARATOR_ROW_RE = re.compile(r'^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$')
+_CELL_SPLIT_RE = re.compile(r'(?<!\\)\|')
+
+
+def resolve_formats(option: Union[None, str, Iterable[str]]) -> Tuple[str, ...]:
+    """
+    interpreta la opción de formatos de salida
+
+    Args:
+        option: lista (o string separado por comas) de formatos
+
+    Returns:
+        tupla de formatos en orden canónico, siempre con markdown
+
+    Raises:
+        ValueError: si algún formato no existe
+    """
+    if not option:
+        return (FORMAT_MARKDOWN,)
+
+    if isinstance(option, str):
+        requested = [fmt.strip() for fmt in option.split(',') if fmt.strip()]
+    else:
+        requested = list(option)
+
+    unknown = [fmt for fmt in requested if fmt not in OUTPUT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown output formats: {', '.join(map(str, unknown))}")
+
+    return tuple(fmt for fmt in OUTPUT_FORMATS if fmt == FORMAT_MARKDOWN or fmt in requested)
+
+
+def _inline_text(line: str) -> str:
+    """quita el marcado en línea (imágenes, enlaces, énfasis, código)"""
+    line = _IMAGE_RE.sub(r'\1', line)
+    line = _LINK_RE.sub(r'\1', line)
+    line = _CODE_SPAN_RE.sub(r'\1', line)
+    line = _EMPHASIS_RE.sub(r'\2', line)
+    return _UNDERSCORE_EMPHASIS_RE.sub(r'\2', line)
+
+
+def markdown_to_text(markdown: str) -> str:
+    """
+    convierte el markdown a texto plano en una pasada por líneas
+
+    Args:
+        markdown: texto convertido
+
+    Returns:
+        texto sin marcas de encabezado, énfasis, enlaces ni tablas (las celdas
+        quedan separadas por tabuladores); los bloques de código se conservan
+    """
+    output: List[str] = []
+    in_fence = None
+
+    for line in markdown.split('\n'):
+        stripped = line.strip()
+
+        fence = stripped[:3] if stripped[:3] in ('```', '~~~') else None
+        if in_fence is not None:
+            if fence == in_fence:
+                in_fence = None
+            else:
+                output.append(line)
+            continue
+        if fence is not None:
+            in_fence = fence
+            continue
+
+        line = _QUOTE_RE.sub('', line)
+        stripped = line.strip()
+
+        heading = _HEADING_RE.match(stripped)
+        if heading:
+            output.append(_inline_text(heading.group(1)))
+        elif stripped.startswith('|'):
+            if _SEPARATOR_ROW_RE.match(stripped):
+                continue
+            inner = stripped[1:-1] if stripped.endswith('|') and len(stripped) > 1 else stripped[1:]
+            cells = [_inline_text(cell.strip()).replace('\\|', '|') for cell in _CELL_SPLIT_RE.split(inner)]
+            output.append('\t'.join(cells))
+        else:
+            output.append(_inline_text(line))
+
+    return '\n'.join(output)
+
+
+def build_outline(markdown: str, title: Any = None, index: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    construye el esquema de secciones anidadas
+
+    Args:
+        markdown: texto convertido
+        title: título del documento si el conversor lo conoce
+        index: índice de secciones del markdown, si ya se construyó
+
+    Returns:
+        diccionario con title y sections; cada sección tiene level, title,
+        start y end en bytes y sus subsecciones en children
+    """
+    if index is None:
+        index = build_section_index(markdown)
+    roots: List[Dict[str, Any]] = []
+    stack: List[Dict[str, Any]] = []
+
+    for heading in index['headings']:
+        section = dict(heading, title=_inline_text(heading['title']), children=[])
+        while stack and stack[-1]['level'] >= section['level']:
+            stack.pop()
+        (stack[-1]['children'] if stack else roots).append(section)
+        stack.append(section)
+
+    if title is None and roots and roots[0]['level'] == 1:
+        title = roots[0]['title']
+
+    return {
+        'title': title,
+        'bytes': index['bytes'],
+        'sections': roots
+    }
+
+
+def render_formats(
+    markdown: str,
+    formats: Iterable[str],
+    title: Any = None,
+    index: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    genera los formatos adicionales pedidos
+
+    Args:
+        markdown: texto convertido
+        formats: formatos resueltos con resolve_formats
+        title: título del documento
+        index: índice de secciones del markdown, si ya se construyó
+
+    Returns:
+        diccionario formato -> contenido, sin el markdown
+    """
+    outputs: Dict[str, Any] = {}
+    if FORMAT_TEXT in formats:
+        outputs[FORMAT_TEXT] = markdown_to_text(markdown)
+    if FORMAT_OUTLINE_JSON in formats:
+        outputs[FORMAT_OUTLINE_JSON] = build_outline(markdown, title, index)
+    return outputs
@@ -0,0 +1,419 @@
+"""
+conversor html incremental para páginas enormes
+
+usa el tokenizer de html.parser alimentado por bloques, así que nunca se
+construye el dom completo: cada elemento de bloque se emite como markdown
+en cuanto se cierra y los subárboles de script, style y nav se descartan
+sin guardarlos. la codificación de los bytes se decide como en la ruta sin
+streaming: bom, <meta charset> y, si no hay, detección sobre una muestra
+"""
+import codecs
+import io
+import mmap
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple, Union
+import charset_normalizer
+from markitdown import DocumentConverterResult
+
+# tamaño de los bloques con los que se alimenta el tokenizer
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# subárboles que se descartan completos
+SKIP_TAGS = frozenset({'script', 'style', 'nav', 'noscript', 'template', 'svg', 'iframe'})
+
+# elementos que delimitan bloques de markdown
+BLOCK_TAGS = frozenset({
+    'p', 'div', 'section', 'article', 'main', 'header', 'footer', 'aside',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'ul', 'ol', 'dl', 'dt', 'dd',
+    'blockquote', 'pre', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th',
+    'figure', 'figcaption', 'form', 'fieldset', 'address', 'body', 'html'
+})
+
+# estructura de listas y tablas; el resto de bloques dentro de una celda o
+# un elemento de lista es contenido en línea de ese elemento
+CONTAINER_TAGS = frozenset({'ul', 'ol', 'li', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th'})
+ITEM_TAGS = frozenset({'li', 'td', 'th'})
+
+# muestra para decidir la codificación, la misma que usa markitdown
+CHARSET_SAMPLE_SIZE = 64 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+_META_CHARSET_RE = re.compile(rb'<meta\b[^>]*?charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+
+# elementos que cierran implícitamente a un hermano abierto del mismo tipo
+IMPLICIT_CLOSE = {
+    'p': ('p',),
+    'li': ('li',),
+    'tr': ('tr', 'td', 'th'),
+    'td': ('td', 'th'),
+    'th': ('td', 'th'),
+    'dt': ('dt', 'dd'),
+    'dd': ('dt', 'dd'),
+}
+
+INLINE_MARKERS = {
+    'strong': '**',
+    'b': '**',
+    'em': '*',
+    'i': '*',
+    'code': '`',
+}
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class StreamingHtmlConverter(HTMLParser):
+    """
+    tokenizer html que escribe markdown por bloques a medida que se cierran
+    """
+
+    def __init__(self, writer: Optional[io.TextIOBase] = None, keep_data_uris: bool = False):
+        """
+        inicializa el conversor
+
+        Args:
+            writer: destino del markdown (por defecto un StringIO interno)
+            keep_data_uris: conservar imágenes embebidas como data uri
+        """
+        super().__init__(convert_charrefs=True)
+        self._writer = writer if writer is not None else io.StringIO()
+        self._keep_data_uris = keep_data_uris
+        self._wrote_block = False
+        self._last_was_item = False
+        self._stack: List[str] = []
+        self._inline: List[str] = []
+        # pila de (tag, posición en _inline, atributos) para enlaces y énfasis
+        self._inline_marks: List[Tuple[str, int, Dict[str, Optional[str]]]] = []
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+        self._in_title = False
+        self._title_parts: List[str] = []
+        self._pre_depth = 0
+        self._list_stack: List[str] = []
+        self._quote_depth = 0
+        self._row: Optional[List[str]] = None
+        self._table_rows = 0
+
+    @property
+    def title(self) -> Optional[str]:
+        """título del documento extraído de <title>"""
+        title = _WHITESPACE_RE.sub(' ', ''.join(self._title_parts)).strip()
+        return title or None
+
+    def getvalue(self) -> str:
+        """devuelve el markdown acumulado si el writer es un StringIO"""
+        if isinstance(self._writer, io.StringIO):
+            return self._writer.getvalue()
+        return ''
+
+    # eventos del tokenizer
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+
+        if tag in SKIP_TAGS:
+            self._skip_tag = tag
+            self._skip_depth = 1
+            return
+
+        if tag == 'title':
+            self._in_title = True
+            return
+
+        if tag in ('br',):
+            self._inline.append('\n' if self._pre_depth else '  \n')
+            return
+
+        if tag == 'hr':
+            self._flush_block(None)
+            self._emit('---')
+            return
+
+        if tag == 'img':
+            attr_map = dict(attrs)
+            alt = attr_map.get('alt') or ''
+            src = attr_map.get('src') or ''
+            if src and (self._keep_data_uris or not src.startswith('data:')):
+                self._inline.append(f'![{alt}]({src})')
+            return
+
+        if tag == 'a' or tag in INLINE_MARKERS:
+            self._inline_marks.append((tag, len(self._inline), dict(attrs)))
+            return
+
+        if tag in BLOCK_TAGS:
+            # cerrar hermanos implícitos (<p> sin </p>, <li> sin </li>, ...)
+            for closable in IMPLICIT_CLOSE.get(tag, ()):
+                if self._stack and self._stack[-1] == closable:
+                    self._close_block(closable)
+
+            # <td><div>x</div></td> o <li><p>x</p></li>: el bloque es parte de la celda o el elemento
+            if tag not in CONTAINER_TAGS and self._in_item():
+                self._stack.append(tag)
+                return
+
+            # el texto suelto antes del bloque forma su propio párrafo
+            if tag not in ('td', 'th'):
+                self._flush_block(self._stack[-1] if self._stack else None)
+
+            self._stack.append(tag)
+            if tag in ('ul', 'ol'):
+                self._list_stack.append(tag)
+            elif tag == 'blockquote':
+                self._quote_depth += 1
+            elif tag == 'pre':
+                self._pre_depth += 1
+            elif tag == 'table':
+                self._table_rows = 0
+            elif tag == 'tr':
+                self._row = []
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.handle_starttag(tag, attrs)
+        # los void elements no abren subárbol ni bloque
+        if tag in BLOCK_TAGS and self._stack and self._stack[-1] == tag:
+            self._close_block(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+
+        if tag == 'title':
+            self._in_title = False
+            return
+
+        if tag == 'a' or tag in INLINE_MARKERS:
+            self._close_inline(tag)
+            return
+
+        if tag in BLOCK_TAGS and tag in self._stack:
+            # cerrar bloques intermedios que quedaron abiertos
+            while self._stack and self._stack[-1] != tag:
+                self._close_block(self._stack[-1])
+            self._close_block(tag)
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_tag is not None:
+            return
+        if self._in_title:
+            self._title_parts.append(data)
+            return
+        if self._pre_depth:
+            self._inline.append(data)
+        else:
+            self._inline.append(_WHITESPACE_RE.sub(' ', data))
+
+    def close(self) -> None:
+        super().close()
+        while self._stack:
+            self._close_block(self._stack[-1])
+        self._flush_block(None)
+
+    # construcción del markdown
+
+    def _close_inline(self, tag: str) -> None:
+        """envuelve el texto acumulado desde la apertura del inline"""
+        for i in range(len(self._inline_marks) - 1, -1, -1):
+            if self._inline_marks[i][0] != tag:
+                continue
+            _, start, attrs = self._inline_marks[i]
+            # las marcas abiertas dentro de esta quedan absorbidas
+            del self._inline_marks[i:]
+            text = ''.join(self._inline[start:])
+            del self._inline[start:]
+            if tag == 'a':
+                href = attrs.get('href') or ''
+                label = text.strip()
+                if href and label and not href.startswith('javascript:'):
+                    self._inline.append(f'[{label}]({href})')
+                else:
+                    self._inline.append(text)
+            elif text.strip() and not (tag == 'code' and self._pre_depth):
+                marker = INLINE_MARKERS[tag]
+                self._inline.append(f'{marker}{text.strip()}{marker}')
+            else:
+                self._inline.append(text)
+            return
+
+    def _in_item(self) -> bool:
+        """el contenedor abierto más interno es una celda o un elemento de lista"""
+        for tag in reversed(self._stack):
+            if tag in CONTAINER_TAGS:
+                return tag in ITEM_TAGS
+        return False
+
+    def _close_block(self, tag: str) -> None:
+        """cierra el bloque del tope de la pila y emite su markdown"""
+        if tag not in CONTAINER_TAGS and self._stack and self._stack[-1] == tag:
+            self._stack.pop()
+            if self._in_item():
+                # separa los bloques dentro del elemento; en una celda queda en un espacio
+                self._inline.append('\n')
+                return
+            self._stack.append(tag)
+
+        if tag in ('td', 'th'):
+            cell = _WHITESPACE_RE.sub(' ', self._take_inline()).strip()
+            if self._row is not None:
+                self._row.append(cell.replace('|', '\\|'))
+        elif tag == 'tr':
+            self._emit_row()
+        else:
+            self._flush_block(tag)
+
+        if self._stack and self._stack[-1] == tag:
+            self._stack.pop()
+
+        if tag in ('ul', 'ol') and self._list_stack:
+            self._list_stack.pop()
+            # listas hermanas se separan con línea en blanco
+            if not self._list_stack:
+                self._last_was_item = False
+        elif tag == 'blockquote' and self._quote_depth:
+            self._quote_depth -= 1
+        elif tag == 'pre' and self._pre_depth:
+            self._pre_depth -= 1
+        elif tag == 'table':
+            self._row = None
+            self._table_rows = 0
+
+    def _emit_row(self) -> None:
+        """emite una fila de tabla y el separador tras la cabecera"""
+        row = self._row or []
+        self._row = None
+        if not row:
+            return
+        line = '| ' + ' | '.join(row) + ' |'
+        if self._table_rows == 0:
+            line += '\n|' + '|'.join(' --- ' for _ in row) + '|'
+        self._table_rows += 1
+        # las filas de una tabla van seguidas, sin línea en blanco
+        self._emit(line, separator='\n' if self._table_rows > 1 else '\n\n')
+
+    def _take_inline(self) -> str:
+        """consume el buffer inline cerrando marcas que quedaron abiertas"""
+        while self._inline_marks:
+            self._close_inline(self._inline_marks[-1][0])
+        text = ''.join(self._inline)
+        self._inline = []
+        return text
+
+    def _flush_block(self, tag: Optional[str]) -> None:
+        """emite el texto inline pendiente formateado según el bloque"""
+        if tag == 'pre':
+            text = self._take_inline().strip('\n')
+            if text:
+                self._emit(f'```\n{text}\n```')
+            return
+
+        text = self._take_inline()
+        if self._pre_depth:
+            if text.strip():
+                self._emit(text)
+            return
+
+        lines = [line.strip() for line in text.split('\n')]
+        text = '\n'.join(line for line in lines if line)
+        if not text:
+            return
+
+        if tag and len(tag) == 2 and tag[0] == 'h' and tag[1].isdigit():
+            text = '#' * int(tag[1]) + ' ' + text.replace('\n', ' ')
+        elif tag == 'li':
+            depth = max(len(self._list_stack), 1)
+            bullet = '1.' if self._list_stack and self._list_stack[-1] == 'ol' else '-'
+            indent = '  ' * (depth - 1)
+            text = f'{indent}{bullet} ' + text.replace('\n', '\n' + indent + '  ')
+            self._emit(text, separator='\n' if self._last_was_item else '\n\n')
+            self._last_was_item = True
+            return
+
+        self._emit(text)
+
+    def _emit(self, text: str, separator: str = '\n\n') -> None:
+        """escribe un bloque terminado en el writer"""
+        if self._quote_depth:
+            text = '\n'.join('> ' + line if line else '>' for line in text.split('\n'))
+        if self._wrote_block:
+            self._writer.write(separator)
+        self._writer.write(text)
+        self._wrote_block = True
+        self._last_was_item = False
+
+
+def sniff_html_encoding(sample: bytes) -> str:
+    """
+    decide la codificación de un html a partir de su comienzo
+
+    Args:
+        sample: primeros bytes del documento
+
+    Returns:
+        codificación por bom, por <meta charset> (o http-equiv), por
+        detección de charset_normalizer o, si nada decide, utf-8
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    declared = _META_CHARSET_RE.search(sample)
+    if declared:
+        try:
+            return codecs.lookup(declared.group(1).decode('ascii')).name
+        except LookupError:
+            pass
+
+    detected = charset_normalizer.from_bytes(sample).best()
+    return detected.encoding if detected is not None else 'utf-8'
+
+
+def convert_html_streaming(
+    content: Union[str, bytes, mmap.mmap],
+    encoding: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    keep_data_uris: bool = False
+) -> DocumentConverterResult:
+    """
+    convierte html a markdown alimentando el tokenizer por bloques
+
+    Args:
+        content: html como texto, bytes o mmap
+        encoding: codificación de los bytes (default: sniff_html_encoding sobre el comienzo)
+        chunk_size: tamaño de cada bloque pasado al tokenizer
+        keep_data_uris: conservar imágenes embebidas como data uri
+
+    Returns:
+        DocumentConverterResult con el markdown y el título
+    """
+    converter = StreamingHtmlConverter(keep_data_uris=keep_data_uris)
+
+    if not isinstance(content, str):
+        if encoding is None:
+            encoding = sniff_html_encoding(content[:CHARSET_SAMPLE_SIZE])
+        # decodificador incremental para no duplicar el documento como str
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        view = memoryview(content)
+        for offset in range(0, len(view), chunk_size):
+            converter.feed(decoder.decode(view[offset:offset + chunk_size]))
+        converter.feed(decoder.decode(b'', final=True))
+    else:
+        for offset in range(0, len(content), chunk_size):
+            converter.feed(content[offset:offset + chunk_size])
+
+    converter.close()
+
+    return DocumentConverterResult(converter.getvalue(), title=converter.title)
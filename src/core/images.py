@@ -0,0 +1,211 @@
+"""
+política de imágenes embebidas en el markdown convertido
+
+las imágenes embebidas como data uri pueden ocupar varios mb del markdown;
+según la política se mantienen (inline), se eliminan (drop) o se suben a
+un almacén s3 direccionado por contenido y se enlazan (external)
+"""
+import base64
+import binascii
+import hashlib
+import mimetypes
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+from botocore.exceptions import ClientError
+
+IMAGE_POLICY_INLINE = 'inline'
+IMAGE_POLICY_DROP = 'drop'
+IMAGE_POLICY_EXTERNAL = 'external'
+IMAGE_POLICIES = (IMAGE_POLICY_INLINE, IMAGE_POLICY_DROP, IMAGE_POLICY_EXTERNAL)
+
+DEFAULT_IMAGE_PREFIX = 'images/'
+DEFAULT_UPLOAD_WORKERS = 8
+
+# solo se suben imágenes raster: svg y cualquier otro tipo pueden llevar
+# scripts y, servidos desde el bucket con su content type, permiten xss
+RASTER_IMAGE_TYPES = frozenset((
+    'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'image/bmp',
+    'image/tiff', 'image/avif', 'image/x-icon', 'image/vnd.microsoft.icon'
+))
+SAFE_CONTENT_TYPE = 'application/octet-stream'
+
+# ![alt](data:...) con título opcional
+_DATA_URI_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\((data:[^)\s]*)(\s+"[^"]*")?\)')
+_BASE64_DATA_URI_RE = re.compile(r'data:([\w.+-]+/[\w.+-]+)(?:;[\w=.-]+)*;base64,([A-Za-z0-9+/=]+)$')
+
+
+class ImageStore:
+    """
+    almacén de imágenes en s3 con keys derivadas del hash del contenido
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str,
+        prefix: str = DEFAULT_IMAGE_PREFIX,
+        base_url: Optional[str] = None,
+        max_workers: int = DEFAULT_UPLOAD_WORKERS
+    ):
+        """
+        inicializa el almacén
+
+        Args:
+            s3_client: cliente s3 de boto3
+            bucket: bucket donde se guardan las imágenes
+            prefix: prefijo de las keys de imagen
+            base_url: url pública base para los enlaces (por defecto s3://bucket)
+            max_workers: subidas en paralelo
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.max_workers = max_workers
+        # hashes que ya sabemos que existen en el bucket (contenedor caliente)
+        self._known: Set[str] = set()
+
+    def key_for(self, digest: str, content_type: str) -> str:
+        """genera la key de una imagen a partir de su hash"""
+        extension = mimetypes.guess_extension(content_type) or '.bin'
+        return f"{self.prefix}{digest}{extension}"
+
+    def url_for(self, key: str) -> str:
+        """genera el enlace que se escribe en el markdown"""
+        if self.base_url:
+            return f"{self.base_url}/{key}"
+        return f"s3://{self.bucket}/{key}"
+
+    def put_many(self, images: Dict[str, Tuple[bytes, str]]) -> Dict[str, str]:
+        """
+        sube en paralelo las imágenes que aún no existen
+
+        Args:
+            images: hash -> (bytes, content type)
+
+        Returns:
+            hash -> url de la imagen
+        """
+        if not images:
+            return {}
+
+        workers = max(1, min(self.max_workers, len(images)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                digest: executor.submit(self._put_once, digest, data, content_type)
+                for digest, (data, content_type) in images.items()
+            }
+            return {digest: future.result() for digest, future in futures.items()}
+
+    def _put_once(self, digest: str, data: bytes, content_type: str) -> str:
+        """sube la imagen solo si no está ya en el bucket"""
+        if content_type not in RASTER_IMAGE_TYPES:
+            content_type = SAFE_CONTENT_TYPE
+        key = self.key_for(digest, content_type)
+
+        if digest not in self._known and not self._exists(key):
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=key,
+                Body=data,
+                ContentType=content_type,
+                Metadata={'sha256': digest}
+            )
+        self._known.add(digest)
+
+        return self.url_for(key)
+
+    def _exists(self, key: str) -> bool:
+        """verifica con un head si la key ya existe"""
+        try:
+            self.s3_client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+
+def _decode_data_uri(uri: str) -> Optional[Tuple[bytes, str]]:
+    """decodifica un data uri base64, o None si está truncado, no es base64 o no es una imagen raster"""
+    match = _BASE64_DATA_URI_RE.match(uri)
+    if not match:
+        return None
+    content_type = match.group(1).lower()
+    if content_type not in RASTER_IMAGE_TYPES:
+        return None
+    try:
+        return base64.b64decode(match.group(2), validate=True), content_type
+    except (binascii.Error, ValueError):
+        return None
+
+
+def apply_image_policy(
+    markdown: str,
+    policy: str,
+    store: Optional[ImageStore] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    aplica la política de imágenes a los data uri del markdown
+
+    Args:
+        markdown: texto convertido
+        policy: inline, drop o external
+        store: almacén de imágenes (requerido para external)
+
+    Returns:
+        tupla (markdown, estadísticas de imágenes)
+    """
+    if policy not in IMAGE_POLICIES:
+        raise ValueError(f"Invalid image policy: {policy}")
+
+    stats: Dict[str, Any] = {'policy': policy, 'count': 0, 'unique': 0, 'bytes_removed': 0}
+    matches = list(_DATA_URI_IMAGE_RE.finditer(markdown))
+    stats['count'] = len(matches)
+
+    if not matches or policy == IMAGE_POLICY_INLINE:
+        return markdown, stats
+
+    urls: Dict[str, str] = {}
+    digests: List[Optional[str]] = []
+
+    if policy == IMAGE_POLICY_EXTERNAL:
+        if store is None:
+            raise ValueError("External image policy requires an image store")
+
+        # deduplicar por hash dentro del documento antes de subir
+        images: Dict[str, Tuple[bytes, str]] = {}
+        for match in matches:
+            decoded = _decode_data_uri(match.group(2))
+            if decoded is None:
+                digests.append(None)
+                continue
+            digest = hashlib.sha256(decoded[0]).hexdigest()
+            images.setdefault(digest, decoded)
+            digests.append(digest)
+
+        stats['unique'] = len(images)
+        urls = store.put_many(images)
+
+    # reconstruir el texto en una sola pasada
+    parts: List[str] = []
+    position = 0
+    for index, match in enumerate(matches):
+        parts.append(markdown[position:match.start()])
+        position = match.end()
+
+        digest = digests[index] if digests else None
+        if digest is not None:
+            replacement = f"![{match.group(1)}]({urls[digest]}{match.group(3) or ''})"
+        elif policy == IMAGE_POLICY_DROP:
+            replacement = ''
+        else:
+            # data uri no decodificable: se deja como estaba
+            replacement = match.group(0)
+
+        stats['bytes_removed'] += len(match.group(0)) - len(replacement)
+        parts.append(replacement)
+    parts.append(markdown[position:])
+
+    return ''.join(parts), stats
@@ -0,0 +1,251 @@
+"""
+conversión incremental de objetos que solo crecen (texto, logs y csv)
+
+junto a la salida se guarda un registro de estado con el offset en bytes
+consumido, el hash de la última ventana del prefijo y la última línea
+parcial. cuando llega una versión más larga que comparte el prefijo solo se
+descarga la cola con un get por rango, se renderiza y se añade al markdown
+existente. el render replica la normalización de markitdown y el estado solo
+se crea si coincide byte a byte con la conversión completa
+"""
+import csv
+import hashlib
+import io
+import mmap
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+from markitdown import __version__ as markitdown_version
+from src.core.inputs import Content
+
+INCREMENTAL_FORMATS = ('txt', 'log', 'csv')
+
+# bytes del final del prefijo que se vuelven a descargar para verificarlo
+PREFIX_WINDOW = 4096
+
+STATE_SUFFIX = '.state.json'
+
+_PIPE_ESCAPE_RE = re.compile(r"(?<!\\)(\\*)\|")
+
+
+def is_incremental_format(extension: Optional[str]) -> bool:
+    """verifica si el formato admite conversión incremental"""
+    return extension in INCREMENTAL_FORMATS
+
+
+def state_key(output_key: str) -> str:
+    """key del registro de estado junto a la salida"""
+    return output_key + STATE_SUFFIX
+
+
+def tail_start(state: Dict[str, Any]) -> int:
+    """primer byte a descargar: la ventana del prefijo seguida de la cola nueva"""
+    return max(0, state['offset'] - PREFIX_WINDOW)
+
+
+def _window_hash(data: Union[bytes, mmap.mmap]) -> str:
+    """hash de la última ventana del prefijo"""
+    return hashlib.sha256(data[-PREFIX_WINDOW:]).hexdigest()
+
+
+def _split_text(text: str) -> Tuple[str, str]:
+    """separa las líneas completas de la última línea parcial"""
+    end = text.rfind('\n') + 1
+    return text[:end], text[end:]
+
+
+def _render_text(text: str, context: Dict[str, Any]) -> str:
+    """renderiza líneas completas como markitdown: sin espacios finales y como mucho dos saltos seguidos"""
+    parts = []
+    trailing = context['trailing_newlines']
+    for line in text.split('\n')[:-1]:
+        line = line.rstrip()
+        if line:
+            parts.append(line + '\n')
+            trailing = 1
+        elif trailing < 2:
+            parts.append('\n')
+            trailing += 1
+    context['trailing_newlines'] = trailing
+    return ''.join(parts)
+
+
+def _split_csv(text: str) -> Optional[Tuple[str, str]]:
+    """
+    separa las filas completas de las pendientes
+
+    las filas en blanco del final quedan pendientes porque markitdown las
+    descarta mientras no llegue otra fila detrás
+    """
+    committed, pending = _split_text(text)
+    core = committed.rstrip('\r\n')
+    end = 0
+    if core:
+        end = len(core) + (2 if committed[len(core):len(core) + 2] == '\r\n' else 1)
+    committed, pending = text[:end], text[end:]
+
+    # un número impar de comillas deja un campo multilínea abierto
+    if committed.count('"') % 2:
+        return None
+    return committed, pending
+
+
+def _escape_cell(value: str) -> str:
+    """escapa una celda para la tabla markdown igual que markitdown"""
+    value = _PIPE_ESCAPE_RE.sub(lambda m: m.group(1) * 2 + r"\|", value)
+    return value.replace("\r\n", " ").replace("\n", " ").replace("\r", " ")
+
+
+def _csv_rows(text: str) -> List[List[str]]:
+    """parsea filas csv"""
+    return list(csv.reader(io.StringIO(text, newline='')))
+
+
+def _render_csv(rows: List[List[str]], context: Dict[str, Any]) -> Optional[str]:
+    """
+    renderiza filas como la tabla de markitdown
+
+    Returns:
+        markdown de las filas o None si alguna es más ancha que la cabecera
+    """
+    columns = context['columns']
+    parts = []
+    for row in rows:
+        if len(row) > columns:
+            return None
+        if not row and not context['data_rows']:
+            # filas vacías antes de la cabecera o justo después
+            continue
+
+        cells = [_escape_cell(cell) for cell in row] + [''] * (columns - len(row))
+        line = '| ' + ' | '.join(cells) + ' |'
+        if not context['header']:
+            parts.append(line + '\n| ' + ' | '.join(['---'] * columns) + ' |')
+            context['header'] = True
+        else:
+            parts.append('\n' + line)
+            context['data_rows'] = True
+    return ''.join(parts)
+
+
+def _render(fmt: str, text: str, context: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+    """
+    renderiza un trozo de texto a partir del contexto del markdown ya escrito
+
+    Returns:
+        tupla (markdown de lo completo, markdown provisional de lo pendiente,
+        texto pendiente) o None si el trozo no admite render incremental;
+        el contexto se actualiza solo con lo completo
+    """
+    if fmt != 'csv':
+        committed, pending = _split_text(text)
+        committed_md = _render_text(committed, context)
+        return committed_md, pending.rstrip(), pending
+
+    split = _split_csv(text)
+    if split is None:
+        return None
+    committed, pending = split
+
+    committed_md = _render_csv(_csv_rows(committed), context)
+    pending_rows = _csv_rows(pending)
+    while pending_rows and not pending_rows[-1]:
+        pending_rows.pop()
+    pending_md = _render_csv(pending_rows, dict(context))
+    if committed_md is None or pending_md is None:
+        return None
+    return committed_md, pending_md, pending
+
+
+def build_state(
+    content: Content,
+    markdown: str,
+    extension: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    """
+    crea el registro de estado tras una conversión completa
+
+    Args:
+        content: bytes o mmap del objeto original (con texto no hay estado)
+        markdown: markdown generado por la conversión completa
+        extension: formato del objeto
+
+    Returns:
+        estado para continuar de forma incremental o None si el render
+        incremental no reproduce exactamente la conversión completa
+    """
+    if not is_incremental_format(extension) or not isinstance(content, (bytes, mmap.mmap)):
+        return None
+    try:
+        text = str(content, 'utf-8')
+    except UnicodeDecodeError:
+        return None
+
+    fmt = str(extension)
+    context: Dict[str, Any] = {'trailing_newlines': 0}
+    if fmt == 'csv':
+        text = text.lstrip('\ufeff')
+        rows = _csv_rows(text)
+        context = {'columns': max((len(row) for row in rows), default=0), 'header': False, 'data_rows': False}
+
+    rendered = _render(fmt, text, context)
+    if rendered is None:
+        return None
+    committed_md, pending_md, pending = rendered
+    if committed_md + pending_md != markdown:
+        return None
+
+    return {
+        'format': fmt,
+        'offset': len(content),
+        'prefix_hash': _window_hash(content),
+        'pending': pending,
+        'markdown_offset': len(committed_md),
+        'context': context,
+        'markitdown_version': markitdown_version
+    }
+
+
+def append_tail(state: Dict[str, Any], fetched: bytes, markdown: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    añade la cola nueva al markdown existente
+
+    Args:
+        state: estado guardado tras la conversión anterior
+        fetched: bytes descargados desde tail_start(state) hasta el final
+        markdown: markdown guardado en la conversión anterior
+
+    Returns:
+        tupla (markdown completo, nuevo estado) o None si hay que reconvertir
+        entero (prefijo distinto, versión de markitdown distinta, etc.)
+    """
+    if state.get('markitdown_version') != markitdown_version:
+        return None
+    if len(markdown) < state['markdown_offset']:
+        return None
+
+    window_size = state['offset'] - tail_start(state)
+    window, tail = fetched[:window_size], fetched[window_size:]
+    if len(window) != window_size or _window_hash(window) != state['prefix_hash'] or not tail:
+        return None
+
+    try:
+        text = state['pending'] + tail.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+    context = dict(state['context'])
+    rendered = _render(state['format'], text, context)
+    if rendered is None:
+        return None
+    committed_md, pending_md, pending = rendered
+
+    base = markdown[:state['markdown_offset']] + committed_md
+    new_state = dict(
+        state,
+        offset=state['offset'] + len(tail),
+        prefix_hash=_window_hash(fetched),
+        pending=pending,
+        markdown_offset=len(base),
+        context=context
+    )
+    return base + pending_md, new_state
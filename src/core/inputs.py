@@ -0,0 +1,353 @@
+"""
+entrada de una conversión sin copias en el heap
+
+los contenidos pequeños llegan como bytes o texto; los grandes, volcados a
+/tmp, se mapean en memoria de solo lectura y los conversores leen de la
+caché de páginas del sistema a través de un stream sobre el mmap en lugar
+de recibir una copia en bytes
+"""
+import base64
+import io
+import json
+import mmap
+import os
+import re
+import tempfile
+from typing import IO, Any, BinaryIO, Dict, List, Optional, Union
+from src.core.config import get_config_int
+
+# a partir de este tamaño las entradas se vuelcan a /tmp y se mapean
+DEFAULT_SPOOL_THRESHOLD = 16 * 1024 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# caracteres que b64decode descarta sin validar
+_NON_BASE64_RE = re.compile(r'[^A-Za-z0-9+/=]')
+# un body cuyo primer carácter no blanco es { puede ser el sobre json del request
+_JSON_OBJECT_RE = re.compile(rb'\s*\{')
+
+# contenido que aceptan las etapas de la conversión: texto, bytes o un mmap
+Content = Union[str, bytes, mmap.mmap]
+
+
+class MmapReader(io.BufferedIOBase):
+    """
+    stream binario de solo lectura y con seek sobre un mmap
+
+    cada read devuelve solo el rango pedido; el archivo nunca se copia entero.
+    hereda de BufferedIOBase porque magika (detección de markitdown) lo exige
+    """
+
+    def __init__(self, view: mmap.mmap):
+        """
+        inicializa el stream
+
+        Args:
+            view: mmap de solo lectura
+        """
+        super().__init__()
+        self._view = view
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._position + size)
+        if self._position >= end:
+            return b''
+        data = self._view[self._position:end]
+        self._position = end
+        return data
+
+    def read1(self, size: Optional[int] = -1) -> bytes:
+        return self.read(size)
+
+    def readinto(self, buffer: Any) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def open_binary(content: Union[bytes, mmap.mmap]) -> BinaryIO:
+    """
+    abre un stream binario sobre el contenido sin copiarlo
+
+    io.BytesIO comparte el objeto bytes hasta que se escribe; sobre un mmap
+    copiaría todo, así que se usa MmapReader
+    """
+    if isinstance(content, mmap.mmap):
+        return MmapReader(content)  # type: ignore[return-value]
+    return io.BytesIO(content)
+
+
+class ConversionInput:
+    """
+    contenido de una conversión: bytes, texto, un archivo en disco o un mmap
+
+    los archivos se mapean en memoria de solo lectura al abrirlos; data
+    expone el contenido (str, bytes o mmap, que admiten slicing, find,
+    expresiones regulares y hash) y open() un stream binario con seek
+    """
+
+    def __init__(self, data: Content, path: Optional[str] = None):
+        """
+        inicializa la entrada
+
+        Args:
+            data: contenido como texto, bytes o mmap
+            path: archivo del que se mapeó el contenido, si lo hay
+        """
+        self.data = data
+        self.path = path
+
+    @classmethod
+    def from_path(cls, path: Union[str, 'os.PathLike[str]']) -> 'ConversionInput':
+        """
+        mapea un archivo en memoria de solo lectura
+
+        Args:
+            path: ruta del archivo
+
+        Returns:
+            ConversionInput sobre el mmap (o bytes vacíos si el archivo está vacío)
+        """
+        path = os.fspath(path)
+        # el mmap duplica el descriptor, así que el archivo se puede cerrar ya
+        with open(path, 'rb') as handle:
+            if os.fstat(handle.fileno()).st_size == 0:
+                # no se puede mapear un archivo vacío
+                return cls(b'', path)
+            return cls(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    @classmethod
+    def of(cls, content: Any) -> 'ConversionInput':
+        """
+        envuelve el contenido recibido por convert_to_markdown
+
+        Args:
+            content: ConversionInput, ruta (os.PathLike), mmap, bytes o texto
+
+        Returns:
+            ConversionInput
+        """
+        if isinstance(content, ConversionInput):
+            return content
+        if isinstance(content, os.PathLike):
+            return cls.from_path(content)
+        return cls(content)
+
+    @property
+    def size(self) -> int:
+        """tamaño del contenido"""
+        return len(self.data)
+
+    @property
+    def is_mapped(self) -> bool:
+        """el contenido es un mmap y no debe copiarse a bytes"""
+        return isinstance(self.data, mmap.mmap)
+
+    def open(self) -> BinaryIO:
+        """stream binario con seek sobre el contenido"""
+        if isinstance(self.data, str):
+            return io.BytesIO(self.data.encode('utf-8'))
+        return open_binary(self.data)
+
+    def close(self) -> None:
+        """libera el mmap, si lo hay"""
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self) -> 'ConversionInput':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def parse_spilled_body(body: ConversionInput) -> Dict[str, Any]:
+    """
+    interpreta un body volcado a disco
+
+    si empieza por { se lee como el sobre json (content, filename y
+    opciones) directamente del mmap; si no, o si no es un json válido,
+    el body es el propio documento y no se copia
+
+    Returns:
+        diccionario con content y, si venían en el sobre, filename y opciones
+    """
+    if not isinstance(body.data, str) and _JSON_OBJECT_RE.match(body.data):
+        try:
+            data = json.load(io.TextIOWrapper(body.open(), encoding='utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            data = None
+        if isinstance(data, dict):
+            return data
+    return {'content': body}
+
+
+def spool_threshold() -> int:
+    """tamaño a partir del cual las entradas se vuelcan a /tmp"""
+    return get_config_int('INPUT_SPOOL_THRESHOLD', DEFAULT_SPOOL_THRESHOLD)
+
+
+class InputBuffer:
+    """
+    buffer de entrada común al api, la invocación directa y s3
+
+    como SpooledTemporaryFile: los datos se acumulan en memoria hasta el
+    umbral y, si lo superan, se vuelcan a un archivo en /tmp. cada entrada
+    escribe el contenido una sola vez y convert_to_markdown lee getvalue():
+    los bytes tal cual si cupieron en memoria o un ConversionInput mapeado
+    si se volcaron. el archivo se borra en cuanto está mapeado, así que no
+    queda nada en /tmp si la invocación se interrumpe
+    """
+
+    def __init__(self, threshold: Optional[int] = None, suffix: str = ''):
+        """
+        inicializa el buffer
+
+        Args:
+            threshold: bytes a partir de los que se vuelca a disco (default: INPUT_SPOOL_THRESHOLD)
+            suffix: extensión del archivo temporal
+        """
+        self.threshold = spool_threshold() if threshold is None else threshold
+        self.suffix = suffix
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._file: Optional[IO[bytes]] = None
+        self._value: Optional[Union[bytes, ConversionInput]] = None
+
+    @property
+    def size(self) -> int:
+        """bytes escritos"""
+        return self._size
+
+    @property
+    def spilled(self) -> bool:
+        """el contenido superó el umbral y está en disco"""
+        return self._file is not None
+
+    def write(self, data: bytes) -> None:
+        """
+        añade datos al buffer
+
+        Raises:
+            ValueError: si el buffer ya se entregó con getvalue()
+        """
+        if self._value is not None:
+            raise ValueError("InputBuffer is already finished")
+        if self._file is None and self._size + len(data) > self.threshold:
+            self._file = tempfile.NamedTemporaryFile(suffix=self.suffix, delete=False)
+            for chunk in self._chunks:
+                self._file.write(chunk)
+            self._chunks = []
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            # se guarda el objeto recibido: una sola escritura no se copia
+            self._chunks.append(data)
+        self._size += len(data)
+
+    def write_stream(self, stream: Any, size: Optional[int] = None) -> None:
+        """
+        copia un stream al buffer
+
+        con tamaño conocido por debajo del umbral se lee de una vez; si no,
+        por bloques, de modo que nunca hay más de un bloque en el heap
+
+        Args:
+            stream: objeto con read(n), p.ej. el Body de get_object
+            size: tamaño anunciado (ContentLength), si se conoce
+        """
+        if size is None or size <= self.threshold:
+            self.write(stream.read())
+            return
+        while True:
+            chunk = stream.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            self.write(chunk)
+
+    def write_base64(self, text: Union[str, bytes]) -> None:
+        """
+        decodifica base64 directamente en el buffer
+
+        los textos grandes se decodifican por bloques alineados a 4
+        caracteres en lugar de crear los bytes completos y copiarlos después
+
+        Raises:
+            binascii.Error: si el base64 no es válido
+        """
+        if len(text) <= self.threshold:
+            self.write(base64.b64decode(text))
+            return
+        if isinstance(text, bytes):
+            text = text.decode('ascii')
+        carry = ''
+        for start in range(0, len(text), COPY_CHUNK_SIZE):
+            block = carry + _NON_BASE64_RE.sub('', text[start:start + COPY_CHUNK_SIZE])
+            usable = len(block) - len(block) % 4
+            self.write(base64.b64decode(block[:usable]))
+            carry = block[usable:]
+        if carry:
+            self.write(base64.b64decode(carry))
+
+    def getvalue(self) -> Union[bytes, ConversionInput]:
+        """
+        termina el buffer y entrega su contenido
+
+        Returns:
+            bytes si cupo en memoria o ConversionInput mapeado si se volcó a disco
+        """
+        if self._value is None:
+            if self._file is None:
+                self._value = self._chunks[0] if len(self._chunks) == 1 else b''.join(self._chunks)
+                self._chunks = []
+            else:
+                self._file.close()
+                try:
+                    self._value = ConversionInput.from_path(self._file.name)
+                finally:
+                    os.unlink(self._file.name)
+        return self._value
+
+    @property
+    def data(self) -> Union[bytes, mmap.mmap]:
+        """contenido como bytes o mmap, para las etapas que no aceptan ConversionInput"""
+        value = self.getvalue()
+        return value.data if isinstance(value, ConversionInput) else value  # type: ignore[return-value]
+
+    def close(self) -> None:
+        """libera el mmap y borra el archivo temporal si no llegó a mapearse"""
+        if isinstance(self._value, ConversionInput):
+            self._value.close()
+        elif self._file is not None and self._value is None:
+            self._file.close()
+            os.unlink(self._file.name)
+        self._chunks = []
+
+    def __enter__(self) -> 'InputBuffer':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,179 @@
+"""
+inspección barata de documentos sin convertirlos
+
+lee solo cabeceras e índices (cabecera y xref de los pdfs, directorio
+central de los zip de office) para informar del formato, páginas, hojas o
+diapositivas, cifrado, imágenes embebidas y una estimación del tiempo de
+conversión, de modo que los orquestadores decidan antes de gastar cómputo
+"""
+import mmap
+import re
+import zipfile
+from typing import Any, Dict, List, Optional, Union
+from pdfminer.pdfdocument import PDFDocument, PDFEncryptionError, PDFPasswordIncorrect
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+from src.core.archive_guard import ZIP_MAGIC, inspect_zip
+from src.core.inputs import open_binary
+from src.utils.utils import get_file_extension
+
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+PDF_MAGIC = b'%PDF-'
+# nombre del stream (utf-16) con el que office guarda los documentos cifrados
+OLE_ENCRYPTED_STREAM = 'EncryptedPackage'.encode('utf-16-le')
+
+# docProps/app.xml es pequeño; se ignora si el zip declara algo mayor
+APP_PROPERTIES_MAX_BYTES = 64 * 1024
+
+_APP_PAGES_RE = re.compile(rb'<(?:\w+:)?Pages>(\d+)<')
+
+# estimación de segundos de conversión: fijo + por mb + por página
+ESTIMATE_COEFFICIENTS = {
+    'pdf': (0.3, 0.4, 0.08),
+    'docx': (0.3, 0.6, 0.0),
+    'xlsx': (0.5, 2.5, 0.0),
+    'pptx': (0.4, 0.5, 0.02),
+    'html': (0.1, 0.8, 0.0),
+    'text': (0.05, 0.1, 0.0),
+}
+DEFAULT_COEFFICIENTS = (0.3, 1.0, 0.0)
+
+_OFFICE_FORMATS = {
+    'word/': 'docx',
+    'xl/': 'xlsx',
+    'ppt/': 'pptx',
+}
+
+
+def detect_format(content: Union[bytes, mmap.mmap], filename: Optional[str] = None) -> str:
+    """
+    detecta el formato por la firma del contenido y, si no basta, por la extensión
+
+    Returns:
+        pdf, docx, xlsx, pptx, zip, ole, html, text o binary
+    """
+    extension = get_file_extension(filename) if filename else None
+    head = content[:1024]
+
+    if PDF_MAGIC in head:
+        return 'pdf'
+    if head.startswith(ZIP_MAGIC):
+        return extension if extension in ('docx', 'xlsx', 'pptx', 'epub') else 'zip'
+    if head.startswith(OLE_MAGIC):
+        return 'ole'
+    try:
+        text = head.decode('utf-8')
+    except UnicodeDecodeError:
+        # la ventana puede cortar un carácter multibyte al final
+        try:
+            text = head[:-3].decode('utf-8')
+        except UnicodeDecodeError:
+            return 'binary'
+    if extension in ('html', 'htm') or re.match(r'\s*<(!doctype html|html)', text, re.IGNORECASE):
+        return 'html'
+    return 'text'
+
+
+def _inspect_pdf(content: Union[bytes, mmap.mmap]) -> Dict[str, Any]:
+    """
+    lee la cabecera, el trailer y el árbol de páginas sin interpretar el contenido
+
+    el cifrado sale del trailer; las imágenes no se cuentan (None): contarlas
+    exige recorrer el archivo entero o los recursos de cada página
+    """
+    info: Dict[str, Any] = {'pages': None, 'encrypted': None, 'images': None}
+    try:
+        document = PDFDocument(PDFParser(open_binary(content)), password='', fallback=False)
+        info['encrypted'] = document.encryption is not None
+        info['pages'] = int(resolve1(resolve1(document.catalog['Pages']).get('Count', 0)))
+    except (PDFPasswordIncorrect, PDFEncryptionError):
+        info['encrypted'] = True
+    except Exception:
+        info['readable'] = False
+    return info
+
+
+def _app_pages(content: Union[bytes, mmap.mmap], entries: List[Any]) -> Optional[int]:
+    """lee el recuento de páginas que guarda word en docProps/app.xml"""
+    app = next((entry for entry in entries if entry.filename == 'docProps/app.xml'), None)
+    if app is None or app.file_size > APP_PROPERTIES_MAX_BYTES:
+        return None
+    try:
+        with zipfile.ZipFile(open_binary(content)) as archive:
+            match = _APP_PAGES_RE.search(archive.read(app))
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, ValueError, EOFError):
+        return None
+    return int(match.group(1)) if match else None
+
+
+def _inspect_office(content: Union[bytes, mmap.mmap]) -> Dict[str, Any]:
+    """cuenta hojas, diapositivas e imágenes a partir del directorio central"""
+    stats, entries = inspect_zip(content)
+    names = [entry.filename for entry in entries]
+
+    fmt = 'zip'
+    for prefix, office_format in _OFFICE_FORMATS.items():
+        if any(name.startswith(prefix) for name in names):
+            fmt = office_format
+            break
+
+    info: Dict[str, Any] = {
+        'format': fmt,
+        'encrypted': any(entry.flag_bits & 0x1 for entry in entries),
+        'images': sum(1 for name in names if '/media/' in name and not name.endswith('/')),
+        'archive': stats
+    }
+    if fmt == 'xlsx':
+        info['sheets'] = sum(1 for name in names if re.match(r'xl/worksheets/sheet\d+\.xml$', name))
+    elif fmt == 'pptx':
+        info['slides'] = sum(1 for name in names if re.match(r'ppt/slides/slide\d+\.xml$', name))
+    elif fmt == 'docx':
+        info['pages'] = _app_pages(content, entries)
+    return info
+
+
+def estimate_conversion_seconds(fmt: str, size: int, units: Optional[int] = None) -> float:
+    """
+    estima el tiempo de conversión con un modelo lineal por formato
+
+    Args:
+        fmt: formato detectado
+        size: tamaño en bytes
+        units: páginas, hojas o diapositivas si se conocen
+
+    Returns:
+        segundos estimados
+    """
+    base, per_mb, per_unit = ESTIMATE_COEFFICIENTS.get(fmt, DEFAULT_COEFFICIENTS)
+    return round(base + per_mb * size / (1024 * 1024) + per_unit * (units or 0), 2)
+
+
+def inspect_document(content: Union[bytes, mmap.mmap], filename: Optional[str] = None) -> Dict[str, Any]:
+    """
+    inspecciona un documento sin convertirlo
+
+    Args:
+        content: bytes o mmap del documento
+        filename: nombre del archivo (ayuda a distinguir formatos)
+
+    Returns:
+        diccionario con format, size, pages/sheets/slides, encrypted, images
+        (None si no se conocen sin leer el documento entero) y estimated_seconds
+
+    Raises:
+        ConversionError: si el contenedor zip está corrupto
+    """
+    fmt = detect_format(content, filename)
+    info: Dict[str, Any] = {'format': fmt, 'size': len(content), 'encrypted': False, 'images': 0}
+
+    if fmt == 'pdf':
+        info.update(_inspect_pdf(content))
+    elif fmt in ('docx', 'xlsx', 'pptx', 'zip'):
+        info.update(_inspect_office(content))
+    elif fmt == 'ole':
+        # los documentos office cifrados se guardan en un contenedor ole
+        info['encrypted'] = content.find(OLE_ENCRYPTED_STREAM) != -1
+
+    units = info.get('pages') or info.get('sheets') or info.get('slides')
+    info['estimated_seconds'] = estimate_conversion_seconds(info['format'], len(content), units)
+    return info
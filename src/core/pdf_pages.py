@@ -0,0 +1,140 @@
+"""
+conversión de pdfs página a página con puntos de control
+
+reproduce el conversor de pdfs de markitdown (una pasada con pdfplumber que
+extrae tablas y formularios y, si el documento es solo prosa, pdfminer para
+todo el texto) con sus mismas funciones de extracción, pero procesando una
+página cada vez para poder parar entre páginas cuando se agota el plazo de
+la invocación y devolver lo extraído hasta entonces. con tiempo de sobra la
+salida es la misma que la de markitdown
+"""
+import importlib
+import io
+import mmap
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
+import pdfplumber
+from markitdown import DocumentConverterResult
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from src.core.deadline import Deadline
+from src.core.inputs import open_binary
+
+# funciones de extracción de markitdown en un módulo privado; sin ellas (otra
+# versión) no se puede igualar su salida y los pdfs se convierten sin puntos de control
+try:
+    markitdown_pdf: Any = importlib.import_module('markitdown.converters._pdf_converter')
+except ImportError:
+    markitdown_pdf = None
+
+PAGE_CHECKPOINTS_AVAILABLE = markitdown_pdf is not None and all(
+    hasattr(markitdown_pdf, name) for name in ('_extract_form_content_from_words', '_merge_partial_numbering_lines')
+)
+
+
+def _normalize(text: str) -> str:
+    """aplica la misma normalización que markitdown a su salida"""
+    text = '\n'.join(line.rstrip() for line in re.split(r'\r?\n', text))
+    return re.sub(r'\n{3,}', '\n\n', text)
+
+
+def _extract_pdfminer(content: Union[bytes, mmap.mmap], deadline: Deadline) -> Tuple[str, int, Optional[int]]:
+    """
+    extrae el texto con pdfminer como pdfminer.high_level.extract_text, página a página
+
+    Returns:
+        tupla (texto, páginas convertidas, página por la que reanudar o None si terminó)
+    """
+    output = io.StringIO()
+    resources = PDFResourceManager()
+    device = TextConverter(resources, output, laparams=LAParams())
+    interpreter = PDFPageInterpreter(resources, device)
+
+    converted, resume = 0, None
+    try:
+        for index, page in enumerate(PDFPage.get_pages(open_binary(content))):
+            # punto de control: no empezar otra página sin margen para responder
+            if deadline.expired():
+                resume = index
+                break
+            interpreter.process_page(page)
+            converted = index + 1
+    finally:
+        device.close()
+    return output.getvalue(), converted, resume
+
+
+def _extract_plumber(content: Union[bytes, mmap.mmap],
+                     deadline: Deadline) -> Tuple[List[str], int, int, Optional[int]]:
+    """
+    pasada de markitdown con pdfplumber: tablas y formularios por página y el texto del resto
+
+    Returns:
+        tupla (fragmentos, páginas con formulario, páginas convertidas,
+        página por la que reanudar o None si terminó)
+    """
+    chunks: List[str] = []
+    form_pages, converted, resume = 0, 0, None
+    # pdfplumber acepta cualquier stream binario con seek, aunque solo declare BytesIO
+    with pdfplumber.open(cast(io.BytesIO, open_binary(content))) as pdf:
+        for index, page in enumerate(pdf.pages):
+            if deadline.expired():
+                resume = index
+                break
+            page_content = markitdown_pdf._extract_form_content_from_words(page)
+            if page_content is not None:
+                form_pages += 1
+                if page_content.strip():
+                    chunks.append(page_content)
+            else:
+                text = page.extract_text()
+                if text and text.strip():
+                    chunks.append(text.strip())
+            page.close()
+            converted = index + 1
+    return chunks, form_pages, converted, resume
+
+
+def convert_pdf_pages(
+    content: Union[bytes, mmap.mmap],
+    deadline: Deadline
+) -> Tuple[DocumentConverterResult, Dict[str, Any]]:
+    """
+    convierte un pdf como markitdown, parando entre páginas si se agota el plazo
+
+    si el plazo se agota en la segunda pasada (pdfminer, solo en documentos
+    de prosa) el documento ya está entero en la primera: se devuelve completo
+    con el texto de pdfplumber en lugar de cortarlo
+
+    Args:
+        content: bytes o mmap del pdf
+        deadline: plazo de la invocación
+
+    Returns:
+        tupla (resultado con el texto extraído, progreso con páginas
+        convertidas, partial y la página por la que reanudar)
+    """
+    progress: Dict[str, Any] = {'pages_converted': 0, 'partial': False}
+    try:
+        chunks, form_pages, converted, resume = _extract_plumber(content, deadline)
+    except Exception:
+        # markitdown también vuelve a pdfminer si pdfplumber falla
+        chunks, form_pages, converted, resume = [], 0, 0, None
+    markdown = '\n\n'.join(chunks).strip()
+
+    # prosa sin tablas ni formularios (o nada extraído): pdfminer, como markitdown
+    if resume is None and (form_pages == 0 or not markdown):
+        prose, prose_converted, prose_resume = _extract_pdfminer(content, deadline)
+        # sin tiempo para la segunda pasada vale el texto completo de la primera
+        if prose_resume is None or not markdown:
+            markdown, converted, resume = prose, prose_converted, prose_resume
+
+    progress['pages_converted'] = converted
+    if resume is not None:
+        progress['partial'] = True
+        progress['resume_page'] = resume
+
+    markdown = markitdown_pdf._merge_partial_numbering_lines(markdown)
+    return DocumentConverterResult(markdown=_normalize(markdown)), progress
@@ -0,0 +1,198 @@
+"""
+clasificación rápida de pdfs antes de la conversión completa
+
+inspecciona la cabecera, el trailer y la tabla xref, y los operadores de
+fuente y texto de unas pocas páginas de muestra (incluidos los form
+xobjects que dibujan), para que los pdfs sin remedio (corruptos, cifrados
+con contraseña) fallen en milisegundos y los escaneados sin capa de texto
+se devuelvan sin pasar por pdfminer entero, si se muestrearon todas sus
+páginas. ante la duda la clasificación es unknown y se hace la conversión
+completa: nunca se descarta texto real
+"""
+import re
+from typing import Any, Dict, List, Optional, Set
+from pdfminer.pdfdocument import PDFDocument, PDFEncryptionError, PDFPasswordIncorrect
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import resolve1
+from src.core.exceptions import ConversionError
+from src.core.inputs import Content, open_binary
+
+PDF_OK = 'ok'
+PDF_IMAGE_ONLY = 'image_only'
+PDF_UNKNOWN = 'unknown'
+
+DEFAULT_SAMPLE_PAGES = 3
+
+# bytes inspeccionados al principio y al final del archivo
+HEADER_WINDOW = 1024
+TRAILER_WINDOW = 2048
+
+_HEADER_RE = re.compile(rb'%PDF-(\d\.\d)')
+_STARTXREF_RE = re.compile(rb'startxref\s+(\d+)\s+%%EOF')
+_TEXT_BLOCK_RE = re.compile(rb'\bBT\b')
+_TEXT_SHOW_RE = re.compile(rb'(Tj|TJ|\'|")')
+_XOBJECT_DO_RE = re.compile(rb'/([^\s/\[\]()<>{}%]+)\s*Do\b')
+
+# anidamiento máximo de form xobjects que se sigue antes de declarar la página dudosa
+MAX_XOBJECT_DEPTH = 8
+
+
+def _sample_indices(page_count: int, sample_pages: int) -> List[int]:
+    """elige páginas repartidas por el documento (inicio, medio, final)"""
+    if page_count <= sample_pages:
+        return list(range(page_count))
+    if sample_pages <= 1:
+        return [0]
+    step = (page_count - 1) / (sample_pages - 1)
+    return sorted({round(i * step) for i in range(sample_pages)})
+
+
+def _name(value: Any) -> Optional[str]:
+    """nombre de un objeto pdf (/Form -> 'Form')"""
+    value = resolve1(value)
+    return getattr(value, 'name', None)
+
+
+def _streams_have_text(resources: Any, streams: List[Any], depth: int, seen: Set[int]) -> Optional[bool]:
+    """
+    busca operadores de texto en unos contenidos y en los form xobjects que dibujan
+
+    Args:
+        resources: diccionario de recursos de los contenidos
+        streams: streams de contenido
+        depth: nivel de anidamiento actual
+        seen: ids de los xobjects ya recorridos (evita ciclos)
+
+    Returns:
+        True si hay texto, False si se demuestra que no lo hay y None si no
+        se puede asegurar (xobjects que no se resuelven o demasiado anidados)
+    """
+    resources = resolve1(resources) or {}
+    if not isinstance(resources, dict):
+        return None
+    fonts = resolve1(resources.get('Font'))
+    xobjects = resolve1(resources.get('XObject')) or {}
+
+    result: Optional[bool] = False
+    for stream in streams:
+        data = resolve1(stream).get_data()
+        if fonts and _TEXT_BLOCK_RE.search(data) and _TEXT_SHOW_RE.search(data):
+            return True
+
+        for match in _XOBJECT_DO_RE.finditer(data):
+            ref = xobjects.get(match.group(1).decode('latin-1')) if isinstance(xobjects, dict) else None
+            xobject = resolve1(ref)
+            attrs = getattr(xobject, 'attrs', None)
+            if not isinstance(attrs, dict):
+                # no se sabe qué dibuja: puede ser texto
+                result = None
+                continue
+            subtype = _name(attrs.get('Subtype'))
+            if subtype == 'Image':
+                continue
+            if subtype != 'Form' or depth >= MAX_XOBJECT_DEPTH:
+                result = None
+                continue
+            objid = getattr(ref, 'objid', None) or id(xobject)
+            if objid in seen:
+                continue
+            seen.add(objid)
+            # un form sin recursos propios usa los de quien lo dibuja
+            form = _streams_have_text(attrs.get('Resources') or resources, [xobject], depth + 1, seen)
+            if form:
+                return True
+            if form is None:
+                result = None
+    return result
+
+
+def _page_has_text(page: PDFPage) -> Optional[bool]:
+    """
+    verifica si la página (o algún form xobject que dibuja) usa fuentes y operadores de texto
+
+    Returns:
+        True, False o None si no se puede asegurar que no haya texto
+    """
+    return _streams_have_text(page.resources, list(page.contents or []), 0, set())
+
+
+def triage_pdf(content: Content, sample_pages: int = DEFAULT_SAMPLE_PAGES) -> Dict[str, Any]:
+    """
+    clasifica un pdf sin convertirlo
+
+    Args:
+        content: bytes o mmap del pdf (un str se codifica en utf-8)
+        sample_pages: páginas a muestrear en busca de texto
+
+    Returns:
+        diccionario con classification (ok, image_only o unknown), versión,
+        páginas, cifrado y páginas con texto entre las muestreadas
+
+    Raises:
+        ConversionError: pdf_corrupt, pdf_truncated o pdf_encrypted
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    header = _HEADER_RE.search(content[:HEADER_WINDOW])
+    if not header:
+        raise ConversionError("Not a PDF: missing %PDF header", error_type='pdf_corrupt')
+
+    # sin trailer al final puede haber basura detrás del %%EOF, que pdfminer
+    # acepta: no es motivo de error, solo se deja decidir a la conversión
+    startxref = _STARTXREF_RE.search(content[-TRAILER_WINDOW:])
+    if startxref and int(startxref.group(1)) >= len(content):
+        raise ConversionError("Truncated PDF: xref offset beyond end of file", error_type='pdf_truncated')
+
+    triage: Dict[str, Any] = {
+        'classification': PDF_UNKNOWN,
+        'version': header.group(1).decode('ascii'),
+        'encrypted': False,
+        'pages': None,
+        'sampled_pages': 0,
+        'text_pages': 0
+    }
+
+    try:
+        # sin fallback: si la xref está rota no se recorre el archivo entero aquí
+        document = PDFDocument(PDFParser(open_binary(content)), password='', fallback=False)
+    except (PDFPasswordIncorrect, PDFEncryptionError) as e:
+        raise ConversionError(
+            f"Encrypted PDF requires a password: {str(e) or type(e).__name__}",
+            error_type='pdf_encrypted',
+            details={'version': triage['version']}
+        )
+    except Exception:
+        # estructura dudosa: que decida la conversión completa
+        return triage
+    # cifrado con contraseña de usuario vacía: se lee sin ella, pero se informa
+    triage['encrypted'] = document.encryption is not None
+
+    uncertain = 0
+    try:
+        page_count = int(resolve1(resolve1(document.catalog['Pages']).get('Count', 0)))
+        triage['pages'] = page_count
+
+        wanted = _sample_indices(page_count, sample_pages)
+        last = wanted[-1] if wanted else -1
+        for index, page in enumerate(PDFPage.create_pages(document)):
+            if index > last:
+                break
+            if index not in wanted:
+                continue
+            triage['sampled_pages'] += 1
+            has_text = _page_has_text(page)
+            if has_text:
+                triage['text_pages'] += 1
+            elif has_text is None:
+                uncertain += 1
+    except Exception:
+        return triage
+
+    if triage['text_pages']:
+        triage['classification'] = PDF_OK
+    elif triage['sampled_pages'] and triage['sampled_pages'] == page_count and not uncertain:
+        # solo con todas las páginas vistas: una página sin muestrear puede tener texto
+        triage['classification'] = PDF_IMAGE_ONLY
+
+    return triage
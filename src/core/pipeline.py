@@ -0,0 +1,260 @@
+"""
+pipeline de conversión por etapas con tiempos y contrapresión
+
+cada etapa (ingesta, detección, conversión, post-procesado, emisión) es un
+componente intercambiable que trabaja sobre un PipelineItem y queda
+cronometrada en item.timings. run() recorre las etapas en orden para un
+solo documento; run_many() ejecuta cada etapa en sus propios hilos, unidas por
+colas acotadas, de modo que la e/s de un documento se solapa con la cpu de
+otro sin adelantar más de queue_size documentos por etapa
+"""
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+DEFAULT_QUEUE_SIZE = 2
+
+# marca de fin de la secuencia en las colas entre etapas
+_DONE = object()
+
+
+class PipelineItem:
+    """
+    unidad de trabajo que recorre las etapas
+
+    los valores que comparten las etapas se guardan por nombre (item['result']);
+    timings acumula los segundos de cada etapa y error el fallo que detuvo el
+    documento, si lo hubo
+    """
+
+    def __init__(self, **values: Any):
+        self.values: Dict[str, Any] = dict(values)
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[Exception] = None
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        self.values[name] = value
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.values
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.values.get(name, default)
+
+
+class Stage(ABC):
+    """
+    etapa del pipeline
+
+    las subclases definen name y process(); las etapas con handles_errors
+    también reciben los documentos que fallaron en una etapa anterior (p.ej.
+    la emisión, que guarda el error). workers es el número de hilos de la
+    etapa en run_many
+    """
+
+    name = ''
+    handles_errors = False
+    workers = 1
+
+    @abstractmethod
+    def process(self, item: PipelineItem) -> None:
+        """
+        procesa el documento, leyendo y escribiendo sus valores
+
+        Args:
+            item: documento en curso
+        """
+        pass
+
+
+class FunctionStage(Stage):
+    """etapa construida a partir de una función, para enchufar pasos sencillos"""
+
+    def __init__(self, name: str, func: Callable[[PipelineItem], None], handles_errors: bool = False,
+                 workers: int = 1):
+        """
+        inicializa la etapa
+
+        Args:
+            name: nombre de la etapa
+            func: función que recibe el PipelineItem
+            handles_errors: recibir también los documentos fallidos
+            workers: hilos de la etapa en run_many
+        """
+        self.name = name
+        self.func = func
+        self.handles_errors = handles_errors
+        self.workers = max(1, workers)
+
+    def process(self, item: PipelineItem) -> None:
+        self.func(item)
+
+
+class Pipeline:
+    """
+    secuencia de etapas cronometradas
+    """
+
+    def __init__(self, stages: Sequence[Stage], queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        inicializa el pipeline
+
+        Args:
+            stages: etapas en orden
+            queue_size: documentos que puede adelantar cada etapa en run_many
+
+        Raises:
+            ValueError: si hay etapas con el mismo nombre
+        """
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate pipeline stages: {', '.join(names)}")
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+
+    @property
+    def names(self) -> List[str]:
+        """nombres de las etapas en orden"""
+        return [stage.name for stage in self.stages]
+
+    def replace(self, stage: Stage) -> 'Pipeline':
+        """
+        devuelve un pipeline con la etapa del mismo nombre sustituida
+
+        Raises:
+            ValueError: si no hay ninguna etapa con ese nombre
+        """
+        if stage.name not in self.names:
+            raise ValueError(f"Unknown pipeline stage: {stage.name}")
+        return Pipeline([stage if current.name == stage.name else current for current in self.stages],
+                        self.queue_size)
+
+    def _run_stage(self, stage: Stage, item: PipelineItem) -> None:
+        """ejecuta una etapa sobre el documento y anota su tiempo"""
+        started = time.monotonic()
+        try:
+            stage.process(item)
+        finally:
+            item.timings[stage.name] = item.timings.get(stage.name, 0.0) + time.monotonic() - started
+
+    def run(self, item: PipelineItem, raise_errors: bool = True) -> PipelineItem:
+        """
+        recorre las etapas en orden para un documento
+
+        Args:
+            item: documento
+            raise_errors: relanzar el error de la etapa que falló; si no, queda en item.error
+
+        Returns:
+            el mismo documento, con sus tiempos
+
+        Raises:
+            Exception: el error de la etapa que falló, tras pasar por las
+                etapas con handles_errors
+        """
+        for stage in self.stages:
+            if item.error is not None and not stage.handles_errors:
+                continue
+            try:
+                self._run_stage(stage, item)
+            except Exception as e:
+                item.error = e
+        if item.error is not None and raise_errors:
+            raise item.error
+        return item
+
+    def run_many(self, items: Iterable[PipelineItem]) -> Iterator[PipelineItem]:
+        """
+        procesa varios documentos con hilos por etapa y colas acotadas
+
+        cada etapa trabaja sobre un documento mientras la anterior prepara el
+        siguiente; una etapa lenta llena su cola de entrada y frena a las
+        anteriores. los errores no detienen el resto: quedan en item.error
+
+        Returns:
+            iterador con los documentos en el orden de entrada
+        """
+        queues: List['queue.Queue[Any]'] = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+
+        def feed() -> None:
+            try:
+                for entry in enumerate(items):
+                    queues[0].put(entry)
+            finally:
+                queues[0].put(_DONE)
+
+        def work(stage: Stage, inbox: 'queue.Queue[Any]', outbox: 'queue.Queue[Any]', running: List[int],
+                 lock: threading.Lock) -> None:
+            while True:
+                entry = inbox.get()
+                if entry is _DONE:
+                    # el fin es para todos los hilos de la etapa; el último lo pasa a la siguiente
+                    inbox.put(_DONE)
+                    with lock:
+                        running[0] -= 1
+                        last = running[0] == 0
+                    if last:
+                        outbox.put(_DONE)
+                    return
+                item = entry[1]
+                if item.error is None or stage.handles_errors:
+                    try:
+                        self._run_stage(stage, item)
+                    except Exception as e:
+                        item.error = e
+                outbox.put(entry)
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for i, stage in enumerate(self.stages):
+            running, lock = [stage.workers], threading.Lock()
+            threads.extend(
+                threading.Thread(target=work, args=(stage, queues[i], queues[i + 1], running, lock), daemon=True)
+                for _ in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+
+        # con varios hilos por etapa los documentos pueden adelantarse: se reordenan
+        pending: Dict[int, PipelineItem] = {}
+        next_index = 0
+        while True:
+            entry = queues[-1].get()
+            if entry is _DONE:
+                break
+            pending[entry[0]] = entry[1]
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+
+        for thread in threads:
+            thread.join()
+
+
+def summarize_timings(items: Iterable[PipelineItem], wall_seconds: float) -> Dict[str, Any]:
+    """
+    resume los tiempos de un lote
+
+    Args:
+        items: documentos procesados
+        wall_seconds: tiempo real del lote
+
+    Returns:
+        diccionario con los segundos por etapa, el tiempo real y el solape
+        (suma de los tiempos de las etapas entre el tiempo real; 1.0 es
+        secuencial y valores mayores indican trabajo en paralelo)
+    """
+    stages: Dict[str, float] = {}
+    for item in items:
+        for name, seconds in item.timings.items():
+            stages[name] = stages.get(name, 0.0) + seconds
+    busy = sum(stages.values())
+    return {
+        'stages': {name: round(seconds, 4) for name, seconds in stages.items()},
+        'wall_seconds': round(wall_seconds, 4),
+        'overlap': round(busy / wall_seconds, 2) if wall_seconds > 0 else 1.0
+    }
@@ -0,0 +1,123 @@
+"""
+pool de instancias de conversor para conversiones concurrentes
+
+markitdown no garantiza ser seguro entre hilos, así que cada conversión
+en curso recibe su propia instancia; el pool crece de forma perezosa hasta
+un máximo y reporta su utilización
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class ConverterPool:
+    """
+    pool acotado de conversores que entrega una instancia por conversión
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_size: int, acquire_timeout: Optional[float] = None):
+        """
+        inicializa el pool vacío
+
+        Args:
+            factory: función que crea una nueva instancia de conversor
+            max_size: número máximo de instancias
+            acquire_timeout: segundos máximos de espera por una instancia (None = sin límite)
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self._factory = factory
+        self._max_size = max_size
+        self._acquire_timeout = acquire_timeout
+        self._idle: List[Any] = []
+        self._size = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._acquisitions = 0
+        self._waits = 0
+        self._condition = threading.Condition()
+
+    @property
+    def max_size(self) -> int:
+        """número máximo de instancias"""
+        return self._max_size
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        presta una instancia en exclusiva durante el bloque with
+
+        Args:
+            timeout: segundos máximos de espera (por defecto el del pool)
+
+        Raises:
+            TimeoutError: si no queda ninguna instancia libre a tiempo
+        """
+        converter = self._checkout(self._acquire_timeout if timeout is None else timeout)
+        try:
+            yield converter
+        finally:
+            self._checkin(converter)
+
+    def _checkout(self, timeout: Optional[float]) -> Any:
+        """saca una instancia libre o reserva hueco para crear una nueva"""
+        with self._condition:
+            waited = False
+            while not self._idle and self._size >= self._max_size:
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                if not self._condition.wait(timeout):
+                    raise TimeoutError(f"No converter available after {timeout}s (pool size {self._max_size})")
+
+            self._acquisitions += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+            if self._idle:
+                return self._idle.pop()
+
+            # reservar el hueco y crear la instancia fuera del lock
+            self._size += 1
+
+        try:
+            return self._factory()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+    def _checkin(self, converter: Any) -> None:
+        """devuelve una instancia al pool"""
+        with self._condition:
+            self._in_use -= 1
+            self._idle.append(converter)
+            self._condition.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        obtiene las métricas de utilización del pool
+
+        Returns:
+            diccionario con tamaño, uso actual, pico y esperas
+        """
+        with self._condition:
+            return {
+                'max_size': self._max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'peak_in_use': self._peak_in_use,
+                'acquisitions': self._acquisitions,
+                'waits': self._waits,
+                'utilization': round(self._in_use / self._max_size, 3)
+            }
+
+
+def default_pool_size() -> int:
+    """tamaño por defecto del pool según las cpus disponibles"""
+    return max(2, os.cpu_count() or 1)
@@ -0,0 +1,197 @@
+"""
+post-procesado del markdown convertido en una sola pasada lineal
+
+cada paso es opcional; todos se aplican línea a línea en el mismo recorrido
+para no multiplicar el coste sobre salidas grandes
+"""
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+STEP_COLLAPSE_BLANK_LINES = 'collapse_blank_lines'
+STEP_TRIM_TRAILING_WHITESPACE = 'trim_trailing_whitespace'
+STEP_COMPACT_TABLES = 'compact_tables'
+STEP_NORMALIZE_UNICODE = 'normalize_unicode'
+STEP_DROP_EMPTY_SECTIONS = 'drop_empty_sections'
+
+POSTPROCESS_STEPS = (
+    STEP_COLLAPSE_BLANK_LINES,
+    STEP_TRIM_TRAILING_WHITESPACE,
+    STEP_COMPACT_TABLES,
+    STEP_NORMALIZE_UNICODE,
+    STEP_DROP_EMPTY_SECTIONS,
+)
+
+_HEADING_RE = re.compile(r'^(#{1,6})(\s|$)')
+_TABLE_SEPARATOR_CELL_RE = re.compile(r'^(:?)-+(:?)$')
+_CELL_SPLIT_RE = re.compile(r'(?<!\\)\|')
+# salto de página de pdfminer: lo usa el índice de secciones, no es un blanco
+_PAGE_BREAK = '\f'
+
+
+def _is_blank(line: str) -> bool:
+    """línea en blanco que puede colapsarse (los saltos de página se conservan)"""
+    return not line.strip() and _PAGE_BREAK not in line
+
+
+def resolve_steps(option: Union[None, bool, str, Iterable[str]]) -> Tuple[str, ...]:
+    """
+    interpreta la opción de post-procesado
+
+    Args:
+        option: True/'all' para todos los pasos, False/None/'' para ninguno,
+            o una lista (o string separado por comas) de pasos
+
+    Returns:
+        tupla con los pasos a aplicar en orden canónico
+
+    Raises:
+        ValueError: si algún paso no existe
+    """
+    if option is None or option is False:
+        return ()
+    if option is True:
+        return POSTPROCESS_STEPS
+
+    if isinstance(option, str):
+        option = option.strip()
+        if option.lower() in ('all', 'true'):
+            return POSTPROCESS_STEPS
+        if option.lower() in ('', 'none', 'false'):
+            return ()
+        requested = [step.strip() for step in option.split(',') if step.strip()]
+    else:
+        requested = list(option)
+
+    unknown = [step for step in requested if step not in POSTPROCESS_STEPS]
+    if unknown:
+        raise ValueError(f"Unknown postprocess steps: {', '.join(map(str, unknown))}")
+
+    return tuple(step for step in POSTPROCESS_STEPS if step in requested)
+
+
+def _compact_table_row(line: str) -> str:
+    """quita el relleno de las celdas de una fila de tabla"""
+    stripped = line.strip()
+    inner = stripped[1:-1] if stripped.endswith('|') and len(stripped) > 1 else stripped[1:]
+    cells = [cell.strip() for cell in _CELL_SPLIT_RE.split(inner)]
+
+    # fila separadora: reducir a --- conservando la alineación
+    if cells and all(_TABLE_SEPARATOR_CELL_RE.match(cell) for cell in cells):
+        cells = [
+            f"{match.group(1)}---{match.group(2)}"
+            for match in (_TABLE_SEPARATOR_CELL_RE.match(cell) for cell in cells)
+            if match
+        ]
+
+    return '| ' + ' | '.join(cells) + ' |'
+
+
+def postprocess_markdown(markdown: str, steps: Iterable[str]) -> Tuple[str, Dict[str, Any]]:
+    """
+    aplica los pasos de post-procesado en una única pasada por líneas
+
+    Args:
+        markdown: texto convertido
+        steps: pasos a aplicar (ver POSTPROCESS_STEPS)
+
+    Returns:
+        tupla (markdown procesado, estadísticas con los bytes ahorrados)
+    """
+    enabled = set(steps)
+    collapse = STEP_COLLAPSE_BLANK_LINES in enabled
+    trim = STEP_TRIM_TRAILING_WHITESPACE in enabled
+    compact = STEP_COMPACT_TABLES in enabled
+    normalize = STEP_NORMALIZE_UNICODE in enabled
+    drop_empty = STEP_DROP_EMPTY_SECTIONS in enabled
+
+    output: List[str] = []
+    # encabezados aún sin contenido: (nivel, líneas del encabezado y blancos previos)
+    pending: List[Tuple[int, List[str]]] = []
+    in_fence: Optional[str] = None
+    blank_run = 0
+
+    def emit(line: str) -> None:
+        nonlocal blank_run
+        if _is_blank(line):
+            blank_run += 1
+            # con collapse no se emiten blancos al inicio ni repetidos
+            if collapse and (blank_run > 1 or not output):
+                return
+        else:
+            blank_run = 0
+        output.append(line)
+
+    def flush_pending() -> None:
+        for _, lines in pending:
+            for pending_line in lines:
+                emit(pending_line)
+        pending.clear()
+
+    for line in markdown.split('\n'):
+        if normalize and not line.isascii():
+            line = unicodedata.normalize('NFC', line)
+        if trim:
+            # solo espacios y tabuladores: \f marca los saltos de página
+            line = line.rstrip(' \t')
+
+        stripped = line.lstrip()
+
+        # los bloques de código se copian sin tocar su estructura
+        fence = stripped[:3] if stripped[:3] in ('```', '~~~') else None
+        if in_fence is not None:
+            if fence == in_fence:
+                in_fence = None
+            output.append(line)
+            blank_run = 0
+            continue
+        if fence is not None:
+            flush_pending()
+            in_fence = fence
+            emit(line)
+            continue
+
+        if _is_blank(line):
+            if pending:
+                pending[-1][1].append(line)
+            else:
+                emit(line)
+            continue
+
+        heading = _HEADING_RE.match(stripped) if drop_empty else None
+        if heading:
+            level = len(heading.group(1))
+            # las secciones abiertas del mismo nivel o inferior quedaron vacías
+            while pending and pending[-1][0] >= level:
+                pending.pop()
+            pending.append((level, [line]))
+            continue
+
+        flush_pending()
+
+        if compact and stripped.startswith('|'):
+            line = _compact_table_row(line)
+
+        emit(line)
+
+    # encabezados sin contenido al final del documento
+    pending.clear()
+
+    # quitar blancos finales
+    if collapse:
+        while output and _is_blank(output[-1]):
+            output.pop()
+
+    result = '\n'.join(output)
+    if collapse and result and markdown.endswith('\n'):
+        result += '\n'
+
+    bytes_before = len(markdown.encode('utf-8'))
+    bytes_after = len(result.encode('utf-8'))
+
+    return result, {
+        'steps': [step for step in POSTPROCESS_STEPS if step in enabled],
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+        'bytes_saved': bytes_before - bytes_after
+    }
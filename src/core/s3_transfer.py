@@ -0,0 +1,261 @@
+"""
+transferencias grandes con s3 por partes en paralelo
+
+una sola petición get_object queda limitada por el ancho de banda de una
+conexión; los objetos grandes se descargan con peticiones por rangos
+concurrentes que escriben directamente en su posición de un buffer
+preasignado (un mmap anónimo o, por encima del umbral de volcado, un
+archivo en /tmp mapeado), sin trozos intermedios ni copias al unirlos.
+las salidas grandes se suben al revés: con una subida multipart que recibe
+el contenido por partes y las sube en paralelo mientras se codifica el resto
+"""
+import mmap
+import os
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from src.core.inputs import COPY_CHUNK_SIZE, ConversionInput, spool_threshold
+
+DEFAULT_RANGED_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_CONCURRENCY = 8
+
+# s3 exige al menos 5 mib en todas las partes salvo la última
+MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_MULTIPART_THRESHOLD = 16 * 1024 * 1024
+# caracteres que se codifican de una vez al escribir texto
+TEXT_CHUNK_CHARS = 1024 * 1024
+
+
+def _allocate(size: int, threshold: int, suffix: str) -> mmap.mmap:
+    """
+    reserva el buffer de destino: en memoria hasta el umbral y en /tmp por encima
+
+    el archivo se borra en cuanto está mapeado; el mmap lo mantiene vivo
+    """
+    if size <= threshold:
+        return mmap.mmap(-1, size)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        tmp.truncate(size)
+        path = tmp.name
+        try:
+            return mmap.mmap(tmp.fileno(), size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.unlink(path)
+
+
+def _read_into(body: Any, view: mmap.mmap, start: int, end: int) -> None:
+    """
+    copia el cuerpo de una respuesta en view[start:end] por bloques
+
+    Raises:
+        IOError: si el cuerpo no trae exactamente los bytes del rango
+    """
+    position = start
+    while position < end:
+        chunk = body.read(min(COPY_CHUNK_SIZE, end - position))
+        if not chunk:
+            break
+        view[position:position + len(chunk)] = chunk
+        position += len(chunk)
+    if position != end or body.read(1):
+        raise IOError(f"Ranged download returned an unexpected length for bytes {start}-{end - 1}")
+
+
+def download_ranged(
+    s3_client: Any,
+    bucket: str,
+    key: str,
+    size: int,
+    part_size: int = DEFAULT_PART_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    threshold: Optional[int] = None,
+    etag: Optional[str] = None
+) -> Tuple[ConversionInput, Dict[str, Any]]:
+    """
+    descarga un objeto con peticiones por rangos concurrentes
+
+    todas las partes se piden con IfMatch (el etag del evento o, sin él, el
+    de la primera parte) y el tamaño total de Content-Range debe ser el
+    esperado, de modo que una sobrescritura antes o durante la descarga
+    falla en lugar de truncar o mezclar versiones
+
+    Args:
+        s3_client: cliente s3
+        bucket: bucket del objeto
+        key: key del objeto
+        size: tamaño del objeto en bytes
+        part_size: bytes por petición
+        concurrency: peticiones simultáneas
+        threshold: tamaño a partir del cual el buffer va a /tmp (default: INPUT_SPOOL_THRESHOLD)
+        etag: etag esperado del objeto, p.ej. el del evento de s3
+
+    Returns:
+        tupla (ConversionInput sobre el mmap, respuesta de la primera parte
+        sin el cuerpo, con ETag y Metadata)
+
+    Raises:
+        ClientError: PreconditionFailed si el objeto ya no tiene el etag esperado
+        IOError: si el objeto no tiene el tamaño esperado
+    """
+    if threshold is None:
+        threshold = spool_threshold()
+    part_size = max(1, part_size)
+    view = _allocate(size, threshold, os.path.splitext(key)[1])
+
+    try:
+        first_end = min(size, part_size)
+        # s3 compara If-Match con el etag entre comillas; el del evento llega sin ellas
+        expected = {'IfMatch': etag if etag.startswith('"') else f'"{etag}"'} if etag else {}
+        response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{first_end - 1}", **expected)
+        total = (response.get('ContentRange') or '').rpartition('/')[2]
+        if total.isdigit() and int(total) != size:
+            raise IOError(f"Object size changed: expected {size} bytes, found {total}")
+        _read_into(response['Body'], view, 0, first_end)
+        etag = response.get('ETag') or etag
+
+        def fetch(start: int) -> None:
+            end = min(size, start + part_size)
+            kwargs = {'IfMatch': etag} if etag else {}
+            part = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end - 1}", **kwargs)
+            _read_into(part['Body'], view, start, end)
+
+        starts = range(first_end, size, part_size)
+        if starts:
+            with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(starts)))) as executor:
+                # list() propaga el primer error de cualquier parte
+                list(executor.map(fetch, starts))
+    except Exception:
+        view.close()
+        raise
+
+    return ConversionInput(view), {name: value for name, value in response.items() if name != 'Body'}
+
+
+class MultipartWriter:
+    """
+    subida multipart en streaming
+
+    write() acumula bytes hasta completar una parte y la sube en segundo
+    plano; como mucho hay concurrency partes en vuelo, así que la memoria
+    queda acotada a unas pocas partes aunque la salida sea enorme. close()
+    completa la subida y abort() la descarta
+    """
+
+    def __init__(self, s3_client: Any, bucket: str, key: str, part_size: int = DEFAULT_PART_SIZE,
+                 concurrency: int = DEFAULT_CONCURRENCY, **create_kwargs: Any):
+        """
+        inicia la subida multipart
+
+        Args:
+            s3_client: cliente s3
+            bucket: bucket de destino
+            key: key de destino
+            part_size: bytes por parte
+            concurrency: partes subiéndose a la vez
+            create_kwargs: argumentos de create_multipart_upload (ContentType, Metadata...)
+        """
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(1, part_size)
+        self.concurrency = max(1, concurrency)
+        self.upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=key, **create_kwargs)['UploadId']
+        self._buffer = bytearray()
+        self._parts: List['Future[Dict[str, Any]]'] = []
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+    def write(self, data: bytes) -> None:
+        """añade bytes y sube las partes que se completen"""
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._submit(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+
+    def write_text(self, text: str, encoding: str = 'utf-8') -> None:
+        """codifica y añade el texto por bloques, sin crear una copia codificada completa"""
+        for start in range(0, len(text), TEXT_CHUNK_CHARS):
+            self.write(text[start:start + TEXT_CHUNK_CHARS].encode(encoding))
+
+    def _submit(self, body: bytes) -> None:
+        """sube una parte en segundo plano, esperando si ya hay concurrency en vuelo"""
+        if len(self._parts) >= self.concurrency:
+            # propaga cuanto antes el error de una parte anterior
+            self._parts[-self.concurrency].result()
+        number = len(self._parts) + 1
+        self._parts.append(self._executor.submit(self._upload_part, number, body))
+
+    def _upload_part(self, number: int, body: bytes) -> Dict[str, Any]:
+        """sube una parte y devuelve su entrada para complete_multipart_upload"""
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=number,
+            Body=body
+        )
+        return {'PartNumber': number, 'ETag': response['ETag']}
+
+    def close(self) -> Dict[str, Any]:
+        """
+        sube lo pendiente y completa la subida
+
+        Returns:
+            respuesta de complete_multipart_upload (con ETag)
+        """
+        if self._buffer or not self._parts:
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+        try:
+            parts = [future.result() for future in self._parts]
+        finally:
+            self._executor.shutdown(wait=True)
+        return self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+
+    def abort(self) -> None:
+        """descarta la subida y las partes ya subidas"""
+        for future in self._parts:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+
+def upload_text(
+    s3_client: Any,
+    bucket: str,
+    key: str,
+    text: str,
+    part_size: int = DEFAULT_PART_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    compressor: Optional[Any] = None,
+    **create_kwargs: Any
+) -> Dict[str, Any]:
+    """
+    sube un texto grande con una subida multipart, abortándola si falla
+
+    con compressor (compress() y flush()) cada bloque se comprime al vuelo,
+    de modo que la compresión se solapa con la subida de las partes previas
+
+    Returns:
+        respuesta de complete_multipart_upload (con ETag)
+    """
+    writer = MultipartWriter(s3_client, bucket, key, part_size, concurrency, **create_kwargs)
+    try:
+        if compressor is None:
+            writer.write_text(text)
+        else:
+            for start in range(0, len(text), TEXT_CHUNK_CHARS):
+                writer.write(compressor.compress(text[start:start + TEXT_CHUNK_CHARS].encode('utf-8')))
+            writer.write(compressor.flush())
+        return writer.close()
+    except Exception:
+        try:
+            writer.abort()
+        except Exception as abort_error:
+            print(f"Error aborting multipart upload: {str(abort_error)}")
+        raise
@@ -0,0 +1,106 @@
+"""
+índice de secciones del markdown con offsets en bytes
+
+recorre la salida una sola vez y anota encabezados, páginas y tablas con su
+rango [start, end) en bytes utf-8, para que los lectores de salidas grandes
+puedan pedir una sola sección con un get por rango en lugar de descargar y
+recorrer el archivo entero
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.index.json'
+
+# pdfminer separa las páginas con un salto de página
+PAGE_BREAK = '\f'
+
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+
+
+def index_key(output_key: str) -> str:
+    """key del índice junto a la salida"""
+    return output_key + INDEX_SUFFIX
+
+
+def build_section_index(markdown: str) -> Dict[str, Any]:
+    """
+    construye el índice de encabezados, páginas y tablas
+
+    Args:
+        markdown: texto convertido
+
+    Returns:
+        diccionario con el tamaño total en bytes y las listas headings
+        (level, title, start, end), pages (page, start, end) y tables
+        (start, end, rows); end es exclusivo y una sección termina donde
+        empieza el siguiente encabezado de igual o mayor nivel
+    """
+    headings: List[Dict[str, Any]] = []
+    pages: List[Dict[str, Any]] = [{'page': 1, 'start': 0}]
+    tables: List[Dict[str, Any]] = []
+    open_headings: List[Dict[str, Any]] = []
+    table: Optional[Dict[str, Any]] = None
+    in_fence: Optional[str] = None
+    offset = 0
+
+    for line in markdown.split('\n'):
+        next_offset = offset + len(line.encode('utf-8')) + 1
+
+        if PAGE_BREAK in line:
+            for position, char in enumerate(line):
+                if char == PAGE_BREAK:
+                    page_start = offset + len(line[:position + 1].encode('utf-8'))
+                    pages[-1]['end'] = page_start
+                    pages.append({'page': len(pages) + 1, 'start': page_start})
+
+        stripped = line.strip()
+
+        # nada de lo que hay dentro de un bloque de código cuenta
+        fence = stripped[:3] if stripped[:3] in ('```', '~~~') else None
+        if in_fence is not None:
+            if fence == in_fence:
+                in_fence = None
+            offset = next_offset
+            continue
+
+        is_row = fence is None and stripped.startswith('|')
+        if table is not None and not is_row:
+            table['end'] = offset
+            tables.append(table)
+            table = None
+        if is_row:
+            if table is None:
+                table = {'start': offset, 'rows': 0}
+            table['rows'] += 1
+
+        if fence is not None:
+            in_fence = fence
+        else:
+            heading = _HEADING_RE.match(stripped)
+            if heading:
+                level = len(heading.group(1))
+                while open_headings and open_headings[-1]['level'] >= level:
+                    open_headings.pop()['end'] = offset
+                entry = {'level': level, 'title': heading.group(2), 'start': offset}
+                headings.append(entry)
+                open_headings.append(entry)
+
+        offset = next_offset
+
+    total = len(markdown.encode('utf-8'))
+    if table is not None:
+        table['end'] = total
+        tables.append(table)
+    for entry in open_headings:
+        entry['end'] = total
+    pages[-1]['end'] = total
+
+    return {
+        'version': INDEX_VERSION,
+        'bytes': total,
+        'headings': headings,
+        'pages': pages,
+        # una fila suelta que empieza por | no es una tabla
+        'tables': [entry for entry in tables if entry['rows'] > 1]
+    }
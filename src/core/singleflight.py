@@ -0,0 +1,118 @@
+"""
+coalescencia de llamadas idénticas concurrentes (single-flight)
+
+la primera llamada con una key ejecuta la función; las que llegan mientras
+sigue en curso esperan el mismo future y comparten su resultado. el estado
+es por proceso: tras un fork el hijo empieza con el mapa vacío y un lock
+nuevo, así que también es seguro con backends de procesos
+"""
+import copy
+import os
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class SingleFlight:
+    """
+    deduplica ejecuciones concurrentes por key
+    """
+
+    def __init__(self):
+        """
+        inicializa el registro de llamadas en curso
+        """
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            instance_ref = weakref.ref(self)
+
+            def reset_in_child() -> None:
+                instance = instance_ref()
+                if instance is not None:
+                    instance._reset()
+
+            os.register_at_fork(after_in_child=reset_in_child)
+
+    def _reset(self) -> None:
+        """reinicia el estado (también en procesos hijos tras un fork)"""
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def do(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, bool]:
+        """
+        ejecuta fn una sola vez para todas las llamadas concurrentes con la misma key
+
+        Args:
+            key: identificador de la llamada (p.ej. hash del contenido)
+            fn: función a ejecutar
+            *args, **kwargs: argumentos para fn
+
+        Returns:
+            tupla (resultado de fn, True si se compartió el de otra llamada);
+            el líder recibe el resultado y cada llamada coalescida una copia
+            de otra copia privada, que nadie modifica tras publicarla
+
+        Raises:
+            la excepción lanzada por fn, en el líder y en todos los que esperan
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                self._leaders += 1
+                leader = True
+
+        if not leader:
+            # copia para que nadie modifique el resultado que comparten los demás
+            return copy.deepcopy(future.result()), True
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            # el líder puede modificar su resultado mientras los demás aún lo copian
+            future.set_result(copy.deepcopy(result))
+            return result, False
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        obtiene las métricas de coalescencia
+
+        Returns:
+            diccionario con llamadas en curso, líderes y coalescidas
+        """
+        with self._lock:
+            return {
+                'in_flight': len(self._in_flight),
+                'leaders': self._leaders,
+                'coalesced': self._coalesced
+            }
+
+
+# instancia global
+_singleflight: Optional[SingleFlight] = None
+
+
+def get_singleflight() -> SingleFlight:
+    """
+    obtiene la instancia global de coalescencia
+
+    Returns:
+        SingleFlight: instancia compartida por el proceso
+    """
+    global _singleflight
+    if _singleflight is None:
+        _singleflight = SingleFlight()
+    return _singleflight
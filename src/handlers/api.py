@@ -1,11 +1,28 @@
 import json
-import base64
+import mmap
+import os
 from typing import Any, Dict, Optional
 from src.handlers.base import EventHandler
 from src.core.auth import validate_api_key
+from src.core.chunking import resolve_chunk_target
+from src.core.config import get_config, get_config_bool, get_config_int
 from src.core.converters import convert_to_markdown
+from src.core.cost_model import conversion_features, get_cost_model
+from src.core.deadline import deadline_from_context
+from src.core.exceptions import ConversionError
+from src.core.formats import resolve_formats
+from src.core.images import IMAGE_POLICIES
+from src.core.inputs import ConversionInput, InputBuffer, open_binary, parse_spilled_body
+from src.core.postprocess import resolve_steps
+from src.core.dependencies import get_dependency
 from src.core.responses import ResponseBuilder
-from src.utils.utils import is_api_gateway_event
+from src.handlers.s3 import OPTIONS_METADATA, output_key_for
+from src.utils.utils import get_content_hash, is_api_gateway_event
+
+# api gateway corta a los 29 segundos; margen para subir la respuesta
+DEFAULT_API_TIME_BUDGET_SECONDS = 25
+ROUTING_ACTION_ASYNC = 'async'
+ASYNC_INPUT_PREFIX = 'input/async/'
 
 
 class ApiHandler(EventHandler):
@@ -37,11 +54,11 @@ class ApiHandler(EventHandler):
         maneja el evento según su tipo
         """
         if is_api_gateway_event(event):
-            return self._handle_api_gateway(event)
+            return self._handle_api_gateway(event, context)
         else:
-            return self._handle_direct_invocation(event)
+            return self._handle_direct_invocation(event, context)
 
-    def _handle_api_gateway(self, event: Dict[str, Any]) -> Dict[str, Any]:
+    def _handle_api_gateway(self, event: Dict[str, Any], context: Optional[Any] = None) -> Dict[str, Any]:
         """procesa requests de api gateway"""
         # headers por defecto para API Gateway
         api_headers = {
@@ -69,39 +86,77 @@ class ApiHandler(EventHandler):
                     headers=api_headers
                 )
 
-            # decodificar base64 si es necesario
-            if event.get('isBase64Encoded'):
-                body = base64.b64decode(body)
-
-            # parsear json
-            try:
-                data = json.loads(body)
-            except (json.JSONDecodeError, TypeError):
-                # si no es json, asumir que es contenido directo
-                data = {'content': body}
-
-            # validar entrada
-            if 'content' not in data:
-                return ResponseBuilder.error(
-                    message='Missing content in request',
-                    status_code=400,
-                    headers=api_headers
-                )
+            # el contenido binario se decodifica una sola vez en el buffer de entrada:
+            # en memoria si es pequeño, volcado a /tmp y mapeado si no
+            with InputBuffer() as body_buffer, InputBuffer() as content_buffer:
+                if event.get('isBase64Encoded'):
+                    body_buffer.write_base64(body)
+                    body = body_buffer.getvalue()
 
-            content = data['content']
-            filename = data.get('filename')
+                # parsear json
+                data: Dict[str, Any]
+                if isinstance(body, ConversionInput):
+                    data = parse_spilled_body(body)
+                else:
+                    try:
+                        data = json.loads(body)
+                    except (json.JSONDecodeError, UnicodeDecodeError, TypeError):
+                        # si no es json, asumir que es contenido directo
+                        data = {'content': body}
 
-            # si el contenido viene en base64
-            if data.get('base64'):
-                content = base64.b64decode(content)
+                # validar entrada
+                if not isinstance(data, dict) or 'content' not in data:
+                    return ResponseBuilder.error(
+                        message='Missing content in request',
+                        status_code=400,
+                        headers=api_headers
+                    )
 
-            result = convert_to_markdown(content, filename)
+                content = data['content']
+                filename = data.get('filename')
+
+                # validar opciones de conversión
+                try:
+                    options = self._conversion_options(data)
+                except ValueError as e:
+                    return ResponseBuilder.error(
+                        message=str(e),
+                        status_code=400,
+                        headers=api_headers
+                    )
+
+                # si el contenido viene en base64
+                if data.get('base64'):
+                    content_buffer.write_base64(content)
+                    content = content_buffer.getvalue()
+
+                # las conversiones que no llegarían a tiempo no gastan cpu aquí
+                cost: Dict[str, Any] = {}
+                features = self._cost_features(content, filename, options)
+                if features is not None:
+                    routed = self._route_by_cost(content, filename, options, features, api_headers)
+                    if routed is not None:
+                        return routed
+                    # la conversión mide su coste con las mismas características, sin volver a inspeccionar
+                    cost['features'] = features
+
+                result = convert_to_markdown(content, filename, **options, **cost, **self._deadline_option(context))
 
             return ResponseBuilder.success(
                 data=result,
                 headers=api_headers
             )
 
+        except ConversionError as e:
+            print(f"Conversion rejected in API handler: {str(e)}")
+            return ResponseBuilder.error(
+                message=str(e),
+                status_code=e.status_code,
+                error_type=e.error_type,
+                details=e.details,
+                headers=api_headers
+            )
+
         except Exception as e:
             print(f"Error in API handler: {str(e)}")
             return ResponseBuilder.error(
@@ -111,7 +166,7 @@ class ApiHandler(EventHandler):
                 headers=api_headers
             )
 
-    def _handle_direct_invocation(self, event: Dict[str, Any]) -> Dict[str, Any]:
+    def _handle_direct_invocation(self, event: Dict[str, Any], context: Optional[Any] = None) -> Dict[str, Any]:
         """procesa invocaciones directas lambda"""
         # validar estructura del evento
         if not isinstance(event, dict) or 'content' not in event:
@@ -119,12 +174,138 @@ class ApiHandler(EventHandler):
 
         content = event['content']
         filename = event.get('filename')
+        options = self._conversion_options(event)
+
+        with InputBuffer() as buffer:
+            # decodificar base64 si es necesario
+            if event.get('base64'):
+                buffer.write_base64(content)
+                content = buffer.getvalue()
+
+            return convert_to_markdown(content, filename, **options, **self._deadline_option(context))
+
+    def _conversion_options(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        extrae y valida las opciones de conversión presentes en el request
+
+        Raises:
+            ValueError: si alguna opción no es válida
+        """
+        options: Dict[str, Any] = {}
+
+        image_policy = data.get('image_policy')
+        if image_policy is not None:
+            if image_policy not in IMAGE_POLICIES:
+                raise ValueError(f"Invalid image_policy, expected one of: {', '.join(IMAGE_POLICIES)}")
+            options['image_policy'] = image_policy
 
-        # decodificar base64 si es necesario
-        if event.get('base64'):
-            content = base64.b64decode(content)
+        if 'postprocess' in data:
+            resolve_steps(data['postprocess'])
+            options['postprocess'] = data['postprocess']
 
-        return convert_to_markdown(content, filename)
+        if 'index' in data:
+            if not isinstance(data['index'], bool):
+                raise ValueError("Invalid index, expected a boolean")
+            options['index'] = data['index']
+
+        if 'chunking' in data:
+            resolve_chunk_target(data['chunking'])
+            options['chunking'] = data['chunking']
+
+        if 'formats' in data:
+            resolve_formats(data['formats'])
+            options['formats'] = data['formats']
+
+        return options
+
+    def _cost_features(
+        self,
+        content: Any,
+        filename: Optional[str],
+        options: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        características de coste del documento, si el modelo de coste está activo
+
+        Returns:
+            diccionario de conversion_features o None con COST_MODEL desactivado
+        """
+        if not get_config_bool('COST_MODEL', False):
+            return None
+        if isinstance(content, ConversionInput):
+            content = content.data
+        return conversion_features(content, filename, options.get('image_policy'))
+
+    def _route_by_cost(
+        self,
+        content: Any,
+        filename: Optional[str],
+        options: Dict[str, Any],
+        features: Dict[str, Any],
+        headers: Dict[str, str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        desvía a s3 las conversiones que el modelo de coste predice claramente
+        por encima del plazo del api gateway
+
+        Returns:
+            respuesta 202 con las keys de entrada y salida, o None para convertir aquí
+
+        Raises:
+            ConversionError: si excede el plazo y no se puede desviar
+        """
+        if isinstance(content, ConversionInput):
+            content = content.data
+
+        prediction = get_cost_model().predict(features)
+        budget = get_config_int('API_TIME_BUDGET_SECONDS', DEFAULT_API_TIME_BUDGET_SECONDS)
+        if prediction is None or prediction['lower_bound'] <= budget:
+            return None
+
+        details = {
+            'estimated_seconds': prediction['seconds'],
+            'budget_seconds': budget,
+            'model': prediction['model']
+        }
+        bucket = get_dependency('bucket_name')
+        if get_config('COST_ROUTING_ACTION', ROUTING_ACTION_ASYNC) != ROUTING_ACTION_ASYNC or not bucket:
+            raise ConversionError(
+                'Conversion is predicted to exceed the API time budget',
+                error_type='estimated_timeout',
+                status_code=413,
+                details=details
+            )
+
+        # el evento de s3 sobre input/ hace la conversión con las mismas opciones
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        name = os.path.basename(filename or '') or 'document'
+        input_key = f"{ASYNC_INPUT_PREFIX}{get_content_hash(content)[:16]}/{name}"
+        get_dependency('s3_client').put_object(
+            Bucket=bucket,
+            Key=input_key,
+            Body=open_binary(content) if isinstance(content, mmap.mmap) else content,
+            Metadata={OPTIONS_METADATA: json.dumps(options)}
+        )
+        print(f"Routed to background conversion: s3://{bucket}/{input_key}")
+
+        return ResponseBuilder.success(
+            data=dict(
+                details,
+                status='accepted',
+                input=f"s3://{bucket}/{input_key}",
+                output=f"s3://{bucket}/{output_key_for(input_key)}"
+            ),
+            status_code=202,
+            headers=headers
+        )
+
+    def _deadline_option(self, context: Optional[Any]) -> Dict[str, Any]:
+        """
+        plazo de la invocación para entregar resultados parciales, si está activado
+        """
+        deadline = deadline_from_context(context)
+        return {'deadline': deadline} if deadline is not None else {}
 
 
 # mantener compatibilidad con imports existentes
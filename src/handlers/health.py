@@ -5,6 +5,9 @@ from typing import Any, Dict
 from src.handlers.base import EventHandler
 from src.core.responses import ResponseBuilder
 from src.core.config import get_config
+from src.core.converters import get_converter_pool
+from src.core.failure_cache import get_negative_cache
+from src.core.singleflight import get_singleflight
 
 
 class HealthHandler(EventHandler):
@@ -33,7 +36,10 @@ class HealthHandler(EventHandler):
             'version': get_config('APP_VERSION', '1.0.0'),
             'region': get_config('AWS_REGION', 'unknown'),
             'runtime': get_config('AWS_EXECUTION_ENV', 'unknown'),
-            'bucket': get_config('INPUT_BUCKET', 'not-configured')
+            'bucket': get_config('INPUT_BUCKET', 'not-configured'),
+            'converter_pool': get_converter_pool().stats(),
+            'coalescing': get_singleflight().stats(),
+            'negative_cache': get_negative_cache().stats()
         }
 
         # agregar información del contexto si está disponible
@@ -0,0 +1,108 @@
+"""
+handler de inspección: metadatos y estimación de coste sin convertir
+"""
+import json
+from typing import Any, Dict, Optional
+from src.handlers.base import EventHandler
+from src.core.auth import validate_api_key
+from src.core.config import get_config_bool
+from src.core.cost_model import features_from_inspection, get_cost_model
+from src.core.exceptions import ConversionError
+from src.core.inputs import ConversionInput, InputBuffer, parse_spilled_body
+from src.core.inspection import inspect_document
+from src.core.responses import ResponseBuilder
+
+
+class InspectHandler(EventHandler):
+    """
+    maneja POST /inspect: formato, páginas, cifrado, imágenes y tiempo estimado
+    """
+
+    def can_handle(self, event: Dict[str, Any]) -> bool:
+        """
+        verifica si es un post http en /inspect (api gateway v1 o v2)
+        """
+        if not isinstance(event, dict):
+            return False
+        method = event.get('requestContext', {}).get('http', {}).get('method') or event.get('httpMethod')
+        path = event.get('rawPath') or event.get('path')
+        return method == 'POST' and path == '/inspect'
+
+    def handle(self, event: Dict[str, Any], context: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        inspecciona el documento del body sin convertirlo
+        """
+        headers = {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type,Authorization,X-API-Key',
+            'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
+        }
+
+        if not validate_api_key(event):
+            return ResponseBuilder.error(message='Unauthorized', status_code=401, headers=headers)
+
+        body = event.get('body', '')
+        if not body:
+            return ResponseBuilder.error(message='Missing request body', status_code=400, headers=headers)
+
+        try:
+            # el contenido binario se decodifica una sola vez en el buffer de entrada:
+            # en memoria si es pequeño, volcado a /tmp y mapeado si no
+            with InputBuffer() as body_buffer, InputBuffer() as content_buffer:
+                if event.get('isBase64Encoded'):
+                    body_buffer.write_base64(body)
+                    body = body_buffer.getvalue()
+
+                data: Dict[str, Any]
+                if isinstance(body, ConversionInput):
+                    data = parse_spilled_body(body)
+                else:
+                    try:
+                        data = json.loads(body)
+                    except (json.JSONDecodeError, UnicodeDecodeError, TypeError):
+                        data = {'content': body}
+
+                if not isinstance(data, dict) or 'content' not in data:
+                    return ResponseBuilder.error(message='Missing content in request', status_code=400,
+                                                 headers=headers)
+
+                content = data['content']
+                if data.get('base64'):
+                    content_buffer.write_base64(content)
+                    content = content_buffer.getvalue()
+                if isinstance(content, ConversionInput):
+                    content = content.data
+                if isinstance(content, str):
+                    content = content.encode('utf-8')
+
+                info = inspect_document(content, data.get('filename'))
+            info['estimate_source'] = 'heuristic'
+
+            # con suficientes conversiones medidas, la estimación sale del modelo aprendido
+            if get_config_bool('COST_MODEL', False):
+                prediction = get_cost_model().predict(features_from_inspection(info, data.get('image_policy')))
+                if prediction is not None:
+                    info['estimated_seconds'] = prediction['seconds']
+                    info['estimated_peak_memory_mb'] = prediction['peak_memory_mb']
+                    info['estimate_source'] = 'model'
+
+            return ResponseBuilder.success(data=info, headers=headers)
+
+        except ConversionError as e:
+            return ResponseBuilder.error(
+                message=str(e),
+                status_code=e.status_code,
+                error_type=e.error_type,
+                details=e.details,
+                headers=headers
+            )
+
+        except Exception as e:
+            print(f"Error in inspect handler: {str(e)}")
+            return ResponseBuilder.error(
+                message='Internal server error',
+                status_code=500,
+                details={'error': str(e)},
+                headers=headers
+            )
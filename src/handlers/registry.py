@@ -134,9 +134,11 @@ def auto_register_handlers():
         from src.handlers.api import ApiHandler
         from src.handlers.s3 import S3Handler
         from src.handlers.health import HealthHandler
+        from src.handlers.inspect import InspectHandler
 
         # registrar con prioridades
         register_handler(HealthHandler, priority=15)  # health check tiene mayor prioridad
+        register_handler(InspectHandler, priority=12)  # /inspect antes que el api genérico
         register_handler(S3Handler, priority=10)     # s3 es segundo
         register_handler(ApiHandler, priority=5)      # api gateway es tercero
 
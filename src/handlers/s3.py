@@ -1,11 +1,76 @@
 import json
 import os
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import unquote
+from botocore.exceptions import ClientError
 from src.handlers.base import EventHandler
-from src.core.converters import convert_to_markdown
+from src.core.chunking import chunks_key
+from src.core.compression import DEFAULT_LEVELS, DEFAULT_MIN_SIZE, Compressor, compress, summarize_compression
+from src.core.config import get_config, get_config_bool, get_config_int
+from src.core.content_index import DEFAULT_INDEX_PREFIX, S3ContentIndex, content_key
+from src.core.converters import attach_outputs, convert_to_markdown, resolve_options
+from src.core.deadline import Deadline, deadline_from_context
+from src.core.exceptions import ConversionError
+from src.core.formats import FORMAT_SUFFIXES
+from src.core.inputs import ConversionInput, InputBuffer
+from src.core.pipeline import FunctionStage, Pipeline, PipelineItem, summarize_timings
+from src.core.incremental import append_tail, build_state, is_incremental_format, state_key, tail_start
 from src.core.responses import ResponseBuilder
-from src.utils.utils import get_current_timestamp, is_s3_event
+from src.core.s3_transfer import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MULTIPART_THRESHOLD,
+    DEFAULT_PART_SIZE,
+    DEFAULT_RANGED_THRESHOLD,
+    MULTIPART_MIN_PART_SIZE,
+    download_ranged,
+    upload_text
+)
+from src.core.section_index import index_key
+from src.utils.utils import get_content_hash, get_current_timestamp, get_file_extension, is_s3_event
+
+# metadato con las opciones de conversión de un request desviado desde el api
+OPTIONS_METADATA = 'conversion-options'
+REQUEST_OPTIONS = ('image_policy', 'postprocess', 'index', 'chunking', 'formats')
+# metadatos de la salida con la versión del origen que se convirtió
+SOURCE_ETAG_METADATA = 'source-etag'
+SOURCE_VERSION_METADATA = 'source-version'
+# metadato de la salida con el identificador del contenido del que procede
+CONTENT_KEY_METADATA = 'content-key'
+
+
+# memoria por registro en paralelo: una conversión grande ronda unos cientos de mb
+MEMORY_PER_RECORD_WORKER_MB = 512
+MAX_DEFAULT_RECORD_WORKERS = 8
+
+
+def default_record_workers(context: Optional[Any] = None) -> int:
+    """
+    registros de un lote que se procesan en paralelo según la memoria de la función
+
+    Args:
+        context: contexto de lambda (memory_limit_in_mb), si no está
+            AWS_LAMBDA_FUNCTION_MEMORY_SIZE
+
+    Returns:
+        uno por cada MEMORY_PER_RECORD_WORKER_MB, entre 1 y MAX_DEFAULT_RECORD_WORKERS
+    """
+    memory_mb = getattr(context, 'memory_limit_in_mb', None) or os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE')
+    try:
+        memory_mb = int(memory_mb)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(MAX_DEFAULT_RECORD_WORKERS, memory_mb // MEMORY_PER_RECORD_WORKER_MB))
+
+
+def output_key_for(input_key: str) -> str:
+    """
+    genera la key de salida basada en la key de entrada
+    """
+    output_key = input_key.replace('input/', 'output/')
+    if not output_key.endswith('.md'):
+        output_key = os.path.splitext(output_key)[0] + '.md'
+    return output_key
 
 
 class S3Handler(EventHandler):
@@ -13,9 +78,12 @@ class S3Handler(EventHandler):
     maneja eventos de s3 para conversión de archivos
     """
 
-    def __init__(self, s3_client=None):
+    def __init__(self, s3_client=None, content_index=None):
         """
         inicializa el handler con cliente s3 opcional (dependency injection)
+
+        content_index es el almacén del índice de contenido convertido (con
+        get() y put()); por defecto, objetos json en el propio bucket
         """
         if s3_client is None:
             import boto3
@@ -23,6 +91,15 @@ class S3Handler(EventHandler):
             region = os.environ.get('AWS_DEFAULT_REGION') or os.environ.get('AWS_REGION', 'us-east-1')
             s3_client = boto3.client('s3', region_name=region)
         self.s3_client = s3_client
+        if content_index is None:
+            prefix = get_config('DEDUP_INDEX_PREFIX', DEFAULT_INDEX_PREFIX) or DEFAULT_INDEX_PREFIX
+            content_index = S3ContentIndex(s3_client, prefix)
+        self.content_index = content_index
+        self.pipeline = Pipeline([
+            FunctionStage('ingest', self._ingest),
+            FunctionStage('convert', self._convert),
+            FunctionStage('emit', self._emit, handles_errors=True)
+        ])
 
     def can_handle(self, event: Any) -> bool:
         """
@@ -33,21 +110,34 @@ class S3Handler(EventHandler):
     def handle(self, event: Dict[str, Any], context: Optional[Any] = None) -> Dict[str, Any]:
         """
         procesa eventos de s3
+
+        los lotes recorren un pipeline de tres etapas: la descarga adelanta los
+        objetos siguientes mientras se convierte y las salidas se suben en
+        segundo plano, de modo que la red queda oculta tras la conversión
         """
-        results = []
+        started = time.monotonic()
+        deadline = deadline_from_context(context)
+        items = [self._record_item(record, deadline) for record in event['Records']]
+
+        if len(items) == 1:
+            self.pipeline.run(items[0], raise_errors=False)
+        else:
+            workers = min(len(items), get_config_int('S3_RECORD_WORKERS', default_record_workers(context)))
+            items = list(self._batch_pipeline(workers).run_many(items))
 
-        for record in event['Records']:
-            result = self._process_record(record)
-            results.append(result)
+        results = [self._record_result(item) for item in items]
 
         # calcular resumen
         success_count = sum(1 for r in results if r.get('status') == 'success')
         error_count = sum(1 for r in results if r.get('status') == 'error')
+        skipped_count = sum(1 for r in results if r.get('status') == 'skipped')
         
         summary = {
             'total': len(results),
             'success': success_count,
-            'errors': error_count
+            'errors': error_count,
+            'skipped': skipped_count,
+            'pipeline': summarize_timings(items, time.monotonic() - started)
         }
         
         return ResponseBuilder.batch(
@@ -55,74 +145,557 @@ class S3Handler(EventHandler):
             summary=summary
         )
 
-    def _process_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+    def _batch_pipeline(self, workers: int) -> Pipeline:
+        """
+        pipeline de un lote: workers hilos por etapa y hasta workers objetos
+        descargados por delante de la conversión
+        """
+        return Pipeline([
+            FunctionStage('ingest', self._ingest, workers=workers),
+            FunctionStage('convert', self._convert, workers=workers),
+            FunctionStage('emit', self._emit, handles_errors=True, workers=workers)
+        ], queue_size=workers)
+
+    def _record_item(self, record: Dict[str, Any], deadline: Optional[Deadline] = None) -> PipelineItem:
         """
-        procesa un registro individual de s3
+        crea el documento del pipeline a partir de un registro de s3
         """
         # obtener información del archivo
         bucket = record['s3']['bucket']['name']
         key = unquote(record['s3']['object']['key'])
+        source = record['s3']['object']
+
+        return PipelineItem(
+            bucket=bucket,
+            key=key,
+            size=source.get('size'),
+            etag=(source.get('eTag') or '').strip('"'),
+            version=source.get('versionId') or '',
+            deadline=deadline
+        )
+
+    def _record_result(self, item: PipelineItem) -> Dict[str, Any]:
+        """
+        resultado de un registro para el resumen del lote, con los tiempos de sus etapas
+        """
+        processed = item['processed']
+        processed['timings'] = {name: round(seconds, 4) for name, seconds in item.timings.items()}
+        return processed
+
+    def _process_record(self, record: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        procesa un registro individual de s3 a través de las etapas
+        ingest (descarga), convert y emit (subida de salidas o del error)
+        """
+        item = self._record_item(record, deadline)
+        self.pipeline.run(item, raise_errors=False)
+        return self._record_result(item)
 
+    def _ingest(self, item: PipelineItem) -> None:
+        """
+        etapa ingest: descarga el objeto al buffer de entrada o, si solo ha
+        crecido, convierte directamente la cola nueva
+        """
+        bucket, key = item['bucket'], item['key']
         print(f"Processing file: s3://{bucket}/{key}")
 
+        item['output_key'] = self._generate_output_key(key)
+
+        # notificaciones repetidas o reintentos: la salida ya corresponde a este origen
+        if self._already_converted(bucket, item['output_key'], item['etag'], item['version']):
+            print(f"Skipping unchanged file: s3://{bucket}/{key}")
+            item['skipped'] = True
+            return
+
+        item['incremental'] = self._incremental_enabled(key)
+
+        # objetos que solo crecen: convertir únicamente la cola nueva
+        if item['incremental']:
+            appended = self._convert_tail(bucket, key, item['output_key'], item['size'])
+            if appended is not None:
+                item['result'], item['state'], item['options'] = appended
+                item['appended'] = True
+                return
+
+        # objetos grandes: rangos en paralelo directamente a un buffer preasignado
+        size = item['size']
+        if isinstance(size, int) and size > get_config_int('S3_RANGED_THRESHOLD', DEFAULT_RANGED_THRESHOLD):
+            item['source'], response = download_ranged(
+                self.s3_client, bucket, key, size,
+                part_size=get_config_int('S3_RANGED_PART_SIZE', DEFAULT_PART_SIZE),
+                concurrency=get_config_int('S3_RANGED_CONCURRENCY', DEFAULT_CONCURRENCY),
+                # la versión del evento: si el objeto cambió, falla en lugar de guardarla con el etag viejo
+                etag=item['etag'] or None
+            )
+            item['options'] = self._request_options(response)
+            item['etag'] = item['etag'] or (response.get('ETag') or '').strip('"')
+            return
+
+        # descargar archivo de s3; los objetos grandes se vuelcan a /tmp y llegan mapeados al conversor
+        response = self.s3_client.get_object(Bucket=bucket, Key=key)
+        buffer = InputBuffer(suffix=os.path.splitext(key)[1])
         try:
-            # descargar archivo de s3
-            response = self.s3_client.get_object(Bucket=bucket, Key=key)
-            content = response['Body'].read()
+            buffer.write_stream(response['Body'], response.get('ContentLength'))
+        except Exception:
+            buffer.close()
+            raise
+        # el ConversionInput se queda con el mmap, si lo hay, y lo libera en convert
+        item['source'] = ConversionInput.of(buffer.getvalue())
+        item['options'] = self._request_options(response)
+        item['etag'] = item['etag'] or (response.get('ETag') or '').strip('"')
+
+    def _convert(self, item: PipelineItem) -> None:
+        """
+        etapa convert: convierte el contenido descargado y lo libera
+
+        si los mismos bytes ya se convirtieron bajo otra key no se convierte:
+        emit copiará aquella salida
+        """
+        if 'result' in item or item.get('skipped'):
+            return
+
+        key = item['key']
+        with item['source'] as source:
+            if not item['incremental'] and get_config_bool('S3_DEDUP', False):
+                # las opciones efectivas: un cambio en los valores por defecto cambia la salida
+                item['content_key'] = content_key(get_content_hash(source.data), get_file_extension(key),
+                                                  resolve_options(**item['options']))
+                item['duplicate'] = self._find_duplicate(item['bucket'], item['content_key'], item['output_key'])
+                if item['duplicate'] is not None:
+                    return
 
             # convertir a markdown
-            result = convert_to_markdown(content, key)
+            result = convert_to_markdown(source, key, deadline=item['deadline'], **item['options'])
+            state = None
+            if item['incremental']:
+                state = build_state(source.data, result['markdown'], get_file_extension(key))
+        item['result'] = result
+        item['state'] = state
+
+    def _emit(self, item: PipelineItem) -> None:
+        """
+        etapa emit: guarda las salidas en s3 o, si algo falló, la información del error
+        """
+        if item.error is None:
+            try:
+                item['processed'] = self._save_outputs(item)
+                return
+            except Exception as e:
+                item.error = e
+
+        e = item.error
+        key = item['key']
+        print(f"Error processing {key}: {str(e)}")
+
+        # guardar información del error
+        self._save_error_info(item['bucket'], key, e)
+
+        failed: Dict[str, Any] = {
+            'source': key,
+            'status': 'error',
+            'error': str(e)
+        }
+        if isinstance(e, ConversionError):
+            failed['error_type'] = e.error_type
+        item['processed'] = failed
+
+    def _save_outputs(self, item: PipelineItem) -> Dict[str, Any]:
+        """
+        guarda el markdown y sus salidas derivadas
+
+        Returns:
+            resultado del registro para el resumen del lote
+        """
+        bucket, key = item['bucket'], item['key']
+        if item.get('skipped'):
+            return {'source': key, 'output': item['output_key'], 'status': 'skipped', 'reason': 'unchanged'}
+        if item.get('duplicate') is not None:
+            return self._copy_outputs(item)
+
+        output_key, result, state = item['output_key'], item['result'], item['state']
+
+        # el índice de secciones, los fragmentos y el estado incremental leen la salida por bytes: va sin comprimir
+        by_range = 'index' in result or 'chunks' in result or state is not None
+        compressors: Optional[List[Compressor]] = None if by_range else []
+
+        # guardar resultado en s3
+        etag = self._save_converted_file(bucket, output_key, result, item['etag'], item['version'],
+                                         item.get('content_key'), compressors)
+        base_key = os.path.splitext(output_key)[0]
+        siblings = [base_key + FORMAT_SUFFIXES[fmt] for fmt in result.get('outputs', {})]
+        if 'index' in result:
+            self._save_index(bucket, output_key, dict(result['index'], markdown_etag=etag))
+            siblings.append(index_key(output_key))
+        if 'chunks' in result:
+            self._save_chunks(bucket, output_key, result['chunks'])
+            siblings.append(chunks_key(output_key))
+        if state is not None:
+            self._save_state(bucket, output_key, dict(state, markdown_etag=etag))
+        if item.get('content_key') and not result.get('partial'):
+            self._index_output(bucket, item['content_key'], output_key, siblings)
 
-            # generar key de salida
-            output_key = self._generate_output_key(key)
+        print(f"Successfully converted {key} to {output_key}")
 
-            # guardar resultado en s3
-            self._save_converted_file(bucket, output_key, result)
+        processed: Dict[str, Any] = {
+            'source': key,
+            'output': output_key,
+            'status': 'success'
+        }
+        if compressors:
+            processed['compression'] = summarize_compression(compressors)
+        if item.get('appended'):
+            processed['incremental'] = True
+        if result.get('partial'):
+            # se agotó el plazo: la salida guardada cubre hasta resume
+            processed['partial'] = True
+            processed['resume'] = result['resume']
+        return processed
+
+    def _find_duplicate(self, bucket: str, key: str, output_key: str) -> Optional[Dict[str, Any]]:
+        """
+        busca en el índice una salida ya generada a partir del mismo contenido
 
-            print(f"Successfully converted {key} to {output_key}")
+        la salida indexada se comprueba con un head: si se sobrescribió con
+        otro contenido, quedó a medias o ya no existe, se convierte de nuevo
 
-            return {
-                'source': key,
+        Returns:
+            entrada del índice con los metadatos y el tipo de la salida, o None
+        """
+        try:
+            entry = self.content_index.get(bucket, key)
+            if entry is None or entry.get('output') in (None, output_key):
+                return None
+            response = self.s3_client.head_object(Bucket=bucket, Key=entry['output'])
+        except Exception as e:
+            # sin índice se convierte como siempre
+            print(f"Content index unavailable for {output_key}: {str(e)}")
+            return None
+        metadata = response.get('Metadata') or {}
+        if metadata.get(CONTENT_KEY_METADATA) != key or metadata.get('partial') == 'true':
+            return None
+        return dict(entry, metadata=metadata, content_type=response.get('ContentType') or 'text/markdown',
+                    content_encoding=response.get('ContentEncoding'))
+
+    def _index_output(self, bucket: str, key: str, output_key: str, siblings: List[str]) -> None:
+        """
+        registra la salida de un contenido en el índice
+        """
+        try:
+            self.content_index.put(bucket, key, {
                 'output': output_key,
-                'status': 'success'
-            }
+                'siblings': siblings,
+                'indexed_at': get_current_timestamp()
+            })
+        except Exception as save_error:
+            print(f"Error saving content index: {str(save_error)}")
+
+    def _copy_outputs(self, item: PipelineItem) -> Dict[str, Any]:
+        """
+        produce las salidas de un contenido ya convertido con copias en el
+        servidor, sin descargar ni volver a subir el markdown
+
+        Returns:
+            resultado del registro para el resumen del lote
+        """
+        bucket, key, output_key = item['bucket'], item['key'], item['output_key']
+        entry = item['duplicate']
+        source_key = entry['output']
+
+        # mismos metadatos que la salida original salvo la versión del origen, que es otro objeto
+        metadata = {name: value for name, value in entry['metadata'].items()
+                    if name not in (SOURCE_ETAG_METADATA, SOURCE_VERSION_METADATA)}
+        if item['etag']:
+            metadata[SOURCE_ETAG_METADATA] = item['etag']
+        if item['version']:
+            metadata[SOURCE_VERSION_METADATA] = item['version']
+        headers: Dict[str, Any] = {'ContentType': entry['content_type'], 'Metadata': metadata}
+        if entry.get('content_encoding'):
+            # con REPLACE la copia no conserva la compresión si no se repite
+            headers['ContentEncoding'] = entry['content_encoding']
+        response = self.s3_client.copy_object(
+            Bucket=bucket,
+            Key=output_key,
+            CopySource={'Bucket': bucket, 'Key': source_key},
+            MetadataDirective='REPLACE',
+            **headers
+        )
+        etag = (response.get('CopyObjectResult') or {}).get('ETag')
+
+        # salidas hermanas: misma key base con su sufijo
+        source_base, base_key = os.path.splitext(source_key)[0], os.path.splitext(output_key)[0]
+        for sibling in entry.get('siblings', []):
+            try:
+                if sibling == index_key(source_key):
+                    # el índice guarda el etag del markdown: se reescribe con el de la copia
+                    index = json.loads(self.s3_client.get_object(Bucket=bucket, Key=sibling)['Body'].read())
+                    self._save_index(bucket, output_key, dict(index, markdown_etag=etag))
+                else:
+                    self.s3_client.copy_object(
+                        Bucket=bucket,
+                        Key=base_key + sibling[len(source_base):],
+                        CopySource={'Bucket': bucket, 'Key': sibling}
+                    )
+            except Exception as copy_error:
+                print(f"Error copying {sibling}: {str(copy_error)}")
 
+        print(f"Copied {source_key} to {output_key} for duplicate content in {key}")
+        return {
+            'source': key,
+            'output': output_key,
+            'status': 'success',
+            'deduplicated': True,
+            'copied_from': source_key
+        }
+
+    def _request_options(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """opciones de conversión guardadas en los metadatos por el api al desviar un request"""
+        raw = (response.get('Metadata') or {}).get(OPTIONS_METADATA)
+        if not isinstance(raw, str):
+            return {}
+        try:
+            options = json.loads(raw)
+        except json.JSONDecodeError:
+            return {}
+        if not isinstance(options, dict):
+            return {}
+        return {name: value for name, value in options.items() if name in REQUEST_OPTIONS}
+
+    def _already_converted(self, bucket: str, output_key: str, etag: str, version: str) -> bool:
+        """
+        verifica con un head sobre la salida si ya se convirtió esta versión del origen
+
+        las salidas parciales no cuentan: hay que terminar la conversión
+        """
+        if not etag or not get_config_bool('S3_SKIP_UNCHANGED', True):
+            return False
+        try:
+            response = self.s3_client.head_object(Bucket=bucket, Key=output_key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in ('404', 'NoSuchKey', 'NotFound'):
+                print(f"Error checking existing output {output_key}: {str(e)}")
+            return False
         except Exception as e:
-            print(f"Error processing {key}: {str(e)}")
+            # sin poder comprobarlo se convierte de nuevo
+            print(f"Error checking existing output {output_key}: {str(e)}")
+            return False
+        metadata = response.get('Metadata') or {}
+        if metadata.get('partial') == 'true':
+            return False
+        return metadata.get(SOURCE_ETAG_METADATA) == etag and metadata.get(SOURCE_VERSION_METADATA, '') == version
+
+    def _incremental_enabled(self, key: str) -> bool:
+        """verifica si el objeto puede convertirse de forma incremental"""
+        return is_incremental_format(get_file_extension(key)) and get_config_bool('INCREMENTAL_CONVERSION', False)
+
+    def _convert_tail(self, bucket: str, key: str, output_key: str,
+                      size: Optional[int]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]:
+        """
+        convierte solo la cola nueva de un objeto que ha crecido desde la última conversión
+
+        Returns:
+            tupla (resultado, nuevo estado, opciones del objeto) o None si hay
+            que convertir el objeto entero
+        """
+        try:
+            state = self._load_state(bucket, output_key)
+            if state is None or size is None or size <= state['offset']:
+                return None
+
+            # ventana final del prefijo ya convertido más la cola nueva
+            response = self.s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={tail_start(state)}-")
+            fetched = response['Body'].read()
+            options = self._request_options(response)
+
+            # la salida debe ser la que se escribió junto al estado
+            output = self.s3_client.get_object(Bucket=bucket, Key=output_key)
+            if output.get('ETag') != state.get('markdown_etag'):
+                return None
 
-            # guardar información del error
-            self._save_error_info(bucket, key, e)
+            appended = append_tail(state, fetched, output['Body'].read().decode('utf-8'))
+            if appended is None:
+                return None
+        except Exception as e:
+            print(f"Incremental conversion unavailable for {key}: {str(e)}")
+            return None
 
-            return {
-                'source': key,
-                'status': 'error',
-                'error': str(e)
+        markdown, new_state = appended
+        result: Dict[str, Any] = {
+            'markdown': markdown,
+            'metadata': {
+                'original_format': new_state['format'],
+                'converted_at': get_current_timestamp(),
+                'size': len(markdown),
+                'title': None,
+                'incremental': {
+                    'offset': new_state['offset'],
+                    'bytes_fetched': len(fetched)
+                }
             }
+        }
+        # las mismas salidas derivadas que pidió el objeto en la conversión completa
+        outputs = {name: options[name] for name in ('index', 'chunking', 'formats') if name in options}
+        return attach_outputs(result, **outputs), new_state, options
+
+    def _load_state(self, bucket: str, output_key: str) -> Optional[Dict[str, Any]]:
+        """
+        lee el registro de estado incremental guardado junto a la salida
+        """
+        try:
+            response = self.s3_client.get_object(Bucket=bucket, Key=state_key(output_key))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+        return json.loads(response['Body'].read())
+
+    def _save_state(self, bucket: str, output_key: str, state: Dict[str, Any]) -> None:
+        """
+        guarda el registro de estado incremental junto a la salida
+        """
+        try:
+            self.s3_client.put_object(
+                Bucket=bucket,
+                Key=state_key(output_key),
+                Body=json.dumps(state).encode('utf-8'),
+                ContentType='application/json'
+            )
+        except Exception as save_error:
+            print(f"Error saving incremental state: {str(save_error)}")
+
+    def _save_index(self, bucket: str, output_key: str, index: Dict[str, Any]) -> None:
+        """
+        guarda el índice de secciones junto a la salida
+        """
+        try:
+            self.s3_client.put_object(
+                Bucket=bucket,
+                Key=index_key(output_key),
+                Body=json.dumps(index, separators=(',', ':')).encode('utf-8'),
+                ContentType='application/json'
+            )
+        except Exception as save_error:
+            print(f"Error saving section index: {str(save_error)}")
+
+    def _save_chunks(self, bucket: str, output_key: str, chunks: List[Dict[str, Any]]) -> None:
+        """
+        guarda los fragmentos junto a la salida como jsonl (uno por línea)
+        """
+        body = ''.join(json.dumps(chunk, ensure_ascii=False) + '\n' for chunk in chunks)
+        try:
+            self.s3_client.put_object(
+                Bucket=bucket,
+                Key=chunks_key(output_key),
+                Body=body.encode('utf-8'),
+                ContentType='application/x-ndjson'
+            )
+        except Exception as save_error:
+            print(f"Error saving chunks: {str(save_error)}")
 
     def _generate_output_key(self, input_key: str) -> str:
         """
         genera la key de salida basada en la key de entrada
         """
-        output_key = input_key.replace('input/', 'output/')
-        if not output_key.endswith('.md'):
-            output_key = os.path.splitext(output_key)[0] + '.md'
-        return output_key
+        return output_key_for(input_key)
 
-    def _save_converted_file(self, bucket: str, key: str, result: Dict[str, Any]) -> None:
+    def _save_converted_file(self, bucket: str, key: str, result: Dict[str, Any],
+                             source_etag: Optional[str] = None, source_version: Optional[str] = None,
+                             content_key: Optional[str] = None,
+                             compressors: Optional[List[Compressor]] = None) -> Optional[str]:
         """
-        guarda el archivo convertido en s3
+        guarda el archivo convertido en s3, junto con los formatos adicionales pedidos
+
+        el etag y la versión del origen quedan en los metadatos para saltar
+        las notificaciones repetidas del mismo objeto, y el identificador del
+        contenido para verificar la salida antes de copiarla a un duplicado
+
+        Args:
+            compressors: si se pasa una lista, las salidas se comprimen según
+                S3_OUTPUT_COMPRESSION y en ella se añaden los compresores
+                usados, con sus bytes y tiempos
+
+        Returns:
+            etag del markdown guardado
         """
-        self.s3_client.put_object(
-            Bucket=bucket,
-            Key=key,
-            Body=result['markdown'].encode('utf-8'),
-            ContentType='text/markdown',
-            Metadata={
-                'original-format': result['metadata']['original_format'],
-                'converted-at': result['metadata']['converted_at']
-            }
+        metadata = {
+            'original-format': result['metadata']['original_format'],
+            'converted-at': result['metadata']['converted_at']
+        }
+        if source_etag:
+            metadata[SOURCE_ETAG_METADATA] = source_etag
+        if source_version:
+            metadata[SOURCE_VERSION_METADATA] = source_version
+        if content_key:
+            metadata[CONTENT_KEY_METADATA] = content_key
+        if result.get('partial'):
+            metadata['partial'] = 'true'
+            metadata['resume-page'] = str(result['resume']['page'])
+
+        response = self._put_text(bucket, key, result['markdown'], 'text/markdown', metadata, compressors)
+
+        # formatos adicionales como objetos hermanos de la salida
+        base_key = os.path.splitext(key)[0]
+        for fmt, output in result.get('outputs', {}).items():
+            is_text = isinstance(output, str)
+            self._put_text(
+                bucket,
+                base_key + FORMAT_SUFFIXES[fmt],
+                output if is_text else json.dumps(output, ensure_ascii=False),
+                'text/plain; charset=utf-8' if is_text else 'application/json',
+                metadata,
+                compressors
+            )
+
+        return response.get('ETag')
+
+    def _put_text(self, bucket: str, key: str, text: str, content_type: str,
+                  metadata: Dict[str, str], compressors: Optional[List[Compressor]] = None) -> Dict[str, Any]:
+        """
+        sube un texto; los grandes con una subida multipart en paralelo que
+        codifica y envía parte a parte en lugar de crear los bytes completos
+
+        Args:
+            compressors: si se pasa, el texto se comprime (si no es pequeño)
+                y el compresor usado se añade a la lista
+
+        Returns:
+            respuesta de s3 (con ETag)
+        """
+        compressor = self._output_compressor(text) if compressors is not None else None
+        headers: Dict[str, Any] = {'ContentType': content_type, 'Metadata': metadata}
+        if compressor is not None and compressors is not None:
+            headers['ContentEncoding'] = compressor.encoding
+            compressors.append(compressor)
+
+        # len(text) es una cota inferior de los bytes en utf-8
+        if len(text) <= get_config_int('S3_MULTIPART_THRESHOLD', DEFAULT_MULTIPART_THRESHOLD):
+            body = text.encode('utf-8')
+            if compressor is not None:
+                body = compress(body, compressor)
+            return self.s3_client.put_object(Bucket=bucket, Key=key, Body=body, **headers)
+        return upload_text(
+            self.s3_client, bucket, key, text,
+            part_size=max(MULTIPART_MIN_PART_SIZE, get_config_int('S3_MULTIPART_PART_SIZE', DEFAULT_PART_SIZE)),
+            concurrency=get_config_int('S3_MULTIPART_CONCURRENCY', DEFAULT_CONCURRENCY),
+            compressor=compressor,
+            **headers
         )
 
+    def _output_compressor(self, text: str) -> Optional[Compressor]:
+        """
+        compresor para una salida según S3_OUTPUT_COMPRESSION, o None si va sin comprimir
+
+        las salidas pequeñas no se comprimen; si la codificación no está
+        disponible (zstd sin zstandard) se guardan sin comprimir
+        """
+        encoding = (get_config('S3_OUTPUT_COMPRESSION', '') or '').strip().lower()
+        if encoding in ('', 'none') or len(text) < get_config_int('S3_COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE):
+            return None
+        try:
+            return Compressor(encoding, get_config_int('S3_COMPRESSION_LEVEL', DEFAULT_LEVELS.get(encoding, 0)))
+        except ValueError as e:
+            print(f"Output compression unavailable, storing uncompressed: {str(e)}")
+            return None
+
     def _save_error_info(self, bucket: str, key: str, error: Exception) -> None:
         """
         guarda información del error en el bucket
@@ -130,7 +703,7 @@ class S3Handler(EventHandler):
         error_key = key.replace('input/', 'errors/')
         error_key = os.path.splitext(error_key)[0] + '_error.json'
 
-        error_info = {
+        error_info: Dict[str, Any] = {
             'source_key': key,
             'error': str(error),
             'error_type': type(error).__name__,
@@ -138,6 +711,12 @@ class S3Handler(EventHandler):
             'bucket': bucket
         }
 
+        # errores de conversión conocidos: tipo específico y detalles
+        if isinstance(error, ConversionError):
+            error_info['error_type'] = error.error_type
+            if error.details:
+                error_info['details'] = error.details
+
         try:
             self.s3_client.put_object(
                 Bucket=bucket,
@@ -1,3 +1,4 @@
+import hashlib
 from datetime import datetime, timezone
 from src.core.responses import ResponseBuilder
 
@@ -10,6 +11,13 @@ def get_file_extension(filename):
     return parts[-1].lower() if len(parts) > 1 else 'unknown'
 
 
+def get_content_hash(content):
+    """obtiene el hash sha256 del contenido (texto o bytes)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
 def get_current_timestamp():
     """obtiene timestamp actual en formato iso"""
     # usar replace para obtener formato ISO con Z en lugar de +00:00
@@ -1,4 +1,168 @@
 # fixtures para pruebas
+import hashlib
+import io
+from typing import Any, Dict
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from src.core.pool import ConverterPool
+
+
+def mock_converter_pool(mock_get_pool):
+    """configura un get_converter_pool parcheado para entregar un markitdown simulado"""
+    mock_markitdown = MagicMock()
+    mock_get_pool.return_value = ConverterPool(lambda: mock_markitdown, max_size=1)
+    return mock_markitdown
+
+
+class FakeS3Client:
+    """cliente s3 en memoria con soporte de rangos y etags"""
+
+    def __init__(self, objects=None):
+        self.objects = dict(objects or {})
+        self.metadata = {}
+        self.content_types = {}
+        self.content_encodings = {}
+        self.uploads = {}
+        self.calls = []
+
+    def _etag(self, body):
+        return '"' + hashlib.md5(body).hexdigest() + '"'
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        self.calls.append(('get_object', Key, Range))
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'Not Found'}}, 'GetObject')
+        if IfMatch is not None and IfMatch != self._etag(self.objects[Key]):
+            raise ClientError({'Error': {'Code': 'PreconditionFailed', 'Message': 'Precondition'}}, 'GetObject')
+        body = self.objects[Key]
+        response: Dict[str, Any] = {'ETag': self._etag(body), 'Metadata': dict(self.metadata.get(Key, {}))}
+        if Range:
+            start, _, end = Range[len('bytes='):].partition('-')
+            total = len(body)
+            body = body[int(start):int(end) + 1 if end else None]
+            response['ContentRange'] = f"bytes {start}-{int(start) + len(body) - 1}/{total}"
+        return dict(response, Body=io.BytesIO(body), ContentLength=len(body))
+
+    def head_object(self, Bucket, Key):
+        self.calls.append(('head_object', Key, None))
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+        return {
+            'ETag': self._etag(self.objects[Key]),
+            'ContentLength': len(self.objects[Key]),
+            'ContentType': self.content_types.get(Key),
+            'ContentEncoding': self.content_encodings.get(Key),
+            'Metadata': dict(self.metadata.get(Key, {}))
+        }
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.calls.append(('put_object', Key, None))
+        self.objects[Key] = Body
+        self.metadata[Key] = dict(kwargs.get('Metadata', {}))
+        self.content_types[Key] = kwargs.get('ContentType')
+        self.content_encodings[Key] = kwargs.get('ContentEncoding')
+        return {'ETag': self._etag(Body)}
+
+    def copy_object(self, Bucket, Key, CopySource, MetadataDirective='COPY', **kwargs):
+        self.calls.append(('copy_object', Key, CopySource['Key']))
+        if CopySource['Key'] not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'Not Found'}}, 'CopyObject')
+        self.objects[Key] = self.objects[CopySource['Key']]
+        if MetadataDirective == 'REPLACE':
+            self.metadata[Key] = dict(kwargs.get('Metadata', {}))
+            self.content_types[Key] = kwargs.get('ContentType')
+            self.content_encodings[Key] = kwargs.get('ContentEncoding')
+        else:
+            self.metadata[Key] = dict(self.metadata.get(CopySource['Key'], {}))
+            self.content_types[Key] = self.content_types.get(CopySource['Key'])
+            self.content_encodings[Key] = self.content_encodings.get(CopySource['Key'])
+        return {'CopyObjectResult': {'ETag': self._etag(self.objects[Key])}}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self.calls.append(('create_multipart_upload', Key, None))
+        upload_id = f'upload-{len(self.uploads) + 1}'
+        self.uploads[upload_id] = {'key': Key, 'parts': {}, 'metadata': dict(kwargs.get('Metadata', {})),
+                                   'content_encoding': kwargs.get('ContentEncoding')}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append(('upload_part', Key, PartNumber))
+        self.uploads[UploadId]['parts'][PartNumber] = Body
+        return {'ETag': self._etag(Body)}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append(('complete_multipart_upload', Key, None))
+        upload = self.uploads.pop(UploadId)
+        numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+        assert numbers == sorted(upload['parts']), 'parts must be listed in order'
+        body = b''.join(upload['parts'][number] for number in numbers)
+        self.objects[Key] = body
+        self.metadata[Key] = upload['metadata']
+        self.content_encodings[Key] = upload['content_encoding']
+        return {'ETag': self._etag(body)}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append(('abort_multipart_upload', Key, None))
+        self.uploads.pop(UploadId, None)
+
+
+def build_pdf(content_stream, fonts=True, encrypt=False, pages=1, xobjects=None):
+    """
+    crea un pdf mínimo con xref válida y todas las páginas con el mismo contenido
+
+    xobjects asocia nombres de recurso con el cuerpo completo del objeto
+    (diccionario y stream); la fuente F1 es el objeto 4
+    """
+    xobjects = xobjects or {}
+    first_xobject = 6 + (1 if encrypt else 0) + pages - 1
+    xobject_refs = b' '.join(b'/' + name.encode() + b' ' + str(first_xobject + i).encode() + b' 0 R'
+                             for i, name in enumerate(xobjects))
+    resources = b'<< ' + (b'/Font << /F1 4 0 R >> ' if fonts else b'')
+    resources += (b'/XObject << ' + xobject_refs + b' >> ' if xobjects else b'') + b'>>'
+    page = b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources ' + resources + b' /Contents 5 0 R >>'
+    first_extra = 7 if encrypt else 6
+    kids = b' '.join([b'3 0 R'] + [str(first_extra + i).encode() + b' 0 R' for i in range(pages - 1)])
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [' + kids + b'] /Count ' + str(pages).encode() + b' >>',
+        page,
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        b'<< /Length ' + str(len(content_stream)).encode() + b' >>\nstream\n' + content_stream + b'\nendstream',
+    ]
+    if encrypt:
+        objects.append(b'<< /Filter /Standard /V 1 /R 2 /O <' + b'11' * 32 + b'> /U <' + b'22' * 32 + b'> /P -4 >>')
+    objects.extend([page] * (pages - 1))
+    objects.extend(xobjects.values())
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += str(number).encode() + b' 0 obj\n' + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 ' + str(len(objects) + 1).encode() + b'\n0000000000 65535 f \n'
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    trailer = b'<< /Size ' + str(len(objects) + 1).encode() + b' /Root 1 0 R'
+    if encrypt:
+        trailer += b' /Encrypt 6 0 R /ID [<' + b'00' * 16 + b'> <' + b'00' * 16 + b'>]'
+    out += b'trailer\n' + trailer + b' >>\nstartxref\n' + str(xref).encode() + b'\n%%EOF\n'
+    return bytes(out)
+
+
+def pdf_stream(attrs, data):
+    """cuerpo de un objeto stream con su /Length"""
+    return b'<< ' + attrs + b' /Length ' + str(len(data)).encode() + b' >>\nstream\n' + data + b'\nendstream'
+
+
+# imagen de 1x1 para los pdfs escaneados y formulario con texto para los pdfs con plantillas
+IMAGE_XOBJECT = pdf_stream(
+    b'/Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray /BitsPerComponent 8', b'\x00'
+)
+TEXT_FORM_XOBJECT = pdf_stream(
+    b'/Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources << /Font << /F1 4 0 R >> >>',
+    b'BT /F1 24 Tf 72 700 Td (Hello from XObject) Tj ET'
+)
+
 
 API_GATEWAY_EVENT = {
     "httpMethod": "POST",
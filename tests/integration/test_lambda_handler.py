@@ -6,7 +6,8 @@ from src.handler import lambda_handler
 from tests.fixtures import (
     API_GATEWAY_EVENT,
     S3_EVENT,
-    DIRECT_INVOCATION_EVENT
+    DIRECT_INVOCATION_EVENT,
+    mock_converter_pool
 )
 
 
@@ -20,7 +21,9 @@ class TestLambdaHandlerIntegration(unittest.TestCase):
         # limpiar handlers singleton
         import src.handlers.s3
         import src.handlers.registry
+        import src.core.failure_cache
         src.handlers.s3._default_handler = None
+        src.core.failure_cache._negative_cache = None
         src.handlers.registry.clear_registry()
         src.handlers.registry.auto_register_handlers()
     
@@ -31,9 +34,10 @@ class TestLambdaHandlerIntegration(unittest.TestCase):
         elif 'API_KEY' in os.environ:
             del os.environ['API_KEY']
     
-    @patch('src.core.converters.markitdown')
-    def test_api_gateway_flow(self, mock_markitdown):
+    @patch('src.core.converters.get_converter_pool')
+    def test_api_gateway_flow(self, mock_get_pool):
         """prueba flujo completo de API Gateway"""
+        mock_markitdown = mock_converter_pool(mock_get_pool)
         # configurar mock
         mock_result = MagicMock()
         mock_result.text_content = "# Converted Content\n\nThis is the converted markdown."
@@ -54,9 +58,10 @@ class TestLambdaHandlerIntegration(unittest.TestCase):
         self.assertIn('Converted Content', body['markdown'])
     
     @patch('boto3.client')
-    @patch('src.core.converters.markitdown')
-    def test_s3_event_flow(self, mock_markitdown, mock_boto3_client):
+    @patch('src.core.converters.get_converter_pool')
+    def test_s3_event_flow(self, mock_get_pool, mock_boto3_client):
         """prueba flujo completo de evento S3"""
+        mock_markitdown = mock_converter_pool(mock_get_pool)
         # configurar mocks
         mock_s3 = MagicMock()
         mock_boto3_client.return_value = mock_s3
@@ -81,9 +86,10 @@ class TestLambdaHandlerIntegration(unittest.TestCase):
         # verificar que se guardó en S3
         mock_s3.put_object.assert_called_once()
     
-    @patch('src.core.converters.markitdown')
-    def test_direct_invocation_flow(self, mock_markitdown):
+    @patch('src.core.converters.get_converter_pool')
+    def test_direct_invocation_flow(self, mock_get_pool):
         """prueba flujo de invocación directa"""
+        mock_markitdown = mock_converter_pool(mock_get_pool)
         # configurar mock
         mock_result = MagicMock()
         mock_result.text_content = "# Direct Content"
@@ -107,9 +113,10 @@ class TestLambdaHandlerIntegration(unittest.TestCase):
         
         self.assertIn('No handler found for this event type', str(context.exception))
     
-    @patch('src.core.converters.markitdown')
-    def test_api_gateway_error_handling(self, mock_markitdown):
+    @patch('src.core.converters.get_converter_pool')
+    def test_api_gateway_error_handling(self, mock_get_pool):
         """prueba manejo de errores en API Gateway"""
+        mock_markitdown = mock_converter_pool(mock_get_pool)
         # configurar mock para fallar
         mock_markitdown.convert_stream.side_effect = Exception("Conversion error")
         
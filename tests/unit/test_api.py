@@ -1,14 +1,17 @@
 import unittest
 from unittest.mock import patch
+from src.core.exceptions import ArchiveLimitExceeded
+import base64
 import json
 import os
-from src.handlers.api import handle_api_gateway_event, handle_direct_invocation
+from src.handlers.api import ApiHandler, handle_api_gateway_event, handle_direct_invocation
 from tests.fixtures import (
     API_GATEWAY_EVENT, 
     API_GATEWAY_EVENT_BASE64,
     API_GATEWAY_EVENT_NO_AUTH,
     DIRECT_INVOCATION_EVENT,
-    DIRECT_INVOCATION_EVENT_BASE64
+    DIRECT_INVOCATION_EVENT_BASE64,
+    FakeS3Client
 )
 
 
@@ -112,6 +115,153 @@ class TestApiHandler(unittest.TestCase):
         body = json.loads(result['body'])
         self.assertEqual(body['error'], 'Missing content in request')
     
+    @patch('src.handlers.api.convert_to_markdown')
+    def test_handle_api_gateway_event_image_policy(self, mock_convert):
+        """prueba que la política de imágenes se pasa al conversor"""
+        mock_convert.return_value = {'markdown': 'Test', 'metadata': {}}
+        event = dict(API_GATEWAY_EVENT, body=json.dumps({
+            'content': 'Test', 'filename': 'test.docx', 'image_policy': 'external'
+        }))
+
+        result = handle_api_gateway_event(event)
+
+        self.assertEqual(result['statusCode'], 200)
+        mock_convert.assert_called_once_with('Test', 'test.docx', image_policy='external')
+
+    @patch('src.handlers.api.deadline_from_context')
+    @patch('src.handlers.api.convert_to_markdown')
+    def test_handle_api_gateway_event_partial_result(self, mock_convert, mock_deadline):
+        """prueba que el resultado parcial por plazo se devuelve marcado"""
+        mock_convert.return_value = {
+            'markdown': 'Page 1', 'metadata': {}, 'partial': True, 'resume': {'page': 1}
+        }
+
+        result = ApiHandler().handle(API_GATEWAY_EVENT, context=object())
+
+        self.assertEqual(result['statusCode'], 200)
+        body = json.loads(result['body'])
+        self.assertTrue(body['partial'])
+        self.assertEqual(body['resume']['page'], 1)
+        self.assertIs(mock_convert.call_args[1]['deadline'], mock_deadline.return_value)
+
+    def test_handle_api_gateway_event_invalid_index(self):
+        """prueba rechazo de la opción index no booleana"""
+        event = dict(API_GATEWAY_EVENT, body=json.dumps({'content': 'Test', 'index': 'yes'}))
+
+        result = handle_api_gateway_event(event)
+
+        self.assertEqual(result['statusCode'], 400)
+
+    def test_handle_api_gateway_event_invalid_chunking(self):
+        """prueba rechazo de un tamaño de fragmento inválido"""
+        event = dict(API_GATEWAY_EVENT, body=json.dumps({'content': 'Test', 'chunking': -1}))
+
+        result = handle_api_gateway_event(event)
+
+        self.assertEqual(result['statusCode'], 400)
+
+    def test_handle_api_gateway_event_invalid_formats(self):
+        """prueba rechazo de formatos de salida desconocidos"""
+        event = dict(API_GATEWAY_EVENT, body=json.dumps({'content': 'Test', 'formats': ['markdown', 'docx']}))
+
+        result = handle_api_gateway_event(event)
+
+        self.assertEqual(result['statusCode'], 400)
+
+    def test_handle_api_gateway_event_invalid_image_policy(self):
+        """prueba rechazo de política de imágenes inválida"""
+        event = dict(API_GATEWAY_EVENT, body=json.dumps({'content': 'Test', 'image_policy': 'embed'}))
+
+        result = handle_api_gateway_event(event)
+
+        self.assertEqual(result['statusCode'], 400)
+        body = json.loads(result['body'])
+        self.assertIn('Invalid image_policy', body['error'])
+
+    def test_handle_api_gateway_event_invalid_postprocess(self):
+        """prueba rechazo de pasos de post-procesado desconocidos"""
+        event = dict(API_GATEWAY_EVENT, body=json.dumps({'content': 'Test', 'postprocess': ['minify']}))
+
+        result = handle_api_gateway_event(event)
+
+        self.assertEqual(result['statusCode'], 400)
+        body = json.loads(result['body'])
+        self.assertIn('Unknown postprocess steps', body['error'])
+
+    @patch('src.handlers.api.convert_to_markdown')
+    def test_handle_api_gateway_event_archive_limit(self, mock_convert):
+        """prueba respuesta 413 cuando el zip supera los límites"""
+        mock_convert.side_effect = ArchiveLimitExceeded(
+            "Archive expands to 10 bytes (limit 1)", details={'uncompressed_bytes': 10}
+        )
+
+        result = handle_api_gateway_event(API_GATEWAY_EVENT)
+
+        self.assertEqual(result['statusCode'], 413)
+        body = json.loads(result['body'])
+        self.assertEqual(body['error_type'], 'archive_too_large')
+        self.assertEqual(body['details']['uncompressed_bytes'], 10)
+
+    def _route(self, prediction, dependencies, action='async'):
+        """ejecuta un request con el modelo de coste activo y la predicción dada"""
+        config = {'COST_ROUTING_ACTION': action}
+        with patch('src.handlers.api.get_config_bool', return_value=True), \
+                patch('src.handlers.api.get_config', side_effect=lambda key, default=None: config.get(key, default)), \
+                patch('src.handlers.api.get_cost_model') as mock_model, \
+                patch('src.handlers.api.get_dependency', side_effect=dependencies.get), \
+                patch('src.handlers.api.convert_to_markdown') as mock_convert:
+            mock_model.return_value.predict.return_value = prediction
+            mock_convert.return_value = {'markdown': 'Test', 'metadata': {}}
+            event = dict(API_GATEWAY_EVENT, body=json.dumps({
+                'content': 'Test', 'filename': 'big.pdf', 'image_policy': 'drop'
+            }))
+            return handle_api_gateway_event(event), mock_convert
+
+    def test_handle_api_gateway_event_passes_cost_features(self):
+        """prueba que una conversión no desviada recibe las características ya calculadas"""
+        result, mock_convert = self._route(None, {})
+
+        self.assertEqual(result['statusCode'], 200)
+        features = mock_convert.call_args[1]['features']
+        self.assertEqual((features['format'], features['profile']), ('text', 'drop'))
+
+    def test_handle_api_gateway_event_routes_slow_conversion_to_s3(self):
+        """prueba que una conversión que excede el plazo se desvía a s3 sin convertir"""
+        s3_client = FakeS3Client()
+        prediction = {'seconds': 80.0, 'lower_bound': 60.0, 'model': 'pdf', 'samples': 50, 'peak_memory_mb': 300}
+
+        result, mock_convert = self._route(prediction, {'bucket_name': 'bucket', 's3_client': s3_client})
+
+        self.assertEqual(result['statusCode'], 202)
+        body = json.loads(result['body'])
+        self.assertEqual(body['status'], 'accepted')
+        self.assertEqual(body['estimated_seconds'], 80.0)
+        input_key = body['input'][len('s3://bucket/'):]
+        self.assertTrue(input_key.startswith('input/async/') and input_key.endswith('/big.pdf'))
+        self.assertEqual(body['output'], 's3://bucket/' + input_key.replace('input/', 'output/')[:-4] + '.md')
+        self.assertEqual(s3_client.objects[input_key], b'Test')
+        self.assertEqual(json.loads(s3_client.metadata[input_key]['conversion-options']), {'image_policy': 'drop'})
+        mock_convert.assert_not_called()
+
+    def test_handle_api_gateway_event_rejects_slow_conversion_without_bucket(self):
+        """prueba rechazo 413 si no hay bucket donde desviar"""
+        prediction = {'seconds': 80.0, 'lower_bound': 60.0, 'model': 'pdf', 'samples': 50, 'peak_memory_mb': 300}
+
+        result, mock_convert = self._route(prediction, {'bucket_name': None})
+
+        self.assertEqual(result['statusCode'], 413)
+        self.assertEqual(json.loads(result['body'])['error_type'], 'estimated_timeout')
+        mock_convert.assert_not_called()
+
+    def test_handle_api_gateway_event_converts_when_not_clearly_slow(self):
+        """prueba que sin predicción o con margen de duda se convierte en el momento"""
+        uncertain = {'seconds': 30.0, 'lower_bound': 20.0, 'model': 'pdf', 'samples': 50, 'peak_memory_mb': 300}
+        for prediction in (None, uncertain):
+            result, mock_convert = self._route(prediction, {'bucket_name': 'bucket', 's3_client': FakeS3Client()})
+
+            self.assertEqual(result['statusCode'], 200)
+            mock_convert.assert_called_once()
+
     @patch('src.handlers.api.convert_to_markdown')
     def test_handle_api_gateway_event_conversion_error(self, mock_convert):
         """prueba manejo de error en conversión"""
@@ -151,6 +301,58 @@ class TestApiHandler(unittest.TestCase):
         args = mock_convert.call_args[0]
         self.assertEqual(args[0], b'Test content for direct')
     
+    @patch('src.core.inputs.get_config_int', return_value=4)
+    @patch('src.handlers.api.convert_to_markdown')
+    def test_large_base64_content_is_spilled(self, mock_convert, _threshold):
+        """prueba que el base64 por encima del umbral llega al conversor mapeado desde /tmp"""
+        seen = []
+
+        def convert(content, filename, **kwargs):
+            seen.append((content.is_mapped, content.data[:]))
+            return {'markdown': 'ok', 'metadata': {}}
+        mock_convert.side_effect = convert
+
+        result = handle_api_gateway_event(API_GATEWAY_EVENT_BASE64)
+        handle_direct_invocation(DIRECT_INVOCATION_EVENT_BASE64)
+
+        self.assertEqual(result['statusCode'], 200)
+        self.assertEqual(seen, [(True, b'Test content'), (True, b'Test content for direct')])
+
+    @patch('src.core.inputs.get_config_int', return_value=4)
+    @patch('src.handlers.api.convert_to_markdown')
+    def test_large_json_body_keeps_envelope(self, mock_convert, _threshold):
+        """prueba que un sobre json volcado a disco conserva filename y opciones"""
+        seen = []
+
+        def convert(content, filename, **kwargs):
+            seen.append((content.data[:], filename, kwargs.get('index')))
+            return {'markdown': 'ok', 'metadata': {}}
+        mock_convert.side_effect = convert
+        body = json.dumps({
+            'content': base64.b64encode(b'# Title').decode('ascii'),
+            'filename': 'doc.md',
+            'base64': True,
+            'index': True
+        })
+        event = dict(API_GATEWAY_EVENT, body=base64.b64encode(b'  ' + body.encode('utf-8')).decode('ascii'),
+                     isBase64Encoded=True)
+
+        result = handle_api_gateway_event(event)
+
+        self.assertEqual(result['statusCode'], 200)
+        self.assertEqual(seen, [(b'# Title', 'doc.md', True)])
+
+    @patch('src.handlers.api.convert_to_markdown')
+    def test_binary_body_is_content(self, mock_convert):
+        """prueba que un body binario en base64 que no es json se convierte tal cual"""
+        mock_convert.return_value = {'markdown': 'ok', 'metadata': {}}
+        event = dict(API_GATEWAY_EVENT, body='JVBERi3/AA==', isBase64Encoded=True)
+
+        result = handle_api_gateway_event(event)
+
+        self.assertEqual(result['statusCode'], 200)
+        self.assertEqual(mock_convert.call_args[0], (b'%PDF-\xff\x00', None))
+
     def test_handle_direct_invocation_invalid_event(self):
         """prueba error con evento inválido"""
         invalid_events = [
@@ -0,0 +1,80 @@
+import io
+import unittest
+import zipfile
+from src.core.archive_guard import describe_archive, enforce_archive_limits, inspect_zip, is_zip_container
+from src.core.exceptions import ArchiveLimitExceeded, ConversionError
+
+
+def build_zip(entries):
+    """crea un zip en memoria con las entradas dadas"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class TestArchiveGuard(unittest.TestCase):
+    """pruebas para la comprobación previa de contenedores zip"""
+
+    def test_is_zip_container(self):
+        """prueba detección por extensión y firma"""
+        content = build_zip({'word/document.xml': '<w/>'})
+
+        self.assertTrue(is_zip_container(content, 'docx'))
+        self.assertFalse(is_zip_container(content, 'pdf'))
+        self.assertFalse(is_zip_container(b'not a zip', 'docx'))
+
+    def test_inspect_zip_reads_declared_sizes(self):
+        """prueba que se suman los tamaños declarados"""
+        content = build_zip({'a.xml': 'a' * 10000, 'b.xml': 'b' * 5000})
+
+        stats, entries = inspect_zip(content)
+
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['uncompressed_bytes'], 15000)
+        self.assertGreater(stats['ratio'], 10)
+        self.assertEqual([info.filename for info in entries], ['a.xml', 'b.xml'])
+
+    def test_inspect_corrupt_zip(self):
+        """prueba error específico con directorio central corrupto"""
+        with self.assertRaises(ConversionError) as context:
+            inspect_zip(b'PK\x03\x04truncated')
+
+        self.assertEqual(context.exception.error_type, 'archive_corrupt')
+
+    def test_limits_uncompressed_size(self):
+        """prueba rechazo 413 por tamaño descomprimido"""
+        stats = {'entries': 1, 'compressed_bytes': 100, 'uncompressed_bytes': 5000, 'ratio': 50}
+
+        with self.assertRaises(ArchiveLimitExceeded) as context:
+            enforce_archive_limits(stats, max_uncompressed_bytes=1000)
+
+        self.assertEqual(context.exception.status_code, 413)
+        self.assertEqual(context.exception.error_type, 'archive_too_large')
+
+    def test_limits_ratio_and_entries(self):
+        """prueba rechazo 422 por ratio o número de entradas"""
+        stats = {'entries': 50, 'compressed_bytes': 10, 'uncompressed_bytes': 10000, 'ratio': 1000}
+
+        with self.assertRaises(ArchiveLimitExceeded) as context:
+            enforce_archive_limits(stats, max_ratio=100)
+        self.assertEqual(context.exception.status_code, 422)
+        self.assertEqual(context.exception.error_type, 'archive_ratio_exceeded')
+
+        with self.assertRaises(ArchiveLimitExceeded) as context:
+            enforce_archive_limits(stats, max_ratio=10000, max_entries=10)
+        self.assertEqual(context.exception.error_type, 'archive_too_many_entries')
+
+    def test_describe_archive(self):
+        """prueba el listado degradado de entradas"""
+        _, entries = inspect_zip(build_zip({'word/document.xml': 'x'}))
+
+        markdown = describe_archive(entries, 'too big')
+
+        self.assertIn('too big', markdown)
+        self.assertIn('| word/document.xml |', markdown)
+
+
+if __name__ == '__main__':
+    unittest.main()
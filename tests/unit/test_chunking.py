@@ -0,0 +1,92 @@
+import unittest
+from src.core.chunking import approx_tokens, chunk_markdown, chunks_key, resolve_chunk_target
+from src.core.section_index import build_section_index
+
+
+def chunk_text(markdown, chunk):
+    """texto de un fragmento leído del markdown por su rango"""
+    return markdown.encode('utf-8')[chunk['start']:chunk['end']].decode('utf-8')
+
+
+class TestChunking(unittest.TestCase):
+    """pruebas para el troceado del markdown"""
+
+    def test_headings_start_new_chunks(self):
+        """prueba que cada encabezado abre un fragmento con su ruta de encabezados"""
+        markdown = "# Guía\n\nIntro.\n\n## Instalación\n\nPasos.\n\n## Uso\n\nEjemplos."
+
+        chunks = chunk_markdown(markdown, target_tokens=100)
+
+        self.assertEqual([c['headings'] for c in chunks], [['Guía'], ['Guía', 'Instalación'], ['Guía', 'Uso']])
+        self.assertEqual(chunk_text(markdown, chunks[1]), "## Instalación\n\nPasos.")
+        self.assertNotIn('text', chunks[1])
+
+    def test_offsets_are_utf8_bytes(self):
+        """prueba que start y end delimitan el texto en bytes utf-8"""
+        markdown = "# Año\n\nñandú " * 5
+
+        chunks = chunk_markdown(markdown, target_tokens=4)
+
+        self.assertEqual(chunk_text(markdown, chunks[0]), "# Año")
+        for chunk in chunks:
+            self.assertEqual(chunk['tokens'], approx_tokens(chunk_text(markdown, chunk)))
+
+    def test_chunks_stay_under_target(self):
+        """prueba que los bloques grandes se parten por líneas y caracteres"""
+        markdown = "# Log\n\n" + "\n".join("línea %d con algo de texto" % i for i in range(200)) + "\n" + "x" * 1000
+
+        chunks = chunk_markdown(markdown, target_tokens=50)
+
+        self.assertGreater(len(chunks), 10)
+        for chunk in chunks:
+            self.assertLessEqual(chunk['tokens'], 50)
+            self.assertEqual(chunk['tokens'], approx_tokens(chunk_text(markdown, chunk)))
+
+    def test_long_multibyte_line_pieces_are_contiguous(self):
+        """prueba que los trozos de una línea larga con acentos se suceden sin huecos en bytes"""
+        markdown = 'é' * 1000
+
+        chunks = chunk_markdown(markdown, target_tokens=16)
+
+        self.assertEqual(len(chunks), 16)
+        self.assertEqual([c['start'] for c in chunks[1:]], [c['end'] for c in chunks[:-1]])
+        self.assertEqual(''.join(chunk_text(markdown, c) for c in chunks), markdown)
+
+    def test_small_blocks_are_packed(self):
+        """prueba que los párrafos pequeños de una sección se agrupan"""
+        markdown = "\n\n".join(["uno dos tres"] * 10)
+
+        chunks = chunk_markdown(markdown, target_tokens=1000)
+
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunk_text(markdown, chunks[0]), markdown)
+
+    def test_uses_given_section_index(self):
+        """prueba que los encabezados salen del índice de secciones ya construido"""
+        markdown = "# A\n\nuno\n\n```\n# no es encabezado\n```\n\n## B\n\ndos"
+        index = build_section_index(markdown)
+
+        chunks = chunk_markdown(markdown, target_tokens=100, index=index)
+
+        self.assertEqual(chunks, chunk_markdown(markdown, target_tokens=100))
+        self.assertEqual([c['headings'] for c in chunks], [['A'], ['A', 'B']])
+        self.assertEqual([c['start'] for c in chunks], [0] + [h['start'] for h in index['headings'][1:]])
+
+    def test_resolve_chunk_target(self):
+        """prueba la interpretación de la opción de troceado"""
+        self.assertIsNone(resolve_chunk_target(None))
+        self.assertIsNone(resolve_chunk_target(False))
+        self.assertEqual(resolve_chunk_target(True, 256), 256)
+        self.assertEqual(resolve_chunk_target(128), 128)
+        with self.assertRaises(ValueError):
+            resolve_chunk_target(0)
+        with self.assertRaises(ValueError):
+            resolve_chunk_target('big')  # type: ignore[arg-type]
+
+    def test_chunks_key(self):
+        """prueba la key del jsonl junto a la salida"""
+        self.assertEqual(chunks_key('output/doc.md'), 'output/doc.md.chunks.jsonl')
+
+
+if __name__ == '__main__':
+    unittest.main()
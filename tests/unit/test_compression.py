@@ -0,0 +1,48 @@
+import gzip
+import importlib.util
+import unittest
+from src.core.compression import Compressor, compress, summarize_compression
+
+
+class TestCompression(unittest.TestCase):
+    """pruebas para la compresión de salidas"""
+
+    def test_gzip_round_trip_and_stats(self):
+        """prueba que gzip produce un cuerpo válido y anota bytes y ratio"""
+        data = ('# Título\n\n' + 'texto repetido ' * 500).encode('utf-8')
+        compressor = Compressor('gzip', level=9)
+
+        body = compress(data, compressor)
+
+        self.assertEqual(gzip.decompress(body), data)
+        self.assertEqual(compressor.bytes_in, len(data))
+        self.assertEqual(compressor.bytes_out, len(body))
+        summary = summarize_compression([compressor, Compressor('gzip')])
+        assert summary is not None
+        self.assertEqual(summary['encoding'], 'gzip')
+        self.assertGreater(summary['ratio'], 4)
+        self.assertIsNone(summarize_compression([]))
+
+    def test_incremental_blocks_match_single_body(self):
+        """prueba que comprimir por bloques da el mismo contenido al descomprimir"""
+        compressor = Compressor('gzip')
+        body = b''.join(compressor.compress(block) for block in (b'uno ', b'dos ', b'tres')) + compressor.flush()
+
+        self.assertEqual(gzip.decompress(body), b'uno dos tres')
+
+    def test_unsupported_encoding(self):
+        """prueba que una codificación desconocida se rechaza"""
+        with self.assertRaises(ValueError):
+            Compressor('brotli')
+
+    @unittest.skipIf(importlib.util.find_spec('zstandard') is not None, 'zstandard instalado')
+    def test_zstd_without_package(self):
+        """prueba que zstd sin el paquete zstandard se rechaza con un error claro"""
+        with self.assertRaises(ValueError) as ctx:
+            Compressor('zstd')
+
+        self.assertIn('zstandard', str(ctx.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ tests unitarios para el servicio de configuración
 import pytest
 import json
 import os
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 from botocore.exceptions import ClientError
@@ -106,6 +107,28 @@ class TestConfigService:
             value = config_service.get('TEST_VAR')
             assert value == 'env_value'
     
+    def test_missing_secret_not_requested_again(self, config_service, mock_secrets_client):
+        """verifica que las claves ausentes no repiten la llamada a secrets manager"""
+        error_response = {'Error': {'Code': 'ResourceNotFoundException'}}
+        mock_secrets_client.get_secret_value.side_effect = ClientError(error_response, 'GetSecretValue')
+
+        assert config_service.get('MISSING_A') is None
+        assert config_service.get('MISSING_B', 'default') == 'default'
+
+        assert mock_secrets_client.get_secret_value.call_count == 1
+
+    def test_secret_error_not_retried_on_every_read(self, config_service, mock_secrets_client):
+        """verifica que tras un error el secreto no se pide en cada lectura hasta que pasa el plazo"""
+        mock_secrets_client.get_secret_value.side_effect = Exception('connect timeout')
+
+        config_service.get('MISSING_A')
+        config_service.get('MISSING_B')
+        assert mock_secrets_client.get_secret_value.call_count == 1
+
+        with patch('src.core.config.time.monotonic', return_value=time.monotonic() + 3600):
+            config_service.get('MISSING_C')
+        assert mock_secrets_client.get_secret_value.call_count == 2
+
     def test_priority_secrets_over_env(self, config_service, mock_secrets_client):
         """verifica que secrets manager tiene prioridad sobre env vars"""
         config_data = {
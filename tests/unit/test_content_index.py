@@ -0,0 +1,30 @@
+import unittest
+from src.core.content_index import S3ContentIndex, content_key
+from tests.fixtures import FakeS3Client
+
+
+class TestContentIndex(unittest.TestCase):
+    """pruebas para el índice de contenido convertido"""
+
+    def test_content_key_depends_on_format_and_options(self):
+        """prueba que el mismo contenido con otra extensión u opciones es otra entrada"""
+        key = content_key('abc', 'pdf', {'index': True, 'image_policy': 'drop'})
+
+        self.assertEqual(key, content_key('abc', 'pdf', {'image_policy': 'drop', 'index': True}))
+        self.assertNotEqual(key, content_key('abc', 'docx', {'index': True, 'image_policy': 'drop'}))
+        self.assertNotEqual(key, content_key('abc', 'pdf'))
+
+    def test_entries_stored_under_prefix(self):
+        """prueba que las entradas se guardan bajo el prefijo reservado y las ausentes dan None"""
+        s3 = FakeS3Client()
+        index = S3ContentIndex(s3, prefix='dedup/')
+
+        self.assertIsNone(index.get('bucket', 'abc'))
+        index.put('bucket', 'abc', {'output': 'output/a.md', 'siblings': []})
+
+        self.assertIn('dedup/abc.json', s3.objects)
+        self.assertEqual(index.get('bucket', 'abc'), {'output': 'output/a.md', 'siblings': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,45 @@
+import io
+import os
+import tempfile
+import threading
 import unittest
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
 from unittest.mock import patch, MagicMock
-from src.core.converters import convert_to_markdown
+from src.core.converters import (
+    convert_to_markdown,
+    get_conversion_pipeline,
+    get_converter_pool,
+    set_conversion_pipeline
+)
+from src.core.deadline import Deadline
+from src.core.exceptions import ArchiveLimitExceeded, ConversionError
+from src.core.failure_cache import NegativeCache
+from src.core.inputs import MmapReader
+from src.core.pipeline import FunctionStage
+from src.core.section_index import build_section_index
+from src.core.singleflight import SingleFlight
+from src.utils.utils import get_content_hash
+from tests.fixtures import IMAGE_XOBJECT, TEXT_FORM_XOBJECT, build_pdf, mock_converter_pool
+
+
+@contextmanager
+def patch_markitdown():
+    """parchea el pool para que entregue un markitdown simulado"""
+    with patch('src.core.converters.get_converter_pool') as mock_get_pool:
+        yield mock_converter_pool(mock_get_pool)
 
 
 class TestConverters(unittest.TestCase):
     """pruebas para el módulo de conversión"""
+
+    def setUp(self):
+        # caché negativa propia para que los fallos no se filtren entre pruebas
+        self.negative_cache = NegativeCache()
+        patcher = patch('src.core.converters.get_negative_cache', return_value=self.negative_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
     
     def test_convert_text_to_markdown(self):
         """prueba conversión de texto simple"""
@@ -38,7 +73,7 @@ class TestConverters(unittest.TestCase):
         # crear contenido binario de prueba
         binary_content = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR'
         
-        with patch('src.core.converters.markitdown') as mock_markitdown:
+        with patch_markitdown() as mock_markitdown:
             # configurar mock
             mock_result = MagicMock()
             mock_result.text_content = "Mocked image content"
@@ -72,7 +107,7 @@ class TestConverters(unittest.TestCase):
     
     def test_convert_error_handling(self):
         """prueba manejo de errores en conversión"""
-        with patch('src.core.converters.markitdown') as mock_markitdown:
+        with patch_markitdown() as mock_markitdown:
             # configurar mock para lanzar excepción
             mock_markitdown.convert_stream.side_effect = Exception("Conversion failed")
             
@@ -81,6 +116,364 @@ class TestConverters(unittest.TestCase):
             
             self.assertIn("Error converting to markdown", str(context.exception))
     
+    def test_large_html_uses_streaming_converter(self):
+        """prueba que el html sobre el umbral se convierte en streaming"""
+        content = b'<html><body><h1>Grande</h1><p>Texto</p></body></html>'
+
+        with patch('src.core.converters.get_config_int', return_value=10), \
+                patch_markitdown() as mock_markitdown:
+            result = convert_to_markdown(content, 'page.html')
+
+            mock_markitdown.convert_stream.assert_not_called()
+            mock_markitdown.convert.assert_not_called()
+
+        self.assertEqual(result['markdown'], '# Grande\n\nTexto')
+        self.assertEqual(result['metadata']['original_format'], 'html')
+
+    def test_image_policy_drop(self):
+        """prueba que la política drop elimina imágenes embebidas"""
+        with patch_markitdown() as mock_markitdown:
+            mock_result = MagicMock()
+            mock_result.text_content = "# Doc\n\n![img](data:image/png;base64,iVBORw0KGgo=)"
+            mock_markitdown.convert_stream.return_value = mock_result
+
+            result = convert_to_markdown("content", "doc.md", image_policy='drop')
+
+            self.assertTrue(mock_markitdown.convert_stream.call_args[1].get('keep_data_uris') is None)
+
+        self.assertEqual(result['markdown'], "# Doc\n\n")
+        self.assertEqual(result['metadata']['images']['count'], 1)
+
+    def test_postprocess_reports_bytes_saved(self):
+        """prueba que el post-procesado reporta los bytes ahorrados"""
+        with patch_markitdown() as mock_markitdown:
+            mock_result = MagicMock()
+            mock_result.text_content = "|  a   |  b   |\n| ---- | ---- |\n\n\n## Vacía\n"
+            mock_markitdown.convert_stream.return_value = mock_result
+
+            result = convert_to_markdown("content", "test.csv", postprocess='all')
+
+        self.assertEqual(result['markdown'], "| a | b |\n| --- | --- |\n")
+        self.assertEqual(result['metadata']['postprocess']['bytes_saved'], 20)
+        self.assertEqual(result['metadata']['size'], len(result['markdown']))
+
+    def test_conversion_uses_pool(self):
+        """prueba que la conversión toma y devuelve una instancia del pool"""
+        pool = get_converter_pool()
+        before = pool.stats()['acquisitions']
+
+        convert_to_markdown("Test content", "test.txt")
+
+        stats = pool.stats()
+        self.assertEqual(stats['acquisitions'], before + 1)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_zip_bomb_rejected_before_conversion(self):
+        """prueba que un docx que se expande demasiado se rechaza sin convertir"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('word/document.xml', '0' * 1000000)
+
+        with patch_markitdown() as mock_markitdown:
+            with self.assertRaises(ArchiveLimitExceeded) as context:
+                convert_to_markdown(buffer.getvalue(), 'bomb.docx')
+
+            mock_markitdown.convert.assert_not_called()
+
+        self.assertEqual(context.exception.error_type, 'archive_ratio_exceeded')
+
+    def test_zip_over_limit_downgraded(self):
+        """prueba que con la acción downgrade se lista el contenido sin extraerlo"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('word/document.xml', '0' * 1000000)
+
+        config = {'ARCHIVE_LIMIT_ACTION': 'downgrade'}
+        with patch('src.core.converters.get_config', side_effect=lambda key, default=None: config.get(key, default)):
+            result = convert_to_markdown(buffer.getvalue(), 'bomb.docx', postprocess=False)
+
+        self.assertIn('word/document.xml', result['markdown'])
+        self.assertTrue(result['metadata']['archive']['downgraded'])
+
+    def test_image_only_pdf_skips_conversion(self):
+        """prueba que un pdf escaneado vuelve al momento con el flag image_only"""
+        content = build_pdf(b'q 612 0 0 792 0 0 cm /Im1 Do Q', fonts=False, xobjects={'Im1': IMAGE_XOBJECT})
+
+        with patch_markitdown() as mock_markitdown:
+            result = convert_to_markdown(content, 'scan.pdf')
+
+            mock_markitdown.convert.assert_not_called()
+
+        self.assertEqual(result['markdown'], '')
+        self.assertTrue(result['metadata']['image_only'])
+        self.assertEqual(result['metadata']['pdf']['classification'], 'image_only')
+
+    def test_partly_sampled_image_only_pdf_is_converted(self):
+        """prueba que si quedan páginas sin muestrear el pdf sin texto se convierte entero"""
+        content = build_pdf(b'q 612 0 0 792 0 0 cm /Im1 Do Q', fonts=False, pages=5, xobjects={'Im1': IMAGE_XOBJECT})
+
+        with patch_markitdown() as mock_markitdown:
+            mock_markitdown.convert.return_value.text_content = 'texto de la página 4'
+            mock_markitdown.convert_stream.return_value.text_content = 'texto de la página 4'
+            result = convert_to_markdown(content, 'scan.pdf', postprocess=False)
+
+            self.assertEqual(mock_markitdown.convert.call_count + mock_markitdown.convert_stream.call_count, 1)
+
+        self.assertEqual(result['markdown'], 'texto de la página 4')
+        self.assertNotIn('image_only', result['metadata'])
+        self.assertEqual(result['metadata']['pdf']['classification'], 'unknown')
+
+    def test_pdf_text_inside_form_xobject_is_converted(self):
+        """prueba que el texto dibujado desde un form xobject no se pierde como image_only"""
+        content = build_pdf(b'q /Fm1 Do Q', fonts=False, xobjects={'Fm1': TEXT_FORM_XOBJECT})
+
+        result = convert_to_markdown(content, 'stamped.pdf')
+
+        self.assertIn('Hello from XObject', result['markdown'])
+        self.assertNotIn('image_only', result['metadata'])
+
+    def test_pdf_partial_result_when_deadline_is_near(self):
+        """prueba que un pdf devuelve lo convertido y la página de reanudación al agotarse el plazo"""
+        content = build_pdf(b'BT /F1 12 Tf 72 700 Td (Hello world) Tj ET', pages=4)
+        remaining = iter([5000, 500])
+
+        result = convert_to_markdown(content, 'long.pdf', deadline=Deadline(lambda: next(remaining), 1000))
+
+        self.assertTrue(result['partial'])
+        self.assertEqual(result['resume'], {'page': 1, 'pages_converted': 1, 'total_pages': 4})
+        self.assertEqual(result['markdown'].count('Hello world'), 1)
+
+    def test_section_index_is_added_on_request(self):
+        """prueba que index añade el índice de secciones del markdown final"""
+        result = convert_to_markdown("# Title\n\nBody", "doc.md", index=True)
+
+        self.assertEqual(result['index']['headings'][0]['title'], 'Title')
+        self.assertEqual(result['index']['bytes'], len(result['markdown'].encode('utf-8')))
+
+    def test_chunking_is_added_on_request(self):
+        """prueba que chunking añade los fragmentos del markdown final"""
+        result = convert_to_markdown("# Title\n\nBody\n\n## Next\n\nMore", "doc.md", chunking=64)
+
+        self.assertEqual([c['headings'] for c in result['chunks']], [['Title'], ['Title', 'Next']])
+
+    def test_section_index_is_built_once(self):
+        """prueba que el índice, los fragmentos y el esquema comparten un solo índice de secciones"""
+        markdown = "# Title\n\nBody\n\n## Next\n\nMore"
+        with patch('src.core.converters.build_section_index', wraps=build_section_index) as mock_index, \
+                patch('src.core.chunking.build_section_index') as chunking_index, \
+                patch('src.core.formats.build_section_index') as formats_index:
+            result = convert_to_markdown(markdown, "doc.md", index=True, chunking=64, formats=['outline_json'])
+
+        mock_index.assert_called_once()
+        chunking_index.assert_not_called()
+        formats_index.assert_not_called()
+        self.assertEqual(result['chunks'][1]['start'], result['index']['headings'][1]['start'])
+        self.assertEqual(result['outputs']['outline_json']['sections'][0]['children'][0]['title'], 'Next')
+        self.assertNotIn('text', result['chunks'][0])
+
+    def test_additional_formats_from_one_conversion(self):
+        """prueba que formats añade texto plano y esquema sin volver a convertir"""
+        with patch_markitdown() as mock_markitdown:
+            mock_markitdown.convert_stream.return_value = MagicMock(
+                text_content="# Report\n\n**Total**: 3\n\n## Detail", title=None
+            )
+
+            result = convert_to_markdown("source", "report.txt", formats=['text', 'outline_json'])
+
+            self.assertEqual(mock_markitdown.convert_stream.call_count, 1)
+
+        self.assertEqual(result['outputs']['text'], "Report\n\nTotal: 3\n\nDetail")
+        self.assertEqual(result['outputs']['outline_json']['title'], 'Report')
+        self.assertEqual(result['outputs']['outline_json']['sections'][0]['children'][0]['title'], 'Detail')
+
+    def test_conversion_is_coalesced_by_content(self):
+        """prueba que la conversión pasa por el single-flight con key por contenido"""
+        with patch('src.core.converters.get_singleflight') as mock_get_flight:
+            mock_get_flight.return_value.do.return_value = ({'markdown': 'x', 'metadata': {}}, True)
+
+            result = convert_to_markdown("Test content", "test.txt")
+
+            key = mock_get_flight.return_value.do.call_args[0][0]
+
+        self.assertTrue(key.startswith(get_content_hash("Test content")))
+        self.assertTrue(result['metadata']['coalesced'])
+
+    def test_coalesced_result_keeps_own_output_options(self):
+        """prueba que las salidas derivadas del líder no llegan a quien comparte su conversión"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        results = {}
+
+        def slow_convert(*args):
+            started.set()
+            release.wait(5)
+            return {'markdown': '# Title\n\nBody', 'metadata': {}}
+
+        def call(name, **options):
+            results[name] = convert_to_markdown("same content", "doc.md", **options)
+
+        with patch('src.core.converters.get_singleflight', return_value=flight), \
+                patch('src.core.converters._convert_to_markdown', side_effect=slow_convert):
+            leader = threading.Thread(target=call, args=('leader',), kwargs={'index': True, 'chunking': 64})
+            leader.start()
+            self.assertTrue(started.wait(5))
+            follower = threading.Thread(target=call, args=('follower',), kwargs={'index': False, 'chunking': False})
+            follower.start()
+            while flight.stats()['coalesced'] < 1:
+                threading.Event().wait(0.001)
+            release.set()
+            leader.join(5)
+            follower.join(5)
+
+        self.assertIn('index', results['leader'])
+        self.assertIn('chunks', results['leader'])
+        self.assertTrue(results['follower']['metadata']['coalesced'])
+        self.assertNotIn('index', results['follower'])
+        self.assertNotIn('chunks', results['follower'])
+        self.assertNotIn('coalesced', results['leader']['metadata'])
+
+    def test_partial_result_is_not_shared(self):
+        """prueba que un resultado cortado por el plazo de otra invocación no se comparte"""
+        partial = {'markdown': 'x', 'metadata': {}, 'partial': True, 'resume': {'page': 1}}
+        with patch('src.core.converters.get_singleflight') as mock_get_flight:
+            mock_get_flight.return_value.do.return_value = (partial, True)
+
+            result = convert_to_markdown("Test content", "test.txt")
+
+        self.assertNotIn('partial', result)
+        self.assertNotIn('coalesced', result['metadata'])
+        self.assertIn('Test content', result['markdown'])
+
+    def test_deadline_keeps_markitdown_pdf_engine(self):
+        """prueba que con plazo un pdf con tablas da la misma salida que sin él"""
+        rows = [(b'Item', b'Qty', b'Price')] + [(b'Product%d' % i, b'%d' % i, b'%d.50' % i) for i in range(1, 9)]
+        cells = b''.join(b'1 0 0 1 %d %d Tm (%s) Tj ' % (72 + c * 150, 700 - r * 18, cell)
+                         for r, row in enumerate(rows) for c, cell in enumerate(row))
+        content = build_pdf(b'BT /F1 11 Tf ' + cells + b'ET')
+
+        with_deadline = convert_to_markdown(content, 'table.pdf', deadline=Deadline(lambda: 60000, 1000))
+        without = convert_to_markdown(content, 'table.pdf')
+
+        self.assertIn('| Product1 | 1   | 1.50  |', with_deadline['markdown'])
+        self.assertEqual(with_deadline['markdown'], without['markdown'])
+
+    def test_path_input_is_memory_mapped(self):
+        """prueba que una ruta se mapea y llega a convert_stream como stream sin copia"""
+        with tempfile.NamedTemporaryFile(suffix='.bin', delete=False) as tmp:
+            tmp.write(b'\x00\x01binary payload\xff')
+        self.addCleanup(os.unlink, tmp.name)
+
+        with patch_markitdown() as mock_markitdown:
+            mock_markitdown.convert_stream.side_effect = lambda stream, **kwargs: MagicMock(
+                text_content=stream.read().decode('latin-1'), title=None
+            )
+            result = convert_to_markdown(Path(tmp.name), 'payload.bin')
+
+            stream = mock_markitdown.convert_stream.call_args[0][0]
+            mock_markitdown.convert.assert_not_called()
+
+        self.assertIsInstance(stream, MmapReader)
+        self.assertEqual(mock_markitdown.convert_stream.call_args[1]['file_extension'], '.bin')
+        self.assertIn('binary payload', result['markdown'])
+
+    def test_path_input_real_conversion(self):
+        """prueba una conversión real desde un archivo mapeado"""
+        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp:
+            tmp.write(b'a,b\n1,2\n')
+        self.addCleanup(os.unlink, tmp.name)
+
+        result = convert_to_markdown(Path(tmp.name), 'data.csv')
+
+        self.assertIn('| a | b |', result['markdown'])
+
+    def test_conversion_cost_is_observed(self):
+        """prueba que con COST_MODEL las conversiones propias alimentan el modelo"""
+        config = {'COST_MODEL': True}
+
+        def config_bool(key, default=False):
+            return config.get(key, default)
+
+        with patch('src.core.converters.get_config_bool', side_effect=config_bool), \
+                patch('src.core.converters.get_cost_model') as mock_model, \
+                patch('src.core.converters.get_singleflight') as mock_get_flight:
+            mock_get_flight.return_value.do.return_value = ({'markdown': 'x', 'metadata': {}}, False)
+            convert_to_markdown("Test content", "test.txt", image_policy='drop')
+
+            mock_get_flight.return_value.do.return_value = ({'markdown': 'x', 'metadata': {}}, True)
+            convert_to_markdown("Test content", "test.txt")
+
+        mock_model.return_value.observe.assert_called_once()
+        features, seconds, _ = mock_model.return_value.observe.call_args[0]
+        self.assertEqual((features['format'], features['profile']), ('text', 'drop'))
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_conversion_cost_reuses_given_features(self):
+        """prueba que las características ya calculadas por el llamante no se recalculan"""
+        features = {'format': 'pdf', 'size_mb': 1.0, 'pages': 3, 'profile': 'default'}
+
+        def config_bool(key, default=False):
+            return True if key == 'COST_MODEL' else default
+
+        with patch('src.core.converters.get_config_bool', side_effect=config_bool), \
+                patch('src.core.converters.get_cost_model') as mock_model, \
+                patch('src.core.converters.conversion_features') as mock_features:
+            convert_to_markdown("Test content", "test.txt", features=features)
+
+        mock_features.assert_not_called()
+        self.assertIs(mock_model.return_value.observe.call_args[0][0], features)
+
+    def test_failed_content_is_not_reconverted(self):
+        """prueba que un contenido que falló devuelve el mismo error, cacheado, sin convertir"""
+        with patch_markitdown() as mock_markitdown:
+            mock_markitdown.convert_stream.side_effect = ValueError("bad table")
+
+            with self.assertRaises(Exception) as first:
+                convert_to_markdown("broken", "broken.csv")
+            with self.assertRaises(Exception) as cached:
+                convert_to_markdown("broken", "broken.csv")
+
+            self.assertEqual(mock_markitdown.convert_stream.call_count, 1)
+
+        self.assertNotIsInstance(cached.exception, ConversionError)
+        self.assertEqual(str(cached.exception), str(first.exception))
+
+    def test_cached_failure_is_per_options(self):
+        """prueba que un fallo con unas opciones no impide convertir con otras"""
+        with patch_markitdown() as mock_markitdown:
+            mock_markitdown.convert_stream.side_effect = ValueError("bad")
+
+            with self.assertRaises(Exception):
+                convert_to_markdown("broken", "broken.csv", image_policy='drop')
+            mock_markitdown.convert_stream.side_effect = None
+            mock_markitdown.convert_stream.return_value = MagicMock(text_content='a,b', title=None)
+
+            result = convert_to_markdown("broken", "broken.csv", image_policy='inline')
+
+        self.assertEqual(result['markdown'], 'a,b')
+
+    def test_stage_timings_in_metadata(self):
+        """prueba que la conversión recorre las etapas y anota sus tiempos"""
+        result = convert_to_markdown("Test content", "test.txt")
+
+        self.assertEqual(list(result['metadata']['timings']), ['ingest', 'detect', 'convert', 'postprocess'])
+
+    def test_swapped_detector(self):
+        """prueba que una etapa del pipeline de conversión se puede sustituir"""
+        def detect(item):
+            item['digest'] = 'fixed'
+            item['failure_key'] = 'fixed'
+
+        pipeline = get_conversion_pipeline().replace(FunctionStage('detect', detect))
+        self.addCleanup(set_conversion_pipeline, None)
+        set_conversion_pipeline(pipeline)
+
+        with patch('src.core.converters.get_content_hash') as mock_hash:
+            result = convert_to_markdown("Test content", "test.txt")
+
+        mock_hash.assert_not_called()
+        self.assertIn('Test content', result['markdown'])
+
     def test_metadata_completeness(self):
         """verificar que metadata esté completa"""
         result = convert_to_markdown("Test content", "test.txt")
@@ -0,0 +1,184 @@
+import json
+import random
+import threading
+import unittest
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from src.core.cost_model import CostModel, S3ModelStore, conversion_features, fit, merge_models
+from tests.fixtures import FakeS3Client, build_pdf
+
+
+def features(size_mb, pages=0, fmt='pdf', profile='default'):
+    """características de una conversión de prueba"""
+    return {'format': fmt, 'size_mb': size_mb, 'pages': pages, 'profile': profile}
+
+
+class TestCostModel(unittest.TestCase):
+    """pruebas para el modelo de coste aprendido"""
+
+    def test_fit_recovers_linear_cost(self):
+        """prueba que la regresión recupera coeficientes exactos"""
+        model = CostModel(min_samples=5)
+        for size_mb, pages in [(1, 2), (2, 10), (5, 3), (8, 40), (3, 25), (10, 1)]:
+            model.observe(features(size_mb, pages), 0.5 + 0.2 * size_mb + 0.1 * pages)
+
+        prediction = model.predict(features(20, 100))
+
+        assert prediction is not None
+        self.assertAlmostEqual(prediction['seconds'], 0.5 + 4 + 10, places=1)
+        self.assertAlmostEqual(prediction['lower_bound'], prediction['seconds'], places=1)
+        self.assertEqual(prediction['model'], 'pdf:default')
+        self.assertEqual(prediction['samples'], 6)
+
+    def test_noise_widens_lower_bound(self):
+        """prueba que el residuo baja la cota inferior"""
+        rng = random.Random(7)
+        model = CostModel(min_samples=5)
+        for _ in range(50):
+            size_mb = rng.uniform(0, 10)
+            model.observe(features(size_mb), 1 + size_mb + rng.gauss(0, 2))
+
+        prediction = model.predict(features(5))
+
+        assert prediction is not None
+        self.assertLess(prediction['lower_bound'], prediction['seconds'] - 2)
+
+    def test_predict_needs_min_samples(self):
+        """prueba que sin observaciones suficientes no se predice"""
+        model = CostModel(min_samples=3)
+        model.observe(features(1), 1.0)
+        model.observe(features(2), 2.0)
+
+        self.assertIsNone(model.predict(features(3)))
+        self.assertIsNone(CostModel().predict(features(3)))
+
+    def test_falls_back_to_format_model(self):
+        """prueba que un perfil sin datos usa el modelo del formato"""
+        model = CostModel(min_samples=3)
+        for size_mb in (1, 2, 3):
+            model.observe(features(size_mb, profile='default'), size_mb * 2.0)
+
+        prediction = model.predict(features(4, profile='external'))
+
+        assert prediction is not None
+        self.assertEqual(prediction['model'], 'pdf')
+        self.assertAlmostEqual(prediction['seconds'], 8.0, places=1)
+        self.assertIsNone(model.predict(features(4, fmt='docx')))
+
+    def test_peak_memory_is_reported(self):
+        """prueba que se guarda el mayor pico de memoria observado"""
+        model = CostModel(min_samples=2)
+        model.observe(features(1), 1.0, memory_mb=200)
+        model.observe(features(2), 2.0, memory_mb=350)
+
+        prediction = model.predict(features(1))
+        assert prediction is not None
+        self.assertEqual(prediction['peak_memory_mb'], 350)
+
+    def test_fit_singular_features(self):
+        """prueba que tamaños iguales y sin páginas no rompen el ajuste"""
+        model = CostModel(min_samples=2)
+        for _ in range(3):
+            model.observe(features(1), 2.0)
+
+        prediction = model.predict(features(1))
+        assert prediction is not None
+        self.assertAlmostEqual(prediction['seconds'], 2.0, places=2)
+
+    def test_refresh_merges_instances_without_double_counting(self):
+        """prueba que dos instancias suman lo aprendido a través del almacén"""
+        s3_client = FakeS3Client()
+        first = CostModel(store=S3ModelStore(s3_client, 'bucket'), refresh_seconds=3600, min_samples=1)
+        second = CostModel(store=S3ModelStore(s3_client, 'bucket'), refresh_seconds=3600, min_samples=1)
+
+        first.observe(features(1), 1.0)
+        first.observe(features(2), 2.0)
+        first.refresh()
+        second.observe(features(3), 3.0)
+        second.refresh()
+        first.refresh()
+
+        document = json.loads(s3_client.objects['models/cost-model.json'])
+        self.assertEqual(document['models']['pdf']['n'], 3)
+        self.assertEqual(first.stats()['pdf'], 3)
+        self.assertEqual(second.stats()['pdf'], 3)
+
+    def test_refresh_is_periodic(self):
+        """prueba que el almacén solo se lee al empezar y al vencer el intervalo"""
+        store = MagicMock()
+        store.load.return_value = {}
+        model = CostModel(store=store, refresh_seconds=3600)
+
+        model.predict(features(1))
+        model.wait()
+        model.observe(features(1), 1.0)
+        model.predict(features(1))
+        model.wait()
+
+        store.load.assert_called_once()
+        store.save.assert_not_called()
+
+    def test_refresh_does_not_block_requests(self):
+        """prueba que observar y predecir no esperan a que el almacén responda"""
+        loading = threading.Event()
+        release = threading.Event()
+
+        def slow_load():
+            loading.set()
+            release.wait(5)
+            return {}
+        store = MagicMock()
+        store.load.side_effect = slow_load
+        model = CostModel(store=store, refresh_seconds=3600, min_samples=1)
+
+        model.observe(features(1), 1.0)
+        self.assertTrue(loading.wait(5))
+        model.observe(features(2), 2.0)
+        prediction = model.predict(features(3))
+        release.set()
+        model.wait()
+
+        assert prediction is not None
+        self.assertEqual(prediction['samples'], 2)
+        store.load.assert_called_once()
+        self.assertEqual(store.save.call_args[0][0]['pdf']['n'], 1)
+        self.assertEqual(model.stats()['pdf'], 2)
+
+    def test_store_error_keeps_observations(self):
+        """prueba que un fallo del almacén no pierde las observaciones locales"""
+        store = MagicMock()
+        store.load.side_effect = ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'denied'}}, 'GetObject')
+        model = CostModel(store=store, refresh_seconds=0, min_samples=1)
+
+        model.observe(features(1), 1.0)
+        model.wait()
+        model.observe(features(2), 2.0)
+        model.wait()
+
+        self.assertEqual(model.stats()['pdf'], 2)
+        store.load.side_effect = None
+        store.load.return_value = {}
+        model.refresh()
+        self.assertEqual(store.save.call_args[0][0]['pdf']['n'], 2)
+
+    def test_fit_needs_two_observations(self):
+        """prueba que una sola observación no se ajusta"""
+        stats = {'n': 1, 'xtx': [[1, 1, 0], [1, 1, 0], [0, 0, 0]], 'xty': [1, 1, 0], 'yy': 1, 'peak_memory_mb': 0}
+
+        self.assertIsNone(fit(stats))
+        self.assertEqual(merge_models({'pdf': stats}, {'pdf': stats})['pdf']['n'], 2)
+
+    def test_conversion_features(self):
+        """prueba las características de un pdf y de contenido sin formato conocido"""
+        pdf = conversion_features(build_pdf(b'BT ET', pages=4), 'a.pdf', 'external')
+        self.assertEqual((pdf['format'], pdf['pages'], pdf['profile']), ('pdf', 4, 'external'))
+
+        text = conversion_features('hola', None)
+        self.assertEqual((text['format'], text['pages'], text['profile']), ('text', 0, 'default'))
+
+        corrupt = conversion_features(b'PK\x03\x04' + b'\x00' * 40, 'a.docx')
+        self.assertEqual(corrupt['format'], 'docx')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from src.core.deadline import Deadline, deadline_from_context
+
+
+class TestDeadline(unittest.TestCase):
+    """pruebas para el plazo de la invocación"""
+
+    def test_expired_when_below_margin(self):
+        """prueba que el plazo vence al bajar del margen"""
+        self.assertFalse(Deadline(lambda: 5000, 1000).expired())
+        self.assertTrue(Deadline(lambda: 1000, 1000).expired())
+
+    @patch('src.core.deadline.get_config_int', return_value=2000)
+    def test_from_lambda_context(self, mock_config):
+        """prueba que se crea a partir del contexto de lambda"""
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = 1500
+
+        deadline = deadline_from_context(context)
+
+        self.assertIsNotNone(deadline)
+        assert deadline is not None
+        self.assertEqual(deadline.margin_ms, 2000)
+        self.assertTrue(deadline.expired())
+
+    @patch('src.core.deadline.get_config_int', return_value=0)
+    def test_disabled_without_margin(self, mock_config):
+        """prueba que sin margen configurado no hay plazo"""
+        self.assertIsNone(deadline_from_context(MagicMock()))
+
+    @patch('src.core.deadline.get_config_int', return_value=2000)
+    def test_no_context(self, mock_config):
+        """prueba que sin contexto no hay plazo"""
+        self.assertIsNone(deadline_from_context(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
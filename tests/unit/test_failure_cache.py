@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+from src.core.exceptions import ConversionError
+from src.core.failure_cache import NegativeCache, is_deterministic_failure
+
+
+class TestFailureCache(unittest.TestCase):
+    """pruebas para la caché negativa de conversiones fallidas"""
+
+    def test_records_and_raises_conversion_error(self):
+        """prueba que el error cacheado conserva tipo, código y detalles"""
+        cache = NegativeCache()
+        cache.record('abc:pdf', ConversionError("Encrypted", error_type='pdf_encrypted', details={'version': '1.7'}))
+
+        with self.assertRaises(ConversionError) as ctx:
+            cache.raise_if_cached('abc:pdf')
+
+        self.assertEqual(ctx.exception.error_type, 'pdf_encrypted')
+        self.assertEqual(ctx.exception.status_code, 422)
+        self.assertEqual(ctx.exception.details['version'], '1.7')
+        self.assertTrue(ctx.exception.details['cached'])
+        self.assertEqual(cache.stats()['hits'], {'pdf_encrypted': 1})
+
+    def test_generic_errors_use_exception_name(self):
+        """prueba que los errores genéricos se guardan con el nombre de la excepción"""
+        cache = NegativeCache()
+        cache.record('abc:docx', ValueError("bad xml"))
+
+        entry = cache.get('abc:docx')
+
+        self.assertIsNotNone(entry)
+        assert entry is not None
+        self.assertEqual(entry['error_type'], 'ValueError')
+        self.assertEqual(entry['error'], 'bad xml')
+
+    def test_generic_errors_replayed_as_generic(self):
+        """prueba que un error genérico se relanza con el mismo mensaje y sin volverse un 422"""
+        cache = NegativeCache()
+        cache.record('abc:docx', ValueError("bad xml"))
+
+        with self.assertRaises(Exception) as ctx:
+            cache.raise_if_cached('abc:docx')
+
+        self.assertNotIsInstance(ctx.exception, ConversionError)
+        self.assertEqual(str(ctx.exception), "Error converting to markdown: bad xml")
+
+    def test_transient_errors_are_not_cached(self):
+        """prueba que los timeouts y errores de aws no se recuerdan"""
+        cache = NegativeCache()
+        cache.record('a', TimeoutError("pool busy"))
+        cache.record('b', ClientError({'Error': {'Code': 'SlowDown'}}, 'GetObject'))
+
+        self.assertFalse(is_deterministic_failure(MemoryError()))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_entries_expire(self):
+        """prueba que las entradas caducan tras el ttl"""
+        cache = NegativeCache(ttl_seconds=10)
+        with patch('src.core.failure_cache.time.monotonic', return_value=100.0):
+            cache.record('abc', ValueError("bad"))
+        with patch('src.core.failure_cache.time.monotonic', return_value=111.0):
+            self.assertIsNone(cache.get('abc'))
+
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_lru_eviction(self):
+        """prueba que se descartan los fallos menos usados al superar el máximo"""
+        cache = NegativeCache(max_entries=2)
+        cache.record('a', ValueError())
+        cache.record('b', ValueError())
+        cache.get('a')
+        cache.record('c', ValueError())
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_zero_ttl_disables_cache(self):
+        """prueba que un ttl de 0 desactiva la caché"""
+        cache = NegativeCache(ttl_seconds=0)
+        cache.record('a', ValueError())
+
+        cache.raise_if_cached('a')
+        self.assertEqual(cache.stats()['entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from src.core.formats import build_outline, markdown_to_text, render_formats, resolve_formats
+
+
+class TestFormats(unittest.TestCase):
+    """pruebas para los formatos de salida derivados del markdown"""
+
+    def test_resolve_formats(self):
+        """prueba que markdown siempre se incluye y en orden canónico"""
+        self.assertEqual(resolve_formats(None), ('markdown',))
+        self.assertEqual(resolve_formats('outline_json,text'), ('markdown', 'text', 'outline_json'))
+        self.assertEqual(resolve_formats(['text']), ('markdown', 'text'))
+        with self.assertRaises(ValueError):
+            resolve_formats(['pdf'])
+
+    def test_markdown_to_text(self):
+        """prueba que se quita el marcado y se conservan los bloques de código"""
+        markdown = (
+            "# Title *one*\n\n> quoted **bold** my_var and _it_\n\n"
+            "| a | b\\|c |\n| --- | --- |\n| [link](http://x) | ![alt](img.png) |\n\n"
+            "```python\n# not a heading\n```"
+        )
+
+        text = markdown_to_text(markdown)
+
+        self.assertEqual(
+            text,
+            "Title one\n\nquoted bold my_var and it\n\na\tb|c\nlink\talt\n\n# not a heading"
+        )
+
+    def test_outline_nests_sections(self):
+        """prueba que el esquema anida las secciones por nivel con sus offsets"""
+        markdown = "# Doc\n\n## A\n\n### A.1\n\n## B"
+
+        outline = build_outline(markdown)
+
+        self.assertEqual(outline['title'], 'Doc')
+        doc = outline['sections'][0]
+        self.assertEqual([s['title'] for s in doc['children']], ['A', 'B'])
+        self.assertEqual(doc['children'][0]['children'][0]['title'], 'A.1')
+        self.assertEqual(doc['children'][1]['end'], len(markdown.encode('utf-8')))
+
+    def test_render_formats_skips_markdown(self):
+        """prueba que solo se generan los formatos adicionales"""
+        self.assertEqual(render_formats("# A", ('markdown',)), {})
+        self.assertEqual(set(render_formats("# A", ('markdown', 'text', 'outline_json'))), {'text', 'outline_json'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import codecs
+import unittest
+from src.core.html_stream import StreamingHtmlConverter, convert_html_streaming, sniff_html_encoding
+
+
+class TestStreamingHtmlConverter(unittest.TestCase):
+    """pruebas para el conversor html incremental"""
+
+    def test_headings_and_paragraphs(self):
+        """prueba emisión de encabezados y párrafos al cerrarse"""
+        html = '<h1>Título</h1><p>Primer <b>párrafo</b></p><h2>Sección</h2><p>Texto</p>'
+        result = convert_html_streaming(html)
+
+        self.assertEqual(
+            result.markdown,
+            '# Título\n\nPrimer **párrafo**\n\n## Sección\n\nTexto'
+        )
+
+    def test_skips_script_style_and_nav(self):
+        """prueba que script, style y nav se descartan completos"""
+        html = (
+            '<html><head><title>Doc</title><style>p { color: red }</style></head>'
+            '<body><nav><ul><li>Inicio</li><nav>otro</nav></ul></nav>'
+            '<script>document.write("<p>oculto</p>")</script>'
+            '<p>visible</p></body></html>'
+        )
+        result = convert_html_streaming(html)
+
+        self.assertEqual(result.markdown, 'visible')
+        self.assertEqual(result.title, 'Doc')
+
+    def test_lists_links_and_tables(self):
+        """prueba listas, enlaces y tablas"""
+        html = (
+            '<ul><li>uno<li>dos <a href="https://example.com">enlace</a></ul>'
+            '<table><tr><th>A</th><th>B</th></tr><tr><td>1</td><td>2</td></tr></table>'
+        )
+        result = convert_html_streaming(html)
+
+        self.assertIn('- uno\n- dos [enlace](https://example.com)', result.markdown)
+        self.assertIn('| A | B |\n| --- | --- |\n| 1 | 2 |', result.markdown)
+
+    def test_blocks_inside_cells_and_items(self):
+        """prueba que los bloques dentro de celdas y elementos de lista son parte de ellos"""
+        html = (
+            '<table><tr><th>A</th><th>B</th></tr>'
+            '<tr><td><div>x</div></td><td><p>y</p><p>z</p></td></tr></table>'
+            '<ul><li><p>one</p></li><li><p>two</p><p>more</p></li></ul><p>after</p>'
+        )
+        result = convert_html_streaming(html)
+
+        self.assertEqual(
+            result.markdown,
+            '| A | B |\n| --- | --- |\n| x | y z |\n\n- one\n- two\n  more\n\nafter'
+        )
+
+    def test_bytes_encoding_from_bom_and_meta(self):
+        """prueba que la codificación de los bytes sale del bom o de <meta charset>"""
+        latin1 = '<html><head><meta charset="iso-8859-1"></head><body><p>café</p></body></html>'
+        http_equiv = '<meta http-equiv="Content-Type" content="text/html; charset=windows-1252"><p>café</p>'
+
+        self.assertEqual(convert_html_streaming(latin1.encode('latin-1'), chunk_size=8).markdown, 'café')
+        self.assertEqual(convert_html_streaming(http_equiv.encode('cp1252')).markdown, 'café')
+        self.assertEqual(convert_html_streaming(codecs.BOM_UTF8 + '<p>café</p>'.encode('utf-8')).markdown, 'café')
+        self.assertEqual(convert_html_streaming('<p>café ñandú</p>'.encode('utf-16')).markdown, 'café ñandú')
+        # una declaración desconocida se ignora y decide la detección
+        codecs.lookup(sniff_html_encoding(b'<meta charset="no-such-codec"><p>ok</p>'))
+
+    def test_preformatted_text(self):
+        """prueba que pre conserva espacios y se emite como bloque de código"""
+        html = '<pre><code>def f():\n    return 1</code></pre>'
+        result = convert_html_streaming(html)
+
+        self.assertEqual(result.markdown, '```\ndef f():\n    return 1\n```')
+
+    def test_chunked_bytes_input(self):
+        """prueba que el resultado no depende del tamaño de bloque"""
+        html = '<p>Camión &amp; más</p><p>ñandú</p>'.encode('utf-8')
+        expected = convert_html_streaming(html).markdown
+
+        for chunk_size in (1, 3, 7):
+            result = convert_html_streaming(html, chunk_size=chunk_size)
+            self.assertEqual(result.markdown, expected)
+        self.assertEqual(expected, 'Camión & más\n\nñandú')
+
+    def test_unclosed_blocks_flushed_on_close(self):
+        """prueba que los bloques sin cerrar se emiten al final"""
+        converter = StreamingHtmlConverter()
+        converter.feed('<div><p>sin cerrar')
+        converter.close()
+
+        self.assertEqual(converter.getvalue(), 'sin cerrar')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import base64
+import hashlib
+import unittest
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from src.core.images import ImageStore, apply_image_policy
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\nfake-image'
+PNG_URI = 'data:image/png;base64,' + base64.b64encode(PNG_BYTES).decode('ascii')
+PNG_DIGEST = hashlib.sha256(PNG_BYTES).hexdigest()
+
+
+def _not_found(*args, **kwargs):
+    raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+
+
+class TestApplyImagePolicy(unittest.TestCase):
+    """pruebas para la política de imágenes embebidas"""
+
+    def setUp(self):
+        """markdown con la misma imagen repetida"""
+        self.markdown = f'# Doc\n\n![logo]({PNG_URI})\n\ntexto\n\n![logo]({PNG_URI})\n'
+
+    def test_inline_keeps_markdown(self):
+        """prueba que inline no modifica el texto"""
+        markdown, stats = apply_image_policy(self.markdown, 'inline')
+
+        self.assertEqual(markdown, self.markdown)
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['bytes_removed'], 0)
+
+    def test_drop_removes_data_uris(self):
+        """prueba que drop elimina las imágenes embebidas"""
+        markdown, stats = apply_image_policy(self.markdown, 'drop')
+
+        self.assertNotIn('data:', markdown)
+        self.assertIn('texto', markdown)
+        self.assertEqual(stats['bytes_removed'], len(self.markdown) - len(markdown))
+
+    def test_external_uploads_each_image_once(self):
+        """prueba que external sube una sola vez cada imagen y la enlaza"""
+        s3_client = MagicMock()
+        s3_client.head_object.side_effect = _not_found
+        store = ImageStore(s3_client, 'test-bucket')
+
+        markdown, stats = apply_image_policy(self.markdown, 'external', store)
+
+        expected_key = f'images/{PNG_DIGEST}.png'
+        s3_client.put_object.assert_called_once()
+        put_args = s3_client.put_object.call_args[1]
+        self.assertEqual(put_args['Key'], expected_key)
+        self.assertEqual(put_args['Body'], PNG_BYTES)
+        self.assertEqual(put_args['ContentType'], 'image/png')
+        self.assertEqual(markdown.count(f'![logo](s3://test-bucket/{expected_key})'), 2)
+        self.assertEqual(stats['unique'], 1)
+
+    def test_external_skips_existing_images(self):
+        """prueba que no se vuelve a subir una imagen existente"""
+        s3_client = MagicMock()
+        store = ImageStore(s3_client, 'test-bucket', base_url='https://cdn.example.com/')
+
+        markdown, _ = apply_image_policy(self.markdown, 'external', store)
+
+        s3_client.put_object.assert_not_called()
+        self.assertIn(f'https://cdn.example.com/images/{PNG_DIGEST}.png', markdown)
+
+    def test_external_leaves_truncated_uris(self):
+        """prueba que los data uri truncados no se suben"""
+        markdown = '![x](data:image/png;base64...)'
+        store = ImageStore(MagicMock(), 'test-bucket')
+
+        result, stats = apply_image_policy(markdown, 'external', store)
+
+        self.assertEqual(result, markdown)
+        self.assertEqual(stats['unique'], 0)
+
+    def test_external_does_not_upload_active_content(self):
+        """prueba que html y svg embebidos no se suben al bucket"""
+        html = base64.b64encode(b'<script>alert(1)</script>').decode('ascii')
+        markdown = f'![a](data:text/html;base64,{html})\n![b](data:image/svg+xml;base64,{html})'
+        s3_client = MagicMock()
+        store = ImageStore(s3_client, 'test-bucket')
+
+        result, stats = apply_image_policy(markdown, 'external', store)
+
+        s3_client.put_object.assert_not_called()
+        self.assertEqual(result, markdown)
+        self.assertEqual(stats['unique'], 0)
+
+    def test_store_forces_safe_content_type(self):
+        """prueba que el almacén no sirve tipos distintos de imágenes raster con su content type"""
+        s3_client = MagicMock()
+        s3_client.head_object.side_effect = _not_found
+        store = ImageStore(s3_client, 'test-bucket')
+
+        store.put_many({'digest': (b'<svg onload="alert(1)"/>', 'image/svg+xml')})
+
+        put_args = s3_client.put_object.call_args[1]
+        self.assertEqual(put_args['ContentType'], 'application/octet-stream')
+        self.assertEqual(put_args['Key'], 'images/digest.bin')
+
+    def test_invalid_policy(self):
+        """prueba error con política desconocida"""
+        with self.assertRaises(ValueError):
+            apply_image_policy(self.markdown, 'unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import io
+import unittest
+from markitdown import MarkItDown
+from src.core.incremental import append_tail, build_state, tail_start
+from src.utils.utils import get_file_extension
+
+
+def convert(content, filename):
+    """convierte con markitdown directamente"""
+    extension = '.' + (get_file_extension(filename) or 'txt')
+    return MarkItDown().convert_stream(io.BytesIO(content), file_extension=extension).text_content
+
+
+class TestIncremental(unittest.TestCase):
+    """pruebas para el render incremental de colas"""
+
+    def assertAppendMatchesFull(self, first, grown, filename):
+        """verifica que añadir la cola da lo mismo que convertir entero"""
+        markdown = convert(first, filename)
+        state = build_state(first, markdown, get_file_extension(filename))
+        self.assertIsNotNone(state)
+        assert state is not None
+
+        appended = append_tail(state, grown[tail_start(state):], markdown)
+        self.assertIsNotNone(appended)
+        assert appended is not None
+        self.assertEqual(appended[0], convert(grown, filename))
+        self.assertEqual(appended[1]['offset'], len(grown))
+        return appended[1]
+
+    def test_log_lines_with_partial_line(self):
+        """prueba logs con una línea a medio escribir y líneas en blanco"""
+        state = self.assertAppendMatchesFull(
+            b'start  \n\n\nrunning',
+            b'start  \n\n\nrunning step 2\n\n\n\ndone\n',
+            'app.log'
+        )
+        self.assertEqual(state['pending'], '')
+
+    def test_csv_rows_with_escaping_and_blank_rows(self):
+        """prueba filas csv con pipes, comillas y filas vacías pendientes"""
+        self.assertAppendMatchesFull(
+            b'a,b,c\n1,x|y,3\n\n',
+            b'a,b,c\n1,x|y,3\n\n"q ""z""",2\n4\n',
+            'data.csv'
+        )
+
+    def test_wider_csv_row_requires_full_conversion(self):
+        """prueba que una fila más ancha que la cabecera obliga a reconvertir"""
+        first = b'a,b\n1,2\n'
+        state = build_state(first, convert(first, 'data.csv'), 'csv')
+        assert state is not None
+
+        self.assertIsNone(append_tail(state, first + b'1,2,3\n', convert(first, 'data.csv')))
+
+    def test_changed_prefix_is_rejected(self):
+        """prueba que se detecta un prefijo distinto"""
+        first = b'one\ntwo\n'
+        state = build_state(first, convert(first, 'a.txt'), 'txt')
+        assert state is not None
+
+        self.assertIsNone(append_tail(state, b'ONE\ntwo\nthree\n', convert(first, 'a.txt')))
+
+    def test_no_state_when_render_differs(self):
+        """prueba que no se crea estado si el markdown no coincide con el render"""
+        self.assertIsNone(build_state(b'one\n', 'one\n\n<!-- edited -->', 'txt'))
+        self.assertIsNone(build_state(b'%PDF', '', 'pdf'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import base64
+import io
+import mmap
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+from src.core.archive_guard import inspect_zip
+from src.core.inputs import ConversionInput, InputBuffer, MmapReader, open_binary
+from src.core.inspection import inspect_document
+from src.core.pdf_triage import PDF_OK, triage_pdf
+from tests.fixtures import build_pdf
+
+
+class TestInputs(unittest.TestCase):
+    """pruebas para la entrada mapeada en memoria"""
+
+    def write(self, data, suffix=''):
+        """escribe un archivo temporal que se borra al terminar la prueba"""
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            tmp.write(data)
+        self.addCleanup(os.unlink, tmp.name)
+        return tmp.name
+
+    def test_mmap_reader(self):
+        """prueba lectura, seek y tell sobre el mmap"""
+        with ConversionInput.from_path(self.write(b'0123456789')) as source:
+            reader = source.open()
+
+            assert isinstance(reader, MmapReader)
+            self.assertTrue(reader.seekable())
+            self.assertEqual(reader.read(3), b'012')
+            self.assertEqual(reader.seek(-2, io.SEEK_END), 8)
+            self.assertEqual(reader.read(), b'89')
+            self.assertEqual(reader.read(5), b'')
+            reader.seek(4)
+            self.assertEqual(reader.read1(), b'456789')
+
+    def test_from_path_maps_file(self):
+        """prueba que el archivo se mapea y se libera al cerrar"""
+        source = ConversionInput.of(Path(self.write(b'%PDF-1.4')))
+
+        self.assertTrue(source.is_mapped)
+        assert isinstance(source.data, mmap.mmap)
+        self.assertEqual(source.size, 8)
+        self.assertEqual(source.data[:4], b'%PDF')
+        source.close()
+        self.assertTrue(source.data.closed)
+
+    def test_empty_file(self):
+        """prueba que un archivo vacío no se mapea"""
+        source = ConversionInput.from_path(self.write(b''))
+
+        self.assertFalse(source.is_mapped)
+        self.assertEqual(source.data, b'')
+
+    def test_bytes_and_text(self):
+        """prueba que bytes y texto se envuelven sin copiar"""
+        content = b'hola'
+        self.assertIs(ConversionInput.of(content).data, content)
+        self.assertEqual(ConversionInput.of('ñ').open().read(), 'ñ'.encode('utf-8'))
+        self.assertIsInstance(open_binary(content), io.BytesIO)
+
+    def test_input_buffer_in_memory(self):
+        """prueba que por debajo del umbral se entregan los bytes escritos sin copia"""
+        payload = b'x' * 100
+        with InputBuffer(threshold=1000) as buffer:
+            buffer.write(payload)
+
+            self.assertFalse(buffer.spilled)
+            self.assertIs(buffer.getvalue(), payload)
+
+    def test_input_buffer_spills_to_disk(self):
+        """prueba que al superar el umbral queda mapeado y no deja el archivo en /tmp"""
+        with InputBuffer(threshold=10, suffix='.txt') as buffer:
+            buffer.write(b'x' * 8)
+            buffer.write(b'y' * 8)
+            source = buffer.getvalue()
+
+            self.assertTrue(buffer.spilled)
+            assert isinstance(source, ConversionInput) and isinstance(source.data, mmap.mmap)
+            self.assertEqual(buffer.data[:], b'x' * 8 + b'y' * 8)
+            assert source.path is not None
+            self.assertTrue(source.path.endswith('.txt'))
+            self.assertFalse(os.path.exists(source.path))
+            with self.assertRaises(ValueError):
+                buffer.write(b'z')
+        self.assertTrue(source.data.closed)
+
+    def test_input_buffer_stream(self):
+        """prueba la copia por bloques de un stream de tamaño conocido"""
+        with InputBuffer(threshold=10) as buffer:
+            buffer.write_stream(io.BytesIO(b'abc' * 10), size=30)
+            self.assertEqual(buffer.data[:], b'abc' * 10)
+
+    @patch('src.core.inputs.COPY_CHUNK_SIZE', 8)
+    def test_input_buffer_base64_in_blocks(self):
+        """prueba que el base64 grande se decodifica por bloques alineados"""
+        payload = bytes(range(256)) * 3
+        encoded = base64.encodebytes(payload).decode('ascii')
+        with InputBuffer(threshold=64) as buffer:
+            buffer.write_base64(encoded)
+            self.assertTrue(buffer.spilled)
+            self.assertEqual(buffer.data[:], payload)
+
+    def test_input_buffer_close_removes_unfinished_file(self):
+        """prueba que cerrar sin getvalue borra el archivo temporal"""
+        buffer = InputBuffer(threshold=1)
+        buffer.write(b'abc')
+        assert buffer._file is not None
+        path = buffer._file.name
+        buffer.close()
+        self.assertFalse(os.path.exists(path))
+
+    def test_stages_accept_mmap(self):
+        """prueba que el triage, la inspección y el zip leen del mmap"""
+        pdf = build_pdf(b'BT /F1 12 Tf (hola) Tj ET', pages=2)
+        with ConversionInput.from_path(self.write(pdf)) as source:
+            assert isinstance(source.data, mmap.mmap)
+            self.assertEqual(triage_pdf(source.data)['classification'], PDF_OK)
+            self.assertEqual(inspect_document(source.data, 'a.pdf')['pages'], 2)
+
+        encrypted = build_pdf(b'BT ET', encrypt=True)
+        with ConversionInput.from_path(self.write(encrypted)) as source:
+            assert isinstance(source.data, mmap.mmap)
+            self.assertTrue(inspect_document(source.data, 'a.pdf')['encrypted'])
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('a.xml', 'a' * 100)
+        with ConversionInput.from_path(self.write(buffer.getvalue())) as source:
+            assert isinstance(source.data, mmap.mmap)
+            self.assertEqual(inspect_zip(source.data)[0]['uncompressed_bytes'], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
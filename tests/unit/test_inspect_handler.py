@@ -0,0 +1,104 @@
+"""
+tests unitarios para el inspect handler
+"""
+import base64
+import json
+from unittest.mock import patch
+import pytest
+from src.handlers.inspect import InspectHandler
+from tests.fixtures import build_pdf
+
+
+class TestInspectHandler:
+    """tests para InspectHandler"""
+
+    @pytest.fixture
+    def handler(self):
+        """crea una instancia del handler"""
+        return InspectHandler()
+
+    def event(self, body, method='POST', path='/inspect'):
+        """evento http de api gateway v2"""
+        return {
+            'requestContext': {'http': {'method': method, 'path': path}},
+            'rawPath': path,
+            'body': json.dumps(body) if isinstance(body, dict) else body
+        }
+
+    def test_can_handle(self, handler):
+        """verifica que solo maneja post en /inspect"""
+        assert handler.can_handle(self.event({})) is True
+        assert handler.can_handle({'httpMethod': 'POST', 'path': '/inspect'}) is True
+        assert handler.can_handle(self.event({}, method='GET')) is False
+        assert handler.can_handle(self.event({}, path='/convert')) is False
+        assert handler.can_handle({'content': 'x'}) is False
+
+    @patch('src.handlers.inspect.validate_api_key', return_value=True)
+    @patch('src.core.converters.convert_to_markdown')
+    def test_inspect_pdf_without_converting(self, mock_convert, _auth, handler):
+        """verifica que devuelve los metadatos sin convertir"""
+        content = base64.b64encode(build_pdf(b'BT ET', pages=2)).decode()
+
+        response = handler.handle(self.event({'content': content, 'filename': 'a.pdf', 'base64': True}))
+
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['format'] == 'pdf'
+        assert body['pages'] == 2
+        assert 'estimated_seconds' in body
+        assert body['estimate_source'] == 'heuristic'
+        mock_convert.assert_not_called()
+
+    @patch('src.handlers.inspect.validate_api_key', return_value=True)
+    @patch('src.handlers.inspect.get_config_bool', return_value=True)
+    @patch('src.handlers.inspect.get_cost_model')
+    def test_estimate_from_cost_model(self, mock_model, _enabled, _auth, handler):
+        """verifica que la estimación sale del modelo aprendido cuando lo hay"""
+        mock_model.return_value.predict.return_value = {'seconds': 12.5, 'peak_memory_mb': 300.0}
+        content = base64.b64encode(build_pdf(b'BT ET', pages=2)).decode()
+
+        response = handler.handle(self.event({'content': content, 'filename': 'a.pdf', 'base64': True}))
+
+        body = json.loads(response['body'])
+        assert body['estimated_seconds'] == 12.5
+        assert body['estimated_peak_memory_mb'] == 300.0
+        assert body['estimate_source'] == 'model'
+        assert mock_model.return_value.predict.call_args[0][0]['pages'] == 2
+
+    @patch('src.handlers.inspect.validate_api_key', return_value=True)
+    @patch('src.core.inputs.spool_threshold', return_value=64)
+    def test_large_base64_body_spilled_to_disk(self, _threshold, _auth, handler):
+        """verifica que el body en base64 se decodifica en el buffer de entrada, volcado si es grande"""
+        document = build_pdf(b'BT ET', pages=2)
+        envelope = json.dumps({'content': base64.b64encode(document).decode(), 'filename': 'a.pdf', 'base64': True})
+        event = self.event(base64.b64encode(envelope.encode()).decode())
+        event['isBase64Encoded'] = True
+
+        response = handler.handle(event)
+
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['format'] == 'pdf'
+        assert body['pages'] == 2
+        assert body['size'] == len(document)
+
+    @patch('src.handlers.inspect.validate_api_key', return_value=False)
+    def test_unauthorized(self, _auth, handler):
+        """verifica 401 sin api key válida"""
+        assert handler.handle(self.event({'content': 'x'}))['statusCode'] == 401
+
+    @patch('src.handlers.inspect.validate_api_key', return_value=True)
+    def test_missing_content(self, _auth, handler):
+        """verifica 400 sin contenido"""
+        assert handler.handle(self.event({'filename': 'a.pdf'}))['statusCode'] == 400
+        assert handler.handle(self.event(''))['statusCode'] == 400
+
+    @patch('src.handlers.inspect.validate_api_key', return_value=True)
+    def test_corrupt_archive(self, _auth, handler):
+        """verifica el error específico de zip corrupto"""
+        content = base64.b64encode(b'PK\x03\x04' + b'\x00' * 40).decode()
+
+        response = handler.handle(self.event({'content': content, 'filename': 'a.docx', 'base64': True}))
+
+        assert response['statusCode'] == 422
+        assert json.loads(response['body'])['error_type'] == 'archive_corrupt'
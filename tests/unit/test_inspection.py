@@ -0,0 +1,102 @@
+import io
+import unittest
+import zipfile
+from src.core.exceptions import ConversionError
+from src.core.inspection import detect_format, estimate_conversion_seconds, inspect_document
+from tests.fixtures import build_pdf
+
+
+def build_zip(entries):
+    """crea un zip en memoria con las entradas dadas"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class TestInspection(unittest.TestCase):
+    """pruebas para la inspección sin conversión"""
+
+    def test_detect_format(self):
+        """prueba detección por firma y extensión"""
+        self.assertEqual(detect_format(build_pdf(b'BT ET')), 'pdf')
+        self.assertEqual(detect_format(build_zip({'a.txt': 'a'}), 'x.docx'), 'docx')
+        self.assertEqual(detect_format(build_zip({'a.txt': 'a'})), 'zip')
+        self.assertEqual(detect_format(b'<!DOCTYPE html><html></html>'), 'html')
+        self.assertEqual(detect_format('ñandú'.encode('utf-8')), 'text')
+        self.assertEqual(detect_format(b'\xff\xfe\x00\x81\x82' * 10), 'binary')
+
+    def test_pdf_pages_and_images(self):
+        """prueba que las páginas salen del árbol de páginas y las imágenes no se cuentan"""
+        content = build_pdf(b'BT (/Encrypt) Tj ET', pages=3) + b'% /Subtype /Image\n'
+
+        info = inspect_document(content, 'doc.pdf')
+
+        self.assertEqual(info['format'], 'pdf')
+        self.assertEqual(info['pages'], 3)
+        self.assertFalse(info['encrypted'])
+        self.assertIsNone(info['images'])
+        self.assertEqual(info['size'], len(content))
+        self.assertGreater(info['estimated_seconds'], 0)
+
+    def test_encrypted_pdf(self):
+        """prueba que se informa del cifrado sin fallar"""
+        info = inspect_document(build_pdf(b'BT ET', encrypt=True), 'doc.pdf')
+
+        self.assertTrue(info['encrypted'])
+
+    def test_xlsx_sheets(self):
+        """prueba el recuento de hojas desde el directorio central"""
+        content = build_zip({
+            'xl/workbook.xml': '<w/>',
+            'xl/worksheets/sheet1.xml': '<s/>',
+            'xl/worksheets/sheet2.xml': '<s/>',
+            'xl/worksheets/_rels/sheet1.xml.rels': '<r/>',
+            'xl/media/image1.png': 'png'
+        })
+
+        info = inspect_document(content, 'book.xlsx')
+
+        self.assertEqual(info['format'], 'xlsx')
+        self.assertEqual(info['sheets'], 2)
+        self.assertEqual(info['images'], 1)
+        self.assertEqual(info['archive']['entries'], 5)
+
+    def test_pptx_slides(self):
+        """prueba el recuento de diapositivas"""
+        content = build_zip({'ppt/slides/slide1.xml': '<s/>', 'ppt/slides/slide2.xml': '<s/>'})
+
+        info = inspect_document(content, 'deck.bin')
+
+        self.assertEqual(info['format'], 'pptx')
+        self.assertEqual(info['slides'], 2)
+
+    def test_docx_pages_from_app_properties(self):
+        """prueba que las páginas de word salen de docProps/app.xml"""
+        content = build_zip({
+            'word/document.xml': '<w/>',
+            'docProps/app.xml': '<Properties><Pages>7</Pages></Properties>'
+        })
+
+        info = inspect_document(content, 'doc.docx')
+
+        self.assertEqual(info['format'], 'docx')
+        self.assertEqual(info['pages'], 7)
+
+    def test_corrupt_zip(self):
+        """prueba error específico con zip corrupto"""
+        with self.assertRaises(ConversionError) as ctx:
+            inspect_document(b'PK\x03\x04' + b'\x00' * 40, 'doc.docx')
+
+        self.assertEqual(ctx.exception.error_type, 'archive_corrupt')
+
+    def test_estimate_grows_with_size_and_pages(self):
+        """prueba que la estimación crece con el tamaño y las páginas"""
+        small = estimate_conversion_seconds('pdf', 1024, 1)
+        self.assertLess(small, estimate_conversion_seconds('pdf', 10 * 1024 * 1024, 1))
+        self.assertLess(small, estimate_conversion_seconds('pdf', 1024, 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import importlib
+import io
+import sys
+import unittest
+from unittest.mock import patch
+from markitdown import MarkItDown
+from src.core import pdf_pages
+from src.core.deadline import Deadline
+from src.core.pdf_pages import convert_pdf_pages
+from tests.fixtures import build_pdf
+
+TEXT_PAGE = b'BT /F1 12 Tf 72 700 Td (Hello world) Tj ET'
+
+
+def table_page():
+    """contenido de una página con una tabla de tres columnas alineadas"""
+    rows = [(b'Item', b'Qty', b'Price')] + [(b'Product%d' % i, b'%d' % i, b'%d.50' % i) for i in range(1, 9)]
+    cells = b''.join(b'1 0 0 1 %d %d Tm (%s) Tj ' % (72 + c * 150, 700 - r * 18, cell)
+                     for r, row in enumerate(rows) for c, cell in enumerate(row))
+    return b'BT /F1 11 Tf ' + cells + b'ET'
+
+
+def markitdown_text(content):
+    """salida de markitdown para un pdf"""
+    return MarkItDown().convert_stream(io.BytesIO(content), file_extension='.pdf').text_content
+
+
+def countdown(*values):
+    """devuelve los milisegundos restantes indicados en llamadas sucesivas"""
+    remaining = iter(values)
+    return lambda: next(remaining)
+
+
+class TestPdfPages(unittest.TestCase):
+    """pruebas para la conversión de pdfs página a página"""
+
+    def test_matches_markitdown_with_time_left(self):
+        """prueba que con tiempo de sobra el texto coincide con markitdown"""
+        content = build_pdf(TEXT_PAGE, pages=3)
+
+        result, progress = convert_pdf_pages(content, Deadline(lambda: 60000, 1000))
+
+        self.assertEqual(result.text_content, markitdown_text(content))
+        self.assertEqual(progress, {'pages_converted': 3, 'partial': False})
+
+    def test_tables_match_markitdown(self):
+        """prueba que las tablas se extraen con pdfplumber igual que en markitdown"""
+        content = build_pdf(table_page(), pages=2)
+
+        result, progress = convert_pdf_pages(content, Deadline(lambda: 60000, 1000))
+
+        self.assertIn('| Product1 | 1   | 1.50  |', result.text_content)
+        self.assertEqual(result.text_content, markitdown_text(content))
+        self.assertFalse(progress['partial'])
+
+    def test_deadline_in_prose_pass_returns_complete_text(self):
+        """prueba que si el plazo se agota en la pasada de pdfminer se devuelve el documento entero"""
+        content = build_pdf(TEXT_PAGE, pages=3)
+
+        # tres páginas con pdfplumber y la primera comprobación de pdfminer ya sin margen
+        result, progress = convert_pdf_pages(content, Deadline(countdown(5000, 5000, 5000, 500), 1000))
+
+        self.assertEqual(result.text_content.count('Hello world'), 3)
+        self.assertEqual(progress, {'pages_converted': 3, 'partial': False})
+
+    def test_stops_between_pages(self):
+        """prueba que se detiene entre páginas al agotarse el plazo"""
+        content = build_pdf(TEXT_PAGE, pages=3)
+
+        result, progress = convert_pdf_pages(content, Deadline(countdown(5000, 3000, 500), 1000))
+
+        self.assertEqual(result.text_content.count('Hello world'), 2)
+        self.assertTrue(progress['partial'])
+        self.assertEqual(progress['resume_page'], 2)
+        self.assertEqual(progress['pages_converted'], 2)
+
+    def test_missing_private_module_disables_checkpoints(self):
+        """prueba que sin el módulo privado de markitdown se importa igual, sin puntos de control"""
+        try:
+            with patch.dict(sys.modules, {'markitdown.converters._pdf_converter': None}):
+                module = importlib.reload(pdf_pages)
+                self.assertFalse(module.PAGE_CHECKPOINTS_AVAILABLE)
+        finally:
+            importlib.reload(pdf_pages)
+        self.assertTrue(pdf_pages.PAGE_CHECKPOINTS_AVAILABLE)
+
+
+if __name__ == '__main__':
+    unittest.main()
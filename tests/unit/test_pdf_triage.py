@@ -0,0 +1,97 @@
+import os
+import unittest
+from src.core.exceptions import ConversionError
+from src.core.pdf_triage import triage_pdf
+from tests.fixtures import IMAGE_XOBJECT, TEXT_FORM_XOBJECT, build_pdf
+
+TEST_PDF_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'test_files', 'test.pdf')
+
+
+class TestPdfTriage(unittest.TestCase):
+    """pruebas para la clasificación rápida de pdfs"""
+
+    def test_text_pdf_is_ok(self):
+        """prueba que un pdf con capa de texto se clasifica como ok"""
+        with open(TEST_PDF_PATH, 'rb') as f:
+            triage = triage_pdf(f.read())
+
+        self.assertEqual(triage['classification'], 'ok')
+        self.assertEqual(triage['pages'], 1)
+        self.assertFalse(triage['encrypted'])
+
+    def test_image_only_pdf(self):
+        """prueba que un pdf sin fuentes ni operadores de texto es image_only"""
+        content = build_pdf(b'q 612 0 0 792 0 0 cm /Im1 Do Q', fonts=False, xobjects={'Im1': IMAGE_XOBJECT})
+
+        triage = triage_pdf(content)
+
+        self.assertEqual(triage['classification'], 'image_only')
+        self.assertEqual(triage['text_pages'], 0)
+
+    def test_image_only_sample_of_longer_pdf_is_unknown(self):
+        """prueba que sin muestrear todas las páginas un pdf sin texto no se da por escaneado"""
+        content = build_pdf(b'q 612 0 0 792 0 0 cm /Im1 Do Q', fonts=False, pages=5, xobjects={'Im1': IMAGE_XOBJECT})
+
+        triage = triage_pdf(content, sample_pages=3)
+
+        self.assertEqual(triage['classification'], 'unknown')
+        self.assertEqual(triage['sampled_pages'], 3)
+        self.assertEqual(triage['pages'], 5)
+
+    def test_text_inside_form_xobject_is_ok(self):
+        """prueba que el texto dentro de un form xobject cuenta como capa de texto"""
+        content = build_pdf(b'q /Fm1 Do Q', fonts=False, xobjects={'Fm1': TEXT_FORM_XOBJECT})
+
+        triage = triage_pdf(content)
+
+        self.assertEqual(triage['classification'], 'ok')
+        self.assertEqual(triage['text_pages'], 1)
+
+    def test_unresolved_xobject_is_unknown(self):
+        """prueba que una página que dibuja un xobject que no se puede comprobar no es image_only"""
+        content = build_pdf(b'q 612 0 0 792 0 0 cm /Im1 Do Q', fonts=False)
+
+        self.assertEqual(triage_pdf(content)['classification'], 'unknown')
+
+    def test_missing_header(self):
+        """prueba error específico sin cabecera %PDF"""
+        with self.assertRaises(ConversionError) as context:
+            triage_pdf(b'<html>not a pdf</html>')
+
+        self.assertEqual(context.exception.error_type, 'pdf_corrupt')
+
+    def test_truncated_pdf(self):
+        """prueba error específico cuando la xref apunta más allá del final del archivo"""
+        content = build_pdf(b'BT (x) Tj ET').replace(b'startxref\n', b'startxref\n9999999')
+
+        with self.assertRaises(ConversionError) as context:
+            triage_pdf(content)
+
+        self.assertEqual(context.exception.error_type, 'pdf_truncated')
+
+    def test_trailer_far_from_end_is_unknown(self):
+        """prueba que un pdf sin trailer en los últimos bytes no es un error (basura final o cortado)"""
+        content = build_pdf(b'BT (x) Tj ET')
+
+        self.assertEqual(triage_pdf(content + b'\n' + b'junk' * 1024)['classification'], 'ok')
+        self.assertEqual(triage_pdf(content[:len(content) // 2])['classification'], 'unknown')
+
+    def test_encrypted_pdf(self):
+        """prueba error específico con pdf protegido por contraseña"""
+        content = build_pdf(b'BT (x) Tj ET', encrypt=True)
+
+        with self.assertRaises(ConversionError) as context:
+            triage_pdf(content)
+
+        self.assertEqual(context.exception.error_type, 'pdf_encrypted')
+
+    def test_encrypt_name_in_content_is_not_encryption(self):
+        """prueba que el cifrado sale del trailer y no de un /Encrypt en el contenido"""
+        triage = triage_pdf(build_pdf(b'BT /F1 12 Tf (/Encrypt) Tj ET'))
+
+        self.assertFalse(triage['encrypted'])
+        self.assertEqual(triage['classification'], 'ok')
+
+
+if __name__ == '__main__':
+    unittest.main()
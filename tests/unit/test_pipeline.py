@@ -0,0 +1,131 @@
+import threading
+import time
+import unittest
+from src.core.pipeline import FunctionStage, Pipeline, PipelineItem, Stage, summarize_timings
+
+
+class UpperStage(Stage):
+    """etapa de prueba que pasa el texto a mayúsculas"""
+
+    name = 'upper'
+
+    def process(self, item):
+        item['text'] = item['text'].upper()
+
+
+class TestPipeline(unittest.TestCase):
+    """pruebas para el pipeline por etapas"""
+
+    def test_run_times_each_stage(self):
+        """prueba que cada etapa se ejecuta en orden y queda cronometrada"""
+        pipeline = Pipeline([
+            FunctionStage('strip', lambda item: item.__setitem__('text', item['text'].strip())),
+            UpperStage()
+        ])
+
+        item = pipeline.run(PipelineItem(text='  hola '))
+
+        self.assertEqual(item['text'], 'HOLA')
+        self.assertEqual(list(item.timings), ['strip', 'upper'])
+        self.assertTrue(all(seconds >= 0 for seconds in item.timings.values()))
+
+    def test_error_skips_stages_except_error_handlers(self):
+        """prueba que tras un fallo solo se ejecutan las etapas que manejan errores"""
+        seen = []
+
+        def fail(item):
+            raise ValueError('boom')
+
+        pipeline = Pipeline([
+            FunctionStage('fail', fail),
+            FunctionStage('convert', lambda item: seen.append('convert')),
+            FunctionStage('emit', lambda item: seen.append(str(item.error)), handles_errors=True)
+        ])
+
+        with self.assertRaises(ValueError):
+            pipeline.run(PipelineItem())
+        item = pipeline.run(PipelineItem(), raise_errors=False)
+
+        self.assertIsInstance(item.error, ValueError)
+        self.assertEqual(seen, ['boom', 'boom'])
+
+    def test_replace_stage(self):
+        """prueba que una etapa se sustituye por nombre sin modificar el original"""
+        pipeline = Pipeline([UpperStage(), FunctionStage('emit', lambda item: None)])
+        swapped = pipeline.replace(FunctionStage('upper', lambda item: item.__setitem__('text', 'otro')))
+
+        self.assertEqual(swapped.run(PipelineItem(text='a'))['text'], 'otro')
+        self.assertEqual(pipeline.run(PipelineItem(text='a'))['text'], 'A')
+        with self.assertRaises(ValueError):
+            pipeline.replace(FunctionStage('missing', lambda item: None))
+        with self.assertRaises(ValueError):
+            Pipeline([UpperStage(), UpperStage()])
+
+    def test_run_many_keeps_order_and_errors(self):
+        """prueba que run_many devuelve los documentos en orden y aísla los fallos"""
+        def check(item):
+            if item['n'] == 2:
+                raise ValueError('bad')
+
+        pipeline = Pipeline([
+            FunctionStage('check', check),
+            FunctionStage('double', lambda item: item.__setitem__('n', item['n'] * 2))
+        ])
+
+        items = list(pipeline.run_many(PipelineItem(n=n) for n in range(5)))
+
+        self.assertEqual([item['n'] for item in items], [0, 2, 2, 6, 8])
+        self.assertIsInstance(items[2].error, ValueError)
+        self.assertIsNone(items[3].error)
+
+    def test_run_many_with_several_workers_keeps_order(self):
+        """prueba que con varios hilos por etapa los documentos se devuelven en orden"""
+        def slow(item):
+            time.sleep(0.02 if item['n'] % 3 == 0 else 0.001)
+
+        pipeline = Pipeline([FunctionStage('slow', slow, workers=3), FunctionStage('emit', lambda item: None)])
+
+        items = list(pipeline.run_many(PipelineItem(n=n) for n in range(10)))
+
+        self.assertEqual([item['n'] for item in items], list(range(10)))
+
+    def test_run_many_overlaps_stages_with_backpressure(self):
+        """prueba que las etapas se solapan y que la primera no adelanta más de lo que caben las colas"""
+        ingested = []
+        active = set()
+        overlapped = threading.Event()
+        lock = threading.Lock()
+
+        def stage(name):
+            def run(item):
+                with lock:
+                    active.add(name)
+                    if len(active) > 1:
+                        overlapped.set()
+                if name == 'ingest':
+                    ingested.append(item['n'])
+                time.sleep(0.01 if name == 'ingest' else 0.03)
+                with lock:
+                    active.discard(name)
+            return run
+
+        pipeline = Pipeline([FunctionStage('ingest', stage('ingest')), FunctionStage('convert', stage('convert'))],
+                            queue_size=1)
+        results = pipeline.run_many(PipelineItem(n=n) for n in range(8))
+
+        first = next(results)
+        # convert va por el primero: ingest solo puede ir unos pocos por delante
+        self.assertLessEqual(len(ingested), 5)
+        rest = list(results)
+
+        self.assertTrue(overlapped.is_set())
+        self.assertEqual([first['n']] + [item['n'] for item in rest], list(range(8)))
+
+        summary = summarize_timings([first] + rest, wall_seconds=0.5)
+        self.assertEqual(set(summary['stages']), {'ingest', 'convert'})
+        self.assertEqual(summary['wall_seconds'], 0.5)
+        self.assertGreater(summary['overlap'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import unittest
+from src.core.pool import ConverterPool
+
+
+class TestConverterPool(unittest.TestCase):
+    """pruebas para el pool de conversores"""
+
+    def test_grows_lazily(self):
+        """prueba que las instancias se crean solo cuando hacen falta"""
+        created = []
+        pool = ConverterPool(lambda: created.append(object()) or created[-1], max_size=3)
+
+        self.assertEqual(pool.stats()['size'], 0)
+        with pool.acquire():
+            pass
+        with pool.acquire():
+            pass
+
+        # la segunda conversión reutiliza la instancia libre
+        self.assertEqual(len(created), 1)
+        self.assertEqual(pool.stats()['acquisitions'], 2)
+
+    def test_concurrent_acquisitions_get_distinct_instances(self):
+        """prueba que conversiones simultáneas no comparten instancia"""
+        pool = ConverterPool(object, max_size=2)
+
+        with pool.acquire() as first, pool.acquire() as second:
+            self.assertIsNot(first, second)
+            stats = pool.stats()
+            self.assertEqual(stats['in_use'], 2)
+            self.assertEqual(stats['utilization'], 1.0)
+
+        self.assertEqual(pool.stats()['idle'], 2)
+
+    def test_bounded_size_times_out(self):
+        """prueba que el pool no supera su tamaño máximo"""
+        pool = ConverterPool(object, max_size=1)
+
+        with pool.acquire():
+            with self.assertRaises(TimeoutError):
+                with pool.acquire(timeout=0.01):
+                    pass
+
+        self.assertEqual(pool.stats()['waits'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_waiter_receives_released_instance(self):
+        """prueba que un hilo en espera recibe la instancia liberada"""
+        pool = ConverterPool(object, max_size=1)
+        received = []
+        release = threading.Event()
+
+        def worker():
+            with pool.acquire(timeout=5) as converter:
+                received.append(converter)
+
+        with pool.acquire() as holder:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            release.wait(0.05)
+        thread.join(5)
+
+        self.assertEqual(received, [holder])
+        self.assertEqual(pool.stats()['peak_in_use'], 1)
+
+    def test_factory_error_releases_slot(self):
+        """prueba que un fallo al crear no consume hueco del pool"""
+        def failing_factory():
+            raise RuntimeError("boom")
+
+        pool = ConverterPool(failing_factory, max_size=1)
+
+        with self.assertRaises(RuntimeError):
+            with pool.acquire():
+                pass
+
+        stats = pool.stats()
+        self.assertEqual(stats['size'], 0)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_invalid_size(self):
+        """prueba error con tamaño inválido"""
+        with self.assertRaises(ValueError):
+            ConverterPool(object, max_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
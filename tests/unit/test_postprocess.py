@@ -0,0 +1,87 @@
+import unittest
+from src.core.postprocess import POSTPROCESS_STEPS, postprocess_markdown, resolve_steps
+from src.core.section_index import build_section_index
+
+
+class TestResolveSteps(unittest.TestCase):
+    """pruebas para la interpretación de la opción de post-procesado"""
+
+    def test_all_and_none(self):
+        """prueba valores que activan o desactivan todos los pasos"""
+        self.assertEqual(resolve_steps(True), POSTPROCESS_STEPS)
+        self.assertEqual(resolve_steps('all'), POSTPROCESS_STEPS)
+        self.assertEqual(resolve_steps(None), ())
+        self.assertEqual(resolve_steps(''), ())
+
+    def test_comma_separated_and_list(self):
+        """prueba listas de pasos en string o lista"""
+        self.assertEqual(
+            resolve_steps('trim_trailing_whitespace, collapse_blank_lines'),
+            ('collapse_blank_lines', 'trim_trailing_whitespace')
+        )
+        self.assertEqual(resolve_steps(['compact_tables']), ('compact_tables',))
+
+    def test_unknown_step(self):
+        """prueba error con pasos desconocidos"""
+        with self.assertRaises(ValueError):
+            resolve_steps('minify')
+
+
+class TestPostprocessMarkdown(unittest.TestCase):
+    """pruebas para el post-procesado del markdown"""
+
+    def test_collapse_and_trim(self):
+        """prueba colapso de líneas en blanco y recorte de espacios"""
+        markdown = '\n\n# Título   \n\n\n\nTexto  \n\n\n'
+        result, stats = postprocess_markdown(
+            markdown, ['collapse_blank_lines', 'trim_trailing_whitespace']
+        )
+
+        self.assertEqual(result, '# Título\n\nTexto\n')
+        self.assertEqual(stats['bytes_saved'], stats['bytes_before'] - stats['bytes_after'])
+        self.assertGreater(stats['bytes_saved'], 0)
+
+    def test_page_breaks_survive_trim_and_collapse(self):
+        """prueba que el recorte y el colapso conservan los saltos de página del pdf"""
+        markdown = 'Página uno  \n\f\n\n\fPágina dos\t\n\f'
+        result, _ = postprocess_markdown(markdown, ['collapse_blank_lines', 'trim_trailing_whitespace'])
+
+        self.assertEqual(result, 'Página uno\n\f\n\n\fPágina dos\n\f')
+        self.assertEqual([page['page'] for page in build_section_index(result)['pages']], [1, 2, 3, 4])
+
+    def test_compact_tables(self):
+        """prueba compactado de celdas con relleno"""
+        markdown = '|  Nombre   |  Valor |\n|:---------|-------:|\n|  a \\| b  |   1    |'
+        result, _ = postprocess_markdown(markdown, ['compact_tables'])
+
+        self.assertEqual(result, '| Nombre | Valor |\n| :--- | ---: |\n| a \\| b | 1 |')
+
+    def test_normalize_unicode(self):
+        """prueba normalización nfc"""
+        result, _ = postprocess_markdown('café', ['normalize_unicode'])
+
+        self.assertEqual(result, 'café')
+
+    def test_drop_empty_sections(self):
+        """prueba eliminación de secciones sin contenido"""
+        markdown = (
+            '# Doc\n\n## Vacía\n\n## Llena\n\ntexto\n\n'
+            '## Padre\n\n### Hija\n\ncontenido\n\n## Final\n'
+        )
+        result, _ = postprocess_markdown(markdown, ['drop_empty_sections', 'collapse_blank_lines'])
+
+        self.assertNotIn('Vacía', result)
+        self.assertNotIn('Final', result)
+        self.assertIn('# Doc\n\n## Llena\n\ntexto', result)
+        self.assertIn('## Padre\n\n### Hija\n\ncontenido', result)
+
+    def test_code_blocks_untouched(self):
+        """prueba que los bloques de código no se compactan"""
+        markdown = '```\n| a  |  b |\n\n\n# no es título\n```'
+        result, _ = postprocess_markdown(markdown, POSTPROCESS_STEPS)
+
+        self.assertEqual(result, markdown)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -202,8 +202,9 @@ class TestGlobalRegistryFunctions(unittest.TestCase):
         
         handlers = list_registered_handlers()
         # debe haber registrado todos los handlers
-        self.assertEqual(len(handlers), 3)
+        self.assertEqual(len(handlers), 4)
         self.assertIn('HealthHandler', handlers)
+        self.assertIn('InspectHandler', handlers)
         self.assertIn('S3Handler', handlers)
         self.assertIn('ApiHandler', handlers)
     
@@ -1,9 +1,14 @@
+import gzip
 import unittest
 from unittest.mock import patch, MagicMock
+import hashlib
 import json
+import threading
 from botocore.exceptions import ClientError
-from src.handlers.s3 import handle_s3_event
-from tests.fixtures import S3_EVENT
+from src.core.exceptions import ArchiveLimitExceeded
+from src.core.converters import convert_to_markdown
+from src.handlers.s3 import S3Handler, default_record_workers, handle_s3_event
+from tests.fixtures import S3_EVENT, FakeS3Client
 
 
 class TestS3Handler(unittest.TestCase):
@@ -42,6 +47,7 @@ class TestS3Handler(unittest.TestCase):
         self.assertEqual(body['results'][0]['status'], 'success')
         self.assertEqual(body['results'][0]['source'], 'input/test-document.txt')
         self.assertEqual(body['results'][0]['output'], 'output/test-document.md')
+        self.assertEqual(list(body['results'][0]['timings']), ['ingest', 'convert', 'emit'])
         
         # verificar llamadas S3
         mock_s3.get_object.assert_called_once_with(
@@ -83,6 +89,27 @@ class TestS3Handler(unittest.TestCase):
         self.assertEqual(error_call[1]['Key'], 'errors/test-document_error.json')
         self.assertEqual(error_call[1]['ContentType'], 'application/json')
     
+    @patch('boto3.client')
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_handle_s3_event_archive_limit(self, mock_convert, mock_boto3_client):
+        """prueba que el rechazo por límites del zip queda en errors/"""
+        mock_s3 = MagicMock()
+        mock_boto3_client.return_value = mock_s3
+        mock_s3.get_object.return_value = {
+            'Body': MagicMock(read=lambda: b'PK\x03\x04')
+        }
+        mock_convert.side_effect = ArchiveLimitExceeded("too big", details={'ratio': 500})
+
+        result = handle_s3_event(S3_EVENT)
+
+        body = json.loads(result['body'])
+        self.assertEqual(body['results'][0]['error_type'], 'archive_too_large')
+        error_call = mock_s3.put_object.call_args
+        error_info = json.loads(error_call[1]['Body'])
+        self.assertEqual(error_call[1]['Key'], 'errors/test-document_error.json')
+        self.assertEqual(error_info['error_type'], 'archive_too_large')
+        self.assertEqual(error_info['details'], {'ratio': 500})
+
     @patch('boto3.client')
     def test_handle_s3_event_get_object_error(self, mock_boto3_client):
         """prueba error al obtener objeto de S3"""
@@ -175,6 +202,504 @@ class TestS3Handler(unittest.TestCase):
         put_args = mock_s3.put_object.call_args
         self.assertEqual(put_args[1]['Key'], 'output/test+file with spaces.md')
 
+    @patch('boto3.client')
+    @patch('src.handlers.s3.deadline_from_context')
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_handle_s3_event_partial_result(self, mock_convert, mock_deadline, mock_boto3_client):
+        """prueba que el resultado parcial se guarda marcado con la página de reanudación"""
+        mock_s3 = MagicMock()
+        mock_boto3_client.return_value = mock_s3
+        mock_s3.get_object.return_value = {'Body': MagicMock(read=lambda: b'%PDF')}
+        mock_convert.return_value = {
+            'markdown': 'Page 1',
+            'metadata': {'original_format': 'pdf', 'converted_at': '2024-01-01T12:00:00Z'},
+            'partial': True,
+            'resume': {'page': 1, 'pages_converted': 1, 'total_pages': 3}
+        }
+
+        result = S3Handler().handle(S3_EVENT, context=object())
+
+        body = json.loads(result['body'])
+        self.assertTrue(body['results'][0]['partial'])
+        self.assertEqual(body['results'][0]['resume']['page'], 1)
+        self.assertIs(mock_convert.call_args[1]['deadline'], mock_deadline.return_value)
+        metadata = mock_s3.put_object.call_args[1]['Metadata']
+        self.assertEqual(metadata['partial'], 'true')
+        self.assertEqual(metadata['resume-page'], '1')
+
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_section_index_saved_as_sidecar(self, mock_convert):
+        """prueba que el índice se guarda junto a la salida con el etag del markdown"""
+        s3 = FakeS3Client({'input/test-document.txt': b'# A'})
+        mock_convert.return_value = {
+            'markdown': '# A',
+            'metadata': {'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'},
+            'index': {'version': 1, 'bytes': 3, 'headings': [], 'pages': [], 'tables': []}
+        }
+
+        S3Handler(s3_client=s3).handle(S3_EVENT)
+
+        index = json.loads(s3.objects['output/test-document.md.index.json'])
+        self.assertEqual(index['bytes'], 3)
+        output = s3.get_object(Bucket='test-bucket', Key='output/test-document.md')
+        self.assertEqual(index['markdown_etag'], output['ETag'])
+
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_chunks_saved_as_jsonl_sidecar(self, mock_convert):
+        """prueba que los fragmentos se guardan como jsonl junto a la salida"""
+        s3 = FakeS3Client({'input/test-document.txt': b'# A'})
+        mock_convert.return_value = {
+            'markdown': '# A\n\nñ',
+            'metadata': {'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'},
+            'chunks': [
+                {'chunk': 0, 'start': 0, 'end': 3, 'tokens': 1, 'headings': ['A']},
+                {'chunk': 1, 'start': 5, 'end': 7, 'tokens': 1, 'headings': ['A']}
+            ]
+        }
+
+        S3Handler(s3_client=s3).handle(S3_EVENT)
+
+        lines = s3.objects['output/test-document.md.chunks.jsonl'].decode('utf-8').splitlines()
+        chunks = [json.loads(line) for line in lines]
+        # cada fragmento se lee de la salida con un get por rango
+        texts = [s3.get_object(Bucket='test-bucket', Key='output/test-document.md',
+                               Range=f"bytes={c['start']}-{c['end'] - 1}")['Body'].read().decode('utf-8')
+                 for c in chunks]
+        self.assertEqual(texts, ['# A', 'ñ'])
+
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_additional_formats_saved_as_siblings(self, mock_convert):
+        """prueba que los formatos adicionales se guardan junto al markdown"""
+        s3 = FakeS3Client({'input/test-document.txt': b'# A'})
+        mock_convert.return_value = {
+            'markdown': '# A',
+            'metadata': {'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'},
+            'outputs': {'text': 'A', 'outline_json': {'title': 'A', 'bytes': 3, 'sections': []}}
+        }
+
+        S3Handler(s3_client=s3).handle(S3_EVENT)
+
+        self.assertEqual(s3.objects['output/test-document.md'], b'# A')
+        self.assertEqual(s3.objects['output/test-document.txt'], b'A')
+        self.assertEqual(json.loads(s3.objects['output/test-document.outline.json'])['title'], 'A')
+
+    @patch('src.core.inputs.get_config_int', return_value=4)
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_large_object_is_spooled_and_mapped(self, mock_convert, _threshold):
+        """prueba que los objetos grandes llegan al conversor mapeados desde /tmp"""
+        s3 = FakeS3Client({'input/test-document.txt': b'# Large document'})
+        seen = {}
+
+        def convert(source, key, **kwargs):
+            seen['mapped'] = source.is_mapped
+            seen['data'] = source.data[:]
+            return {'markdown': '# Large document', 'metadata': {
+                'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'
+            }}
+        mock_convert.side_effect = convert
+
+        S3Handler(s3_client=s3).handle(S3_EVENT)
+
+        self.assertEqual(seen, {'mapped': True, 'data': b'# Large document'})
+        self.assertEqual(s3.objects['output/test-document.md'], b'# Large document')
+
+    @patch('src.handlers.s3.get_config_int',
+           side_effect=lambda key, default: {'S3_RANGED_THRESHOLD': 100, 'S3_RANGED_PART_SIZE': 64}.get(key, default))
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_large_object_downloaded_by_ranges(self, mock_convert, _config):
+        """prueba que los objetos por encima del umbral se descargan por rangos en paralelo"""
+        content = b'# Large\n' + b'x' * 300
+        s3 = FakeS3Client({'input/test-document.txt': content})
+        s3.metadata['input/test-document.txt'] = {'conversion-options': '{"index": true}'}
+        seen = {}
+
+        def convert(source, key, **kwargs):
+            seen.update(mapped=source.is_mapped, data=source.data[:], kwargs=kwargs)
+            return {'markdown': '# Large', 'metadata': {
+                'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'
+            }}
+        mock_convert.side_effect = convert
+        event = {'Records': [dict(S3_EVENT['Records'][0], s3={
+            'bucket': {'name': 'test-bucket'},
+            'object': {'key': 'input/test-document.txt', 'size': len(content)}
+        })]}
+
+        S3Handler(s3_client=s3).handle(event)
+
+        self.assertEqual(seen, {'mapped': True, 'data': content, 'kwargs': {'deadline': None, 'index': True}})
+        ranges = [call[2] for call in s3.calls if call[0] == 'get_object']
+        self.assertEqual(len(ranges), 5)
+        self.assertTrue(all(ranges))
+
+    @patch('src.handlers.s3.get_config_int',
+           side_effect=lambda key, default: {'S3_RANGED_THRESHOLD': 100, 'S3_RANGED_PART_SIZE': 64}.get(key, default))
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_large_object_overwritten_after_event_is_not_saved(self, mock_convert, _config):
+        """prueba que un objeto grande sobrescrito tras el evento no se guarda con el etag viejo"""
+        content = b'# Large\n' + b'x' * 300
+        s3 = FakeS3Client({'input/test-document.txt': content + b'y' * 200})
+        event = {'Records': [dict(S3_EVENT['Records'][0], s3={
+            'bucket': {'name': 'test-bucket'},
+            'object': {'key': 'input/test-document.txt', 'size': len(content),
+                       'eTag': hashlib.md5(content).hexdigest()}
+        })]}
+
+        body = json.loads(S3Handler(s3_client=s3).handle(event)['body'])
+
+        self.assertEqual(body['results'][0]['status'], 'error')
+        mock_convert.assert_not_called()
+        self.assertNotIn('output/test-document.md', s3.objects)
+
+    @patch('src.handlers.s3.get_config_int',
+           side_effect=lambda key, default: 10 if key == 'S3_MULTIPART_THRESHOLD' else default)
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_large_output_uploaded_multipart(self, mock_convert, _config):
+        """prueba que las salidas por encima del umbral se suben con multipart y conservan los metadatos"""
+        s3 = FakeS3Client({'input/test-document.txt': b'doc'})
+        markdown = '# Large output\n' + 'línea\n' * 20
+        mock_convert.return_value = {'markdown': markdown, 'metadata': {
+            'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'
+        }}
+
+        S3Handler(s3_client=s3).handle(S3_EVENT)
+
+        self.assertEqual(s3.objects['output/test-document.md'], markdown.encode('utf-8'))
+        self.assertEqual(s3.metadata['output/test-document.md'], {
+            'original-format': 'txt', 'converted-at': '2024-01-01T12:00:00Z', 'source-etag': 'test-etag'
+        })
+        self.assertIn(('complete_multipart_upload', 'output/test-document.md', None), s3.calls)
+        self.assertNotIn(('put_object', 'output/test-document.md', None), s3.calls)
+
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_unchanged_source_is_skipped(self, mock_convert):
+        """prueba que una notificación repetida del mismo origen no vuelve a convertir"""
+        s3 = FakeS3Client({'input/test-document.txt': b'# A'})
+        mock_convert.return_value = {'markdown': '# A', 'metadata': {
+            'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'
+        }}
+        handler = S3Handler(s3_client=s3)
+
+        handler.handle(S3_EVENT)
+        self.assertEqual(s3.metadata['output/test-document.md']['source-etag'], 'test-etag')
+        s3.calls.clear()
+        body = json.loads(handler.handle(S3_EVENT)['body'])
+
+        self.assertEqual(mock_convert.call_count, 1)
+        self.assertEqual(s3.calls, [('head_object', 'output/test-document.md', None)])
+        self.assertEqual(body['results'][0]['status'], 'skipped')
+        self.assertEqual(body['summary']['skipped'], 1)
+        self.assertEqual(body['summary']['success'], 0)
+
+        # otra versión del origen sí se convierte
+        changed = {'Records': [dict(S3_EVENT['Records'][0], s3={
+            'bucket': {'name': 'test-bucket'},
+            'object': {'key': 'input/test-document.txt', 'eTag': 'other-etag'}
+        })]}
+        body = json.loads(handler.handle(changed)['body'])
+        self.assertEqual(body['results'][0]['status'], 'success')
+        self.assertEqual(mock_convert.call_count, 2)
+
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_partial_output_is_not_skipped(self, mock_convert):
+        """prueba que una salida parcial no cuenta como convertida"""
+        s3 = FakeS3Client({'input/test-document.txt': b'# A', 'output/test-document.md': b'# part'})
+        s3.metadata['output/test-document.md'] = {'source-etag': 'test-etag', 'partial': 'true'}
+        mock_convert.return_value = {'markdown': '# A', 'metadata': {
+            'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'
+        }}
+
+        body = json.loads(S3Handler(s3_client=s3).handle(S3_EVENT)['body'])
+
+        self.assertEqual(body['results'][0]['status'], 'success')
+        self.assertEqual(s3.objects['output/test-document.md'], b'# A')
+
+    @patch('src.handlers.s3.get_config',
+           side_effect=lambda key, default=None: 'gzip' if key == 'S3_OUTPUT_COMPRESSION' else default)
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_output_compressed_with_gzip(self, mock_convert, _compression):
+        """prueba que las salidas grandes se guardan comprimidas con su ContentEncoding y las pequeñas no"""
+        markdown = '# Informe\n\n' + 'línea de texto repetida\n' * 1000
+        s3 = FakeS3Client({'input/test-document.txt': b'# A'})
+        mock_convert.return_value = {'markdown': markdown, 'metadata': {
+            'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'
+        }, 'outputs': {'text': 'A'}}
+
+        body = json.loads(S3Handler(s3_client=s3).handle(S3_EVENT)['body'])
+
+        self.assertEqual(gzip.decompress(s3.objects['output/test-document.md']).decode('utf-8'), markdown)
+        self.assertEqual(s3.content_encodings['output/test-document.md'], 'gzip')
+        self.assertEqual(s3.objects['output/test-document.txt'], b'A')
+        self.assertIsNone(s3.content_encodings['output/test-document.txt'])
+        compression = body['results'][0]['compression']
+        self.assertEqual(compression['encoding'], 'gzip')
+        self.assertEqual(compression['bytes_out'], len(s3.objects['output/test-document.md']))
+        self.assertGreater(compression['ratio'], 4)
+        self.assertIn('seconds', compression)
+
+    @patch('src.handlers.s3.get_config',
+           side_effect=lambda key, default=None: 'gzip' if key == 'S3_OUTPUT_COMPRESSION' else default)
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_indexed_output_not_compressed(self, mock_convert, _compression):
+        """prueba que una salida con índice o fragmentos queda sin comprimir para las lecturas por rango"""
+        markdown = '# Informe\n\n' + 'línea\n' * 2000
+        for extra in ({'index': {'headings': []}}, {'chunks': [{'chunk': 0, 'start': 0, 'end': 9}]}):
+            with self.subTest(extra=list(extra)):
+                s3 = FakeS3Client({'input/test-document.txt': b'# A'})
+                mock_convert.return_value = dict({'markdown': markdown, 'metadata': {
+                    'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'
+                }}, **extra)
+
+                body = json.loads(S3Handler(s3_client=s3).handle(S3_EVENT)['body'])
+
+                self.assertEqual(s3.objects['output/test-document.md'], markdown.encode('utf-8'))
+                self.assertNotIn('compression', body['results'][0])
+
+    @patch('src.handlers.s3.get_config_bool', side_effect=lambda key, default: True if key == 'S3_DEDUP' else default)
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_duplicate_content_copied_from_existing_output(self, mock_convert, _dedup):
+        """prueba que los mismos bytes bajo otra key se copian en el servidor sin convertir"""
+        s3 = FakeS3Client({'input/test-document.txt': b'# A', 'input/copy.txt': b'# A'})
+        mock_convert.return_value = {'markdown': '# A', 'metadata': {
+            'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'
+        }, 'index': {'headings': []}, 'outputs': {'text': 'A'}}
+        handler = S3Handler(s3_client=s3)
+
+        handler.handle(S3_EVENT)
+        duplicate = {'Records': [dict(S3_EVENT['Records'][0], s3={
+            'bucket': {'name': 'test-bucket'},
+            'object': {'key': 'input/copy.txt', 'eTag': 'copy-etag'}
+        })]}
+        body = json.loads(handler.handle(duplicate)['body'])
+
+        self.assertEqual(mock_convert.call_count, 1)
+        self.assertEqual(body['results'][0]['status'], 'success')
+        self.assertTrue(body['results'][0]['deduplicated'])
+        self.assertEqual(body['results'][0]['copied_from'], 'output/test-document.md')
+        self.assertIn(('copy_object', 'output/copy.md', 'output/test-document.md'), s3.calls)
+        self.assertEqual(s3.objects['output/copy.md'], b'# A')
+        self.assertEqual(s3.content_types['output/copy.md'], 'text/markdown')
+        self.assertEqual(s3.metadata['output/copy.md']['source-etag'], 'copy-etag')
+        self.assertEqual(s3.objects['output/copy.txt'], b'A')
+        index = json.loads(s3.objects['output/copy.md.index.json'])
+        self.assertEqual(index['markdown_etag'], s3._etag(b'# A'))
+
+    @patch('src.handlers.s3.get_config_bool', side_effect=lambda key, default: True if key == 'S3_DEDUP' else default)
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_overwritten_indexed_output_is_converted(self, mock_convert, _dedup):
+        """prueba que si la salida indexada ya no procede de ese contenido se convierte de nuevo"""
+        s3 = FakeS3Client({'input/test-document.txt': b'# A', 'input/copy.txt': b'# A'})
+        mock_convert.return_value = {'markdown': '# A', 'metadata': {
+            'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'
+        }}
+        handler = S3Handler(s3_client=s3)
+
+        handler.handle(S3_EVENT)
+        s3.metadata['output/test-document.md'].pop('content-key')
+        duplicate = {'Records': [dict(S3_EVENT['Records'][0], s3={
+            'bucket': {'name': 'test-bucket'},
+            'object': {'key': 'input/copy.txt', 'eTag': 'copy-etag'}
+        })]}
+        body = json.loads(handler.handle(duplicate)['body'])
+
+        self.assertEqual(mock_convert.call_count, 2)
+        self.assertNotIn('deduplicated', body['results'][0])
+        self.assertNotIn('copy_object', [call[0] for call in s3.calls])
+
+    @patch('src.handlers.s3.get_config_bool', side_effect=lambda key, default: True if key == 'S3_DEDUP' else default)
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_changed_default_options_are_not_deduplicated(self, mock_convert, _dedup):
+        """prueba que si cambia un valor por defecto de la configuración no se copia la salida anterior"""
+        s3 = FakeS3Client({'input/test-document.txt': b'# A', 'input/copy.txt': b'# A'})
+        mock_convert.return_value = {'markdown': '# A', 'metadata': {
+            'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'
+        }}
+        handler = S3Handler(s3_client=s3)
+
+        handler.handle(S3_EVENT)
+        duplicate = {'Records': [dict(S3_EVENT['Records'][0], s3={
+            'bucket': {'name': 'test-bucket'},
+            'object': {'key': 'input/copy.txt', 'eTag': 'copy-etag'}
+        })]}
+        config = {'OUTPUT_FORMATS': 'markdown,text'}
+        with patch('src.core.converters.get_config', side_effect=lambda key, default=None: config.get(key, default)):
+            body = json.loads(handler.handle(duplicate)['body'])
+
+        self.assertEqual(mock_convert.call_count, 2)
+        self.assertNotIn('deduplicated', body['results'][0])
+        self.assertNotIn('copy_object', [call[0] for call in s3.calls])
+
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_routed_request_options_from_metadata(self, mock_convert):
+        """prueba que un request desviado desde el api se convierte con sus opciones"""
+        s3 = FakeS3Client({'input/test-document.txt': b'# A'})
+        s3.metadata['input/test-document.txt'] = {
+            'conversion-options': json.dumps({'image_policy': 'drop', 'index': True, 'unknown': 1})
+        }
+        mock_convert.return_value = {'markdown': '# A', 'metadata': {}}
+
+        S3Handler(s3_client=s3).handle(S3_EVENT)
+
+        self.assertEqual(mock_convert.call_args[1], {'deadline': None, 'image_policy': 'drop', 'index': True})
+
+    @patch('src.handlers.s3.get_config_int',
+           side_effect=lambda key, default: 3 if key == 'S3_RECORD_WORKERS' else default)
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_records_processed_concurrently_in_order(self, mock_convert, _workers):
+        """prueba que los registros de un lote se procesan en paralelo y el resumen conserva el orden"""
+        barrier = threading.Barrier(3, timeout=5)
+
+        class SlowS3Client(FakeS3Client):
+            def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+                # solo pasa si los tres registros descargan a la vez
+                barrier.wait()
+                return super().get_object(Bucket, Key, Range, IfMatch)
+
+        keys = [f'input/file{i}.txt' for i in range(3)]
+        s3 = SlowS3Client({key: key.encode() for key in keys})
+        mock_convert.side_effect = lambda content, key, **kwargs: {
+            'markdown': key, 'metadata': {'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'}
+        }
+        event = {'Records': [
+            {'eventSource': 'aws:s3', 's3': {'bucket': {'name': 'test-bucket'}, 'object': {'key': key}}}
+            for key in keys
+        ]}
+
+        body = json.loads(S3Handler(s3_client=s3).handle(event)['body'])
+
+        self.assertEqual([r['source'] for r in body['results']], keys)
+        self.assertEqual(body['summary']['success'], 3)
+        self.assertEqual(s3.objects['output/file2.md'], b'input/file2.txt')
+
+    @patch('src.handlers.s3.get_config_int',
+           side_effect=lambda key, default: 1 if key == 'S3_RECORD_WORKERS' else default)
+    @patch('src.handlers.s3.convert_to_markdown')
+    def test_batch_download_overlaps_conversion(self, mock_convert, _workers):
+        """prueba que la descarga del siguiente objeto se adelanta a la conversión del actual"""
+        next_downloaded = threading.Event()
+
+        class WatchedS3Client(FakeS3Client):
+            def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+                if Key == 'input/file1.txt':
+                    next_downloaded.set()
+                return super().get_object(Bucket, Key, Range, IfMatch)
+
+        def convert(content, key, **kwargs):
+            if key == 'input/file0.txt':
+                # sin pipeline la descarga de file1 no empezaría hasta terminar aquí
+                self.assertTrue(next_downloaded.wait(timeout=5))
+            return {'markdown': key, 'metadata': {'original_format': 'txt', 'converted_at': '2024-01-01T12:00:00Z'}}
+        mock_convert.side_effect = convert
+
+        keys = [f'input/file{i}.txt' for i in range(3)]
+        s3 = WatchedS3Client({key: key.encode() for key in keys})
+        event = {'Records': [
+            {'eventSource': 'aws:s3', 's3': {'bucket': {'name': 'test-bucket'}, 'object': {'key': key}}}
+            for key in keys
+        ]}
+
+        body = json.loads(S3Handler(s3_client=s3).handle(event)['body'])
+
+        self.assertEqual([r['status'] for r in body['results']], ['success'] * 3)
+        pipeline = body['summary']['pipeline']
+        self.assertEqual(set(pipeline['stages']), {'ingest', 'convert', 'emit'})
+        self.assertGreater(pipeline['wall_seconds'], 0)
+        self.assertIn('overlap', pipeline)
+
+    def test_default_record_workers_from_memory(self):
+        """prueba que los trabajadores por defecto dependen de la memoria de la función"""
+        self.assertEqual(default_record_workers(MagicMock(memory_limit_in_mb=1024)), 2)
+        self.assertEqual(default_record_workers(MagicMock(memory_limit_in_mb=10240)), 8)
+        self.assertEqual(default_record_workers(MagicMock(memory_limit_in_mb=128)), 1)
+        with patch.dict('os.environ', {'AWS_LAMBDA_FUNCTION_MEMORY_SIZE': '2048'}):
+            self.assertEqual(default_record_workers(None), 4)
+        with patch.dict('os.environ', {}, clear=True):
+            self.assertEqual(default_record_workers(None), 1)
+
+
+def s3_record(key, size):
+    """crea un registro de evento s3 con tamaño"""
+    return {
+        'eventSource': 'aws:s3',
+        's3': {
+            'bucket': {'name': 'test-bucket'},
+            'object': {'key': key, 'size': size}
+        }
+    }
+
+
+@patch('src.handlers.s3.get_config_bool', return_value=True)
+class TestS3IncrementalConversion(unittest.TestCase):
+    """pruebas para la conversión incremental de objetos que solo crecen"""
+
+    def upload(self, s3, content):
+        """sube una versión del csv y procesa su evento"""
+        s3.objects['input/data.csv'] = content
+        s3.calls.clear()
+        return S3Handler(s3_client=s3)._process_record(s3_record('input/data.csv', len(content)))
+
+    def test_appended_rows_fetch_only_the_tail(self, mock_config):
+        """prueba que una versión más larga solo descarga la cola y la añade"""
+        s3 = FakeS3Client()
+        first = b'name,qty\napple,1\npear,2\n'
+        self.upload(s3, first)
+
+        self.assertIn('output/data.md.state.json', s3.objects)
+
+        grown = first + b'plum,3\nfig,'
+        result = self.upload(s3, grown)
+
+        self.assertTrue(result['incremental'])
+        self.assertIn(('get_object', 'input/data.csv', 'bytes=0-'), s3.calls)
+        self.assertNotIn(('get_object', 'input/data.csv', None), s3.calls)
+        self.assertEqual(
+            s3.objects['output/data.md'].decode('utf-8'),
+            convert_to_markdown(grown, 'data.csv')['markdown']
+        )
+
+        # la fila parcial se completa en la siguiente versión
+        final = grown + b'4\n'
+        self.upload(s3, final)
+        self.assertEqual(
+            s3.objects['output/data.md'].decode('utf-8'),
+            convert_to_markdown(final, 'data.csv')['markdown']
+        )
+
+    def test_appended_tail_keeps_object_options(self, mock_config):
+        """prueba que la conversión de la cola añade las salidas que pidió el objeto"""
+        mock_config.side_effect = lambda key, default: key != 'S3_DEDUP'
+        s3 = FakeS3Client()
+        options = {'conversion-options': json.dumps({'index': True, 'formats': ['markdown', 'text']})}
+        s3.metadata['input/data.csv'] = options
+        first = b'name,qty\napple,1\n'
+        self.upload(s3, first)
+
+        s3.metadata['input/data.csv'] = options
+        result = self.upload(s3, first + b'plum,3\n')
+
+        self.assertTrue(result['incremental'])
+        self.assertIn('plum', s3.objects['output/data.txt'].decode('utf-8'))
+        self.assertIn('output/data.md.index.json', s3.objects)
+
+    def test_rewritten_prefix_falls_back_to_full_conversion(self, mock_config):
+        """prueba que si cambia el prefijo se reconvierte el objeto entero"""
+        s3 = FakeS3Client()
+        self.upload(s3, b'name,qty\napple,1\n')
+
+        result = self.upload(s3, b'name,qty\nmango,9\npear,2\n')
+
+        self.assertNotIn('incremental', result)
+        self.assertIn(('get_object', 'input/data.csv', None), s3.calls)
+        self.assertIn('mango', s3.objects['output/data.md'].decode('utf-8'))
+
+    def test_disabled_by_default(self, mock_config):
+        """prueba que sin INCREMENTAL_CONVERSION no se guarda estado"""
+        mock_config.return_value = False
+        s3 = FakeS3Client()
+
+        self.upload(s3, b'line\n')
+
+        self.assertNotIn('output/data.md.state.json', s3.objects)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,151 @@
+import gzip
+import hashlib
+import mmap
+import unittest
+from botocore.exceptions import ClientError
+from unittest.mock import patch
+from src.core.compression import Compressor
+from src.core.s3_transfer import MultipartWriter, download_ranged, upload_text
+from tests.fixtures import FakeS3Client
+
+
+class ChangingS3Client(FakeS3Client):
+    """cliente que sobrescribe el objeto tras servir la primera parte"""
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        response = super().get_object(Bucket, Key, Range, IfMatch)
+        self.objects[Key] = b'z' * len(self.objects[Key])
+        return response
+
+
+class TestS3Transfer(unittest.TestCase):
+    """pruebas para las descargas por rangos"""
+
+    def setUp(self):
+        self.payload = bytes(range(256)) * 40
+        self.s3 = FakeS3Client({'input/big.pdf': self.payload})
+        self.s3.metadata['input/big.pdf'] = {'conversion-options': '{}'}
+
+    def test_parts_reassembled_in_memory(self):
+        """prueba que las partes se escriben en su posición de un buffer en memoria"""
+        source, response = download_ranged(self.s3, 'b', 'input/big.pdf', len(self.payload),
+                                           part_size=1000, concurrency=4, threshold=1 << 20)
+        with source:
+            self.assertTrue(source.is_mapped)
+            self.assertEqual(source.data[:], self.payload)
+            self.assertIsNone(source.path)
+
+        ranges = sorted(call[2] for call in self.s3.calls)
+        self.assertEqual(len(ranges), 11)
+        self.assertIn('bytes=10000-10239', ranges)
+        self.assertEqual(response['Metadata'], {'conversion-options': '{}'})
+        self.assertNotIn('Body', response)
+
+    def test_parts_spooled_to_tmp(self):
+        """prueba que por encima del umbral el buffer es un archivo de /tmp ya borrado"""
+        source, _ = download_ranged(self.s3, 'b', 'input/big.pdf', len(self.payload),
+                                    part_size=4096, concurrency=2, threshold=100)
+        with source:
+            assert isinstance(source.data, mmap.mmap)
+            self.assertEqual(source.data[:], self.payload)
+            self.assertEqual(source.data.find(b'\xff\x00'), 255)
+
+    def test_overwritten_object_fails(self):
+        """prueba que un objeto sobrescrito durante la descarga no mezcla versiones"""
+        s3 = ChangingS3Client({'input/big.pdf': self.payload})
+
+        with self.assertRaises(ClientError):
+            download_ranged(s3, 'b', 'input/big.pdf', len(self.payload), part_size=1000, threshold=1 << 20)
+
+    def test_event_etag_checked_on_first_part(self):
+        """prueba que la primera parte ya exige el etag del evento"""
+        current = hashlib.md5(self.payload).hexdigest()
+
+        source, _ = download_ranged(self.s3, 'b', 'input/big.pdf', len(self.payload), part_size=1000,
+                                    threshold=1 << 20, etag=current)
+        source.close()
+        with self.assertRaises(ClientError) as error:
+            download_ranged(self.s3, 'b', 'input/big.pdf', len(self.payload), part_size=1000,
+                            threshold=1 << 20, etag='old-version')
+        self.assertEqual(error.exception.response['Error']['Code'], 'PreconditionFailed')
+        self.assertEqual(len(self.s3.calls), 12)
+
+    def test_grown_object_fails(self):
+        """prueba que un objeto más grande que el del evento no se trunca"""
+        with self.assertRaises(IOError) as error:
+            download_ranged(self.s3, 'b', 'input/big.pdf', len(self.payload) - 100, part_size=1000,
+                            threshold=1 << 20)
+        self.assertIn('Object size changed', str(error.exception))
+        self.assertEqual(len(self.s3.calls), 1)
+
+    def test_short_object_fails(self):
+        """prueba que un tamaño anunciado mayor que el objeto es un error"""
+        with self.assertRaises(IOError):
+            download_ranged(self.s3, 'b', 'input/big.pdf', len(self.payload) + 10, part_size=1000,
+                            threshold=1 << 20)
+
+
+class FailingPartS3Client(FakeS3Client):
+    """cliente que falla al subir la segunda parte"""
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == 2:
+            raise ClientError({'Error': {'Code': 'InternalError', 'Message': 'boom'}}, 'UploadPart')
+        return super().upload_part(Bucket, Key, UploadId, PartNumber, Body)
+
+
+class TestMultipartUpload(unittest.TestCase):
+    """pruebas para la subida multipart en streaming"""
+
+    def test_writer_uploads_parts_in_order(self):
+        """prueba que las partes se suben a medida que se completan y se ensamblan en orden"""
+        s3 = FakeS3Client()
+        writer = MultipartWriter(s3, 'b', 'output/a.md', part_size=4, concurrency=2,
+                                 ContentType='text/markdown', Metadata={'original-format': 'pdf'})
+        writer.write(b'abc')
+        self.assertEqual(s3.uploads[writer.upload_id]['parts'], {})
+        writer.write(b'defghij')
+        response = writer.close()
+
+        self.assertEqual(s3.objects['output/a.md'], b'abcdefghij')
+        self.assertEqual(s3.metadata['output/a.md'], {'original-format': 'pdf'})
+        self.assertEqual(len([c for c in s3.calls if c[0] == 'upload_part']), 3)
+        self.assertEqual(response['ETag'], s3._etag(b'abcdefghij'))
+
+    @patch('src.core.s3_transfer.TEXT_CHUNK_CHARS', 3)
+    def test_upload_text_encodes_in_blocks(self):
+        """prueba que el texto se codifica por bloques sin cortar caracteres multibyte"""
+        s3 = FakeS3Client()
+        text = 'ñandú ' * 50
+
+        upload_text(s3, 'b', 'output/a.md', text, part_size=16, concurrency=3)
+
+        self.assertEqual(s3.objects['output/a.md'].decode('utf-8'), text)
+
+    def test_upload_text_compressed_on_the_fly(self):
+        """prueba que con compresor las partes llevan el flujo gzip completo"""
+        s3 = FakeS3Client()
+        text = 'línea de markdown\n' * 200
+        compressor = Compressor('gzip')
+
+        upload_text(s3, 'b', 'output/a.md', text, part_size=64, concurrency=2, compressor=compressor,
+                    ContentEncoding='gzip')
+
+        self.assertEqual(gzip.decompress(s3.objects['output/a.md']).decode('utf-8'), text)
+        self.assertEqual(s3.content_encodings['output/a.md'], 'gzip')
+        self.assertEqual(compressor.bytes_out, len(s3.objects['output/a.md']))
+
+    def test_failed_part_aborts_upload(self):
+        """prueba que el fallo de una parte aborta la subida y se propaga"""
+        s3 = FailingPartS3Client()
+
+        with self.assertRaises(ClientError):
+            upload_text(s3, 'b', 'output/a.md', 'x' * 40, part_size=8)
+
+        self.assertIn(('abort_multipart_upload', 'output/a.md', None), s3.calls)
+        self.assertEqual(s3.uploads, {})
+        self.assertNotIn('output/a.md', s3.objects)
+
+
+if __name__ == '__main__':
+    unittest.main()
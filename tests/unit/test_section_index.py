@@ -0,0 +1,61 @@
+import unittest
+from src.core.section_index import build_section_index, index_key
+
+
+class TestSectionIndex(unittest.TestCase):
+    """pruebas para el índice de secciones con offsets en bytes"""
+
+    def section(self, markdown, entry):
+        """extrae el rango del índice como lo haría un get por rango"""
+        return markdown.encode('utf-8')[entry['start']:entry['end']].decode('utf-8')
+
+    def test_headings_cover_their_sections(self):
+        """prueba que cada encabezado abarca hasta el siguiente de igual o mayor nivel"""
+        markdown = "# Título\n\nIntro ñ\n\n## Parte A\n\ntexto\n\n### Detalle\n\nmás\n\n## Parte B\n\nfin"
+
+        index = build_section_index(markdown)
+
+        titles = [(h['level'], h['title']) for h in index['headings']]
+        self.assertEqual(titles, [(1, 'Título'), (2, 'Parte A'), (3, 'Detalle'), (2, 'Parte B')])
+        self.assertEqual(index['bytes'], len(markdown.encode('utf-8')))
+        self.assertEqual(self.section(markdown, index['headings'][0]), markdown)
+        self.assertEqual(
+            self.section(markdown, index['headings'][1]),
+            "## Parte A\n\ntexto\n\n### Detalle\n\nmás\n\n"
+        )
+        self.assertEqual(self.section(markdown, index['headings'][3]), "## Parte B\n\nfin")
+
+    def test_tables_and_code_fences(self):
+        """prueba que se indexan las tablas y se ignora lo que hay en bloques de código"""
+        markdown = (
+            "intro\n\n| a | b |\n| --- | --- |\n| 1 | 2 |\n\n"
+            "```\n# no es encabezado\n| x |\n| y |\n```\n| suelta |\n"
+        )
+
+        index = build_section_index(markdown)
+
+        self.assertEqual(index['headings'], [])
+        self.assertEqual(len(index['tables']), 1)
+        self.assertEqual(index['tables'][0]['rows'], 3)
+        self.assertEqual(
+            self.section(markdown, index['tables'][0]),
+            "| a | b |\n| --- | --- |\n| 1 | 2 |\n"
+        )
+
+    def test_pages_from_form_feeds(self):
+        """prueba que los saltos de página de los pdfs delimitan las páginas"""
+        markdown = "página uno\n\n\fpágina dos\n\n\fpágina tres"
+
+        index = build_section_index(markdown)
+
+        self.assertEqual([p['page'] for p in index['pages']], [1, 2, 3])
+        self.assertEqual(self.section(markdown, index['pages'][1]), "página dos\n\n\f")
+        self.assertEqual(self.section(markdown, index['pages'][2]), "página tres")
+
+    def test_index_key(self):
+        """prueba la key del índice junto a la salida"""
+        self.assertEqual(index_key('output/doc.md'), 'output/doc.md.index.json')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import threading
+import unittest
+from src.core.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """pruebas para la coalescencia de llamadas concurrentes"""
+
+    def test_sequential_calls_run_each_time(self):
+        """prueba que llamadas no concurrentes no se coalescen"""
+        flight = SingleFlight()
+        calls = []
+
+        for _ in range(2):
+            result, shared = flight.do('key', lambda: calls.append(1) or {'n': len(calls)})
+            self.assertFalse(shared)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(flight.stats(), {'in_flight': 0, 'leaders': 2, 'coalesced': 0})
+
+    def test_concurrent_calls_share_result(self):
+        """prueba que las llamadas concurrentes esperan al líder"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'markdown': 'ok'}
+
+        def call():
+            results.append(flight.do('key', slow))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+
+        followers = [threading.Thread(target=call) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        # esperar a que los seguidores se registren antes de liberar al líder
+        while flight.stats()['coalesced'] < 3:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+        self.assertTrue(all(result == {'markdown': 'ok'} for result, _ in results))
+        # los seguidores reciben copias independientes
+        self.assertEqual(len({id(result) for result, _ in results}), 4)
+
+    def test_leader_changes_do_not_reach_followers(self):
+        """prueba que lo que el líder cambia en su resultado no llega a los que lo comparten"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        followed = []
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return {'markdown': 'ok', 'metadata': {}}
+
+        def follow():
+            followed.append(flight.do('key', slow)[0])
+
+        def lead():
+            result, _ = flight.do('key', slow)
+            result['index'] = {'headings': []}
+            result['metadata']['timings'] = {'convert': 1.0}
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=follow)
+        follower.start()
+        while flight.stats()['coalesced'] < 1:
+            threading.Event().wait(0.001)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(followed, [{'markdown': 'ok', 'metadata': {}}])
+
+    def test_exception_propagates_to_followers(self):
+        """prueba que el error del líder llega a todos"""
+        flight = SingleFlight()
+
+        def failing():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            flight.do('key', failing)
+
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
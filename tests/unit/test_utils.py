@@ -3,6 +3,7 @@ import json
 from datetime import datetime
 from src.utils.utils import (
     get_file_extension,
+    get_content_hash,
     get_current_timestamp,
     create_api_response,
     is_s3_event,
@@ -32,6 +33,12 @@ class TestUtils(unittest.TestCase):
             self.assertEqual(result, expected,
                              f"Failed for filename: {filename}")
     
+    def test_get_content_hash(self):
+        """prueba que texto y bytes equivalentes tienen el mismo hash"""
+        self.assertEqual(get_content_hash('hola'), get_content_hash(b'hola'))
+        self.assertNotEqual(get_content_hash(b'hola'), get_content_hash(b'adios'))
+        self.assertEqual(len(get_content_hash(b'')), 64)
+    
     def test_get_current_timestamp(self):
         """prueba generación de timestamp"""
         # obtener timestamp